@@ -0,0 +1,147 @@
+"""
+Short code allocator for Foxcode Shorter
+Hands out guaranteed-unique, non-sequential short codes without a
+collision check: each worker reserves a block of sequence numbers and
+encodes them through a keyed base62 permutation
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import string
+import threading
+from typing import List
+
+from sqlalchemy import text
+
+ALPHABET = string.digits + string.ascii_letters
+SEQUENCE_KEY = "short_code_sequence"
+SECRET_KEY = "short_code_secret"
+
+class ShortCodeAllocator:
+    """Unique short codes from a block-reserved sequence
+
+    Sequence numbers are unique (blocks are reserved with an atomic UPDATE
+    on the settings table) and the Feistel permutation is a bijection on
+    [0, 62**length), so two allocations can never produce the same code.
+    Legacy random codes are 8 characters; keep ``length`` different from
+    that so the two keyspaces stay disjoint.
+    """
+
+    def __init__(self, engine, length: int = 7, block_size: int = 1000,
+                 secret: str = None, rounds: int = 4):
+        self.engine = engine
+        self.length = length
+        self.block_size = block_size
+        self.rounds = rounds
+        self.domain = len(ALPHABET) ** length
+        bits = (self.domain - 1).bit_length()
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.configured_secret = secret or None
+        self._secret = None
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def load_secret(self):
+        """Per-deployment permutation key, stored in settings on first use
+
+        A configured secret is only used to seed settings. Once codes have
+        been issued the key must never change (a different permutation would
+        reissue existing codes), so a configured secret that differs from the
+        stored one is refused.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO settings (key, value, description) "
+                    "VALUES (:key, :value, 'Short code permutation key') ON CONFLICT (key) DO NOTHING"
+                ),
+                {"key": SECRET_KEY, "value": self.configured_secret or secrets.token_hex(32)}
+            )
+            value = conn.execute(text("SELECT value FROM settings WHERE key = :key"), {"key": SECRET_KEY}).scalar()
+        if self.configured_secret and not hmac.compare_digest(value, self.configured_secret):
+            raise RuntimeError(
+                "SHORT_CODE_SECRET does not match the short code key stored in settings; "
+                "unset it or restore the original value"
+            )
+        self._secret = value.encode("utf-8")
+
+    def _reserve_block(self, size: int):
+        """Atomically claim the next `size` sequence numbers"""
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO settings (key, value, description) "
+                    "VALUES (:key, '0', 'Next short code sequence number') ON CONFLICT (key) DO NOTHING"
+                ),
+                {"key": SEQUENCE_KEY}
+            )
+            conn.execute(
+                text("UPDATE settings SET value = CAST(value AS INTEGER) + :size WHERE key = :key"),
+                {"key": SEQUENCE_KEY, "size": size}
+            )
+            end = int(conn.execute(
+                text("SELECT value FROM settings WHERE key = :key"), {"key": SEQUENCE_KEY}
+            ).scalar())
+        if end > self.domain:
+            raise RuntimeError(f"Short code space of length {self.length} is exhausted")
+        self._next, self._end = end - size, end
+
+    def _round(self, value: int, round_index: int) -> int:
+        digest = hashlib.blake2b(
+            value.to_bytes(8, "little") + bytes([round_index]), key=self._secret[:64], digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "little") & self.half_mask
+
+    def _feistel(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+        for round_index in range(self.rounds):
+            left, right = right, left ^ self._round(right, round_index)
+        return (left << self.half_bits) | right
+
+    def permute(self, number: int) -> int:
+        """Bijection on [0, domain): Feistel network plus cycle walking"""
+        value = self._feistel(number)
+        while value >= self.domain:
+            value = self._feistel(value)
+        return value
+
+    def encode(self, number: int) -> str:
+        """Fixed-width base62 encoding of a permuted sequence number"""
+        value = self.permute(number)
+        chars = []
+        for _ in range(self.length):
+            value, digit = divmod(value, len(ALPHABET))
+            chars.append(ALPHABET[digit])
+        return "".join(reversed(chars))
+
+    def allocate_many(self, count: int) -> List[str]:
+        """`count` unique short codes"""
+        with self._lock:
+            if self._secret is None:
+                self.load_secret()
+            numbers = []
+            while len(numbers) < count:
+                if self._next >= self._end:
+                    self._reserve_block(max(self.block_size, count - len(numbers)))
+                take = min(self._end - self._next, count - len(numbers))
+                numbers.extend(range(self._next, self._next + take))
+                self._next += take
+        return [self.encode(number) for number in numbers]
+
+    def allocate(self) -> str:
+        """One unique short code"""
+        return self.allocate_many(1)[0]
+
+def allocator_from_config(engine, config: dict) -> ShortCodeAllocator:
+    """Build the allocator from the short_codes config section"""
+    settings = config.get("short_codes", {})
+    return ShortCodeAllocator(
+        engine,
+        length=settings.get("length", 7),
+        block_size=settings.get("block_size", 1000),
+        secret=os.getenv("SHORT_CODE_SECRET")
+    )
@@ -0,0 +1,178 @@
+"""
+Short code membership filter for Foxcode Shorter
+Counting Bloom filter used to answer "definitely not a short code" without I/O
+"""
+
+import hashlib
+import math
+import threading
+from sqlalchemy import text
+
+LOAD_SQL = text(
+    "SELECT id, short_code FROM shortlinks WHERE status = 'active' AND id > :after_id ORDER BY id"
+)
+
+class CountingBloomFilter:
+    """Bloom filter with 8-bit counters so entries can be removed"""
+
+    def __init__(self, capacity: int = 100000, fp_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.fp_rate = fp_rate
+        self.size = max(int(math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2))), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self._counters = bytearray(self.size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        """Insert key"""
+        positions = self._positions(key)
+        with self._lock:
+            for pos in positions:
+                if self._counters[pos] < 255:
+                    self._counters[pos] += 1
+            self.count += 1
+
+    def remove(self, key: str):
+        """Remove a previously added key"""
+        positions = self._positions(key)
+        with self._lock:
+            if not all(self._counters[pos] for pos in positions):
+                return  # never added
+            for pos in positions:
+                # Saturated counters are sticky; they only cost false positives
+                if self._counters[pos] < 255:
+                    self._counters[pos] -= 1
+            self.count = max(self.count - 1, 0)
+
+    def might_contain(self, key: str) -> bool:
+        """False means key was definitely never added"""
+        counters = self._counters
+        return all(counters[pos] for pos in self._positions(key))
+
+    def estimated_fp_rate(self) -> float:
+        """False-positive rate for the current number of entries"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def stats(self) -> dict:
+        """Sizing and memory usage"""
+        return {
+            "entries": self.count,
+            "capacity": self.capacity,
+            "target_fp_rate": self.fp_rate,
+            "estimated_fp_rate": round(self.estimated_fp_rate(), 6),
+            "counters": self.size,
+            "hash_functions": self.hash_count,
+            "memory_bytes": len(self._counters)
+        }
+
+class ShortCodeFilter:
+    """Bloom filter over active short codes, kept in sync with the database
+
+    Codes created or deleted through this process are applied immediately.
+    Codes created by other worker processes are picked up by a background
+    sync every ``refresh_interval`` seconds, so a brand-new link can be
+    reported missing on another worker for at most that long.
+    """
+
+    def __init__(self, engine, capacity: int = 100000, fp_rate: float = 0.01,
+                 refresh_interval: float = 2.0):
+        self.engine = engine
+        self.fp_rate = fp_rate
+        self.min_capacity = capacity
+        self.refresh_interval = refresh_interval
+        self.filter = CountingBloomFilter(capacity, fp_rate)
+        self._building = None  # filter being rebuilt, receives local adds too
+        self.ready = False
+        self.last_id = 0
+        self.rejected = 0
+        self._local_adds = set()  # added here since the last sync, skip on refresh
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _load(self, bloom: CountingBloomFilter, after_id: int) -> int:
+        last_id = after_id
+        local_adds = set()
+        if after_id:
+            local_adds, self._local_adds = self._local_adds, set()
+        with self.engine.connect() as conn:
+            for row_id, short_code in conn.execute(LOAD_SQL, {"after_id": after_id}):
+                if short_code not in local_adds:
+                    bloom.add(short_code)
+                last_id = row_id
+        return last_id
+
+    def build(self):
+        """(Re)build the filter from all active short codes"""
+        with self.engine.connect() as conn:
+            active = conn.execute(text("SELECT COUNT(*) FROM shortlinks WHERE status = 'active'")).scalar()
+        bloom = CountingBloomFilter(max(self.min_capacity, active * 2), self.fp_rate)
+        self._building = bloom
+        try:
+            self.last_id = self._load(bloom, 0)
+        finally:
+            self._building = None
+        self.filter = bloom
+        self.ready = True
+
+    def refresh(self):
+        """Add codes created since the last build/refresh"""
+        if self.filter.count >= self.filter.capacity:
+            self.build()
+            return
+        self.last_id = self._load(self.filter, self.last_id)
+
+    def add(self, short_code: str):
+        self._local_adds.add(short_code)
+        self.filter.add(short_code)
+        building = self._building
+        if building is not None:
+            building.add(short_code)
+
+    def remove(self, short_code: str):
+        self.filter.remove(short_code)
+        building = self._building
+        if building is not None:
+            building.remove(short_code)
+
+    def might_exist(self, short_code: str) -> bool:
+        """False means short_code is definitely not an active link"""
+        if not self.ready or self.filter.might_contain(short_code):
+            return True
+        self.rejected += 1
+        return False
+
+    def _run(self):
+        while not self._stopping.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing short code filter: {e}")
+
+    def start(self):
+        """Build the filter and start the background sync"""
+        try:
+            self.build()
+        except Exception as e:
+            # Stay not-ready: every lookup falls through to the database
+            print(f"Error building short code filter: {e}")
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="short-code-filter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=self.refresh_interval + 5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        data = self.filter.stats()
+        data.update({"ready": self.ready, "rejected_lookups": self.rejected})
+        return data
@@ -0,0 +1,138 @@
+"""
+Broadcast bookkeeping for Foxcode Shorter
+The API keeps broadcast state and the bot does the sending. Recipients are
+handed out in users.id order, and each progress report moves the
+last_user_id checkpoint in the same statement as the counters, so a bot that
+restarts continues after the last recipient it reported instead of re-sending.
+Only the bot process holding a broadcast's lease (owner) may send it.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_, select, update
+
+from models import BroadcastMessage, User
+
+ACTIVE_STATUSES = ("pending", "sending")
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+BLOCKED_BATCH = 500
+
+def _eligible():
+    return (User.status == "active", User.bot_blocked_at.is_(None))
+
+def to_dict(broadcast: BroadcastMessage) -> Dict:
+    return {
+        "broadcast_id": broadcast.id,
+        "message": broadcast.message,
+        "status": broadcast.status,
+        "total_users": broadcast.total_users or 0,
+        "sent_count": broadcast.sent_count or 0,
+        "failed_count": broadcast.failed_count or 0,
+        "blocked_count": broadcast.blocked_count or 0,
+        "last_user_id": broadcast.last_user_id or 0,
+        "owner": broadcast.owner,
+        "lease_expires_at": broadcast.lease_expires_at,
+        "created_by": broadcast.created_by,
+        "created_at": broadcast.created_at,
+        "updated_at": broadcast.updated_at,
+        "sent_at": broadcast.sent_at
+    }
+
+def create(db, message: str, created_by: str) -> BroadcastMessage:
+    broadcast = BroadcastMessage(
+        message=message, created_by=created_by, status="pending",
+        sent_count=0, failed_count=0, blocked_count=0, total_users=0, last_user_id=0
+    )
+    db.add(broadcast)
+    db.commit()
+    db.refresh(broadcast)
+    return broadcast
+
+def claim(db, broadcast_id: int, owner: str, lease_seconds: float) -> bool:
+    """Take or renew the send lease for owner; False while someone else holds it
+
+    A single conditional UPDATE, so of two bot processes claiming the same
+    broadcast only one can win. An expired lease can be taken over.
+    """
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(BroadcastMessage)
+        .where(
+            BroadcastMessage.id == broadcast_id,
+            BroadcastMessage.status.in_(ACTIVE_STATUSES),
+            or_(BroadcastMessage.owner.is_(None), BroadcastMessage.owner == owner,
+                BroadcastMessage.lease_expires_at.is_(None), BroadcastMessage.lease_expires_at < now)
+        )
+        .values(owner=owner, lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    ).rowcount > 0
+    db.commit()
+    return claimed
+
+def begin(db, broadcast: BroadcastMessage) -> BroadcastMessage:
+    """pending -> sending, counting recipients once (no-op for a running broadcast)"""
+    if broadcast.status == "pending":
+        broadcast.total_users = db.scalar(select(func.count(User.id)).where(*_eligible()))
+        broadcast.last_user_id = broadcast.last_user_id or 0
+        broadcast.status = "sending"
+        broadcast.updated_at = datetime.utcnow()
+        db.commit()
+    return broadcast
+
+def recipients(db, after: int, limit: int) -> List[Dict]:
+    """Next `limit` eligible users with users.id > after (keyset on the primary key)"""
+    rows = db.execute(
+        select(User.id, User.telegram_id)
+        .where(User.id > after, *_eligible())
+        .order_by(User.id)
+        .limit(limit)
+    ).all()
+    return [{"user_id": row.id, "telegram_id": row.telegram_id} for row in rows]
+
+def record_progress(db, broadcast_id: int, owner: str, last_user_id: int, sent: int = 0, failed: int = 0,
+                    blocked_telegram_ids: Optional[List[int]] = None, done: bool = False,
+                    lease_seconds: float = 60) -> bool:
+    """Apply one checkpoint from the lease owner (renewing the lease); returns
+    False if it was already recorded or owner no longer holds the broadcast
+
+    The counters only move when last_user_id advances, so a progress report
+    that is retried after a timeout is not counted twice.
+    """
+    blocked_telegram_ids = blocked_telegram_ids or []
+    now = datetime.utcnow()
+    applied = db.execute(
+        update(BroadcastMessage)
+        .where(BroadcastMessage.id == broadcast_id, BroadcastMessage.owner == owner,
+               BroadcastMessage.last_user_id < last_user_id)
+        .values(
+            last_user_id=last_user_id,
+            sent_count=BroadcastMessage.sent_count + sent,
+            failed_count=BroadcastMessage.failed_count + failed,
+            blocked_count=BroadcastMessage.blocked_count + len(blocked_telegram_ids),
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount > 0
+
+    if applied:
+        for start in range(0, len(blocked_telegram_ids), BLOCKED_BATCH):
+            db.execute(
+                update(User)
+                .where(User.telegram_id.in_(blocked_telegram_ids[start:start + BLOCKED_BATCH]),
+                       User.bot_blocked_at.is_(None))
+                .values(bot_blocked_at=now)
+                .execution_options(synchronize_session=False)
+            )
+    if done:
+        db.execute(
+            update(BroadcastMessage)
+            .where(BroadcastMessage.id == broadcast_id, BroadcastMessage.owner == owner,
+                   BroadcastMessage.status == "sending")
+            .values(status="completed", sent_at=now, updated_at=now, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return applied
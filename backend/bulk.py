@@ -0,0 +1,105 @@
+"""
+Bulk shortlink creation for Foxcode Shorter
+Validates a batch of URLs, debits the user once and inserts all valid
+links in a single transaction
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert, update
+
+from models import User, Shortlink
+import userstats
+import utils
+
+class InsufficientBalance(Exception):
+    """The user cannot pay for every valid item in the batch"""
+
+def validate_item(original_url: str, expiry_days: Optional[int], max_url_length: int):
+    """Return (clean_url, error); error is None for a valid item"""
+    url = utils.clean_url((original_url or "").strip())
+    if not original_url or not utils.is_valid_url(url):
+        return url, "Invalid URL"
+    if len(url) > max_url_length:
+        return url, f"URL longer than {max_url_length} characters"
+    if expiry_days is not None and expiry_days <= 0:
+        return url, "expiry_days must be positive"
+    return url, None
+
+def create_shortlinks_bulk(db, user: User, items: List[dict], cost: float, allocator,
+                           custom_domain: str, max_url_length: int = 2000,
+                           before_commit: Optional[Callable] = None) -> dict:
+    """Create one shortlink per valid item; invalid items are reported, not fatal
+
+    Raises InsufficientBalance (nothing written) if the user cannot pay for
+    all valid items. Commits once on success; ``before_commit(db, created,
+    failed)`` can add its own writes to that transaction.
+    """
+    results = []
+    rows = []
+    now = datetime.utcnow()
+
+    for index, item in enumerate(items):
+        url, error = validate_item(item.get("original_url"), item.get("expiry_days"), max_url_length)
+        if error:
+            results.append({"index": index, "original_url": item.get("original_url"), "status": "error", "error": error})
+            continue
+
+        expiry_days = item.get("expiry_days")
+        rows.append({
+            "user_id": user.id,
+            "original_url": url,
+            "url_fingerprint": utils.url_fingerprint(url),
+            "expiry_date": now + timedelta(days=expiry_days) if expiry_days else None,
+            "clicks": 0,
+            "status": "active",
+            "created_at": now
+        })
+        results.append({"index": index, "original_url": url, "status": "created"})
+
+    total_cost = cost * len(rows)
+    if rows:
+        if user.balance < total_cost:
+            raise InsufficientBalance(f"Insufficient balance: {len(rows)} links cost {total_cost}")
+
+        # Allocate before writing: the allocator commits on its own connection
+        for row, code in zip(rows, allocator.allocate_many(len(rows))):
+            row["short_code"] = code
+
+        # Conditional debit: fails instead of going negative under concurrent requests
+        debited = db.execute(
+            update(User).where(User.id == user.id, User.balance >= total_cost)
+            .values(balance=User.balance - total_cost)
+        ).rowcount
+        if not debited:
+            db.rollback()
+            raise InsufficientBalance(f"Insufficient balance: {len(rows)} links cost {total_cost}")
+
+        db.execute(insert(Shortlink), rows)
+        userstats.apply(db, user.id, links=len(rows), active=len(rows))
+
+    if rows or before_commit:
+        if before_commit:
+            before_commit(db, len(rows), len(results) - len(rows))
+        db.commit()
+
+    created = iter(rows)
+    for result in results:
+        if result["status"] == "created":
+            row = next(created)
+            result.update({
+                "short_code": row["short_code"],
+                "short_url": f"{custom_domain}/{row['short_code']}",
+                "expiry_date": row["expiry_date"]
+            })
+
+    db.refresh(user)
+    return {
+        "created": len(rows),
+        "failed": len(results) - len(rows),
+        "total_cost": total_cost,
+        "remaining_balance": user.balance,
+        "results": results,
+        "short_codes": [row["short_code"] for row in rows]
+    }
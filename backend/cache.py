@@ -0,0 +1,81 @@
+"""
+Redirect cache for Foxcode Shorter
+In-process LRU/TTL cache mapping short codes to their redirect target
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+CacheEntry = Tuple[str, Optional[datetime], str]  # (original_url, expiry_date, status)
+
+class LinkCache:
+    """Bounded LRU cache with per-entry TTL for short code lookups"""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # short_code -> (entry, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, short_code: str) -> Optional[CacheEntry]:
+        """Return cached entry or None; expired entries count as misses"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(short_code)
+            if item is None:
+                self.misses += 1
+                return None
+
+            entry, stored_at = item
+            original_url, expiry_date, status = entry
+            if now - stored_at > self.ttl_seconds or (expiry_date and datetime.utcnow() > expiry_date):
+                # Stale or past link expiry - drop it so the caller goes to the DB
+                del self._entries[short_code]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(short_code)
+            self.hits += 1
+            return entry
+
+    def set(self, short_code: str, original_url: str, expiry_date: Optional[datetime], status: str = "active"):
+        """Store entry, evicting the least recently used one when full"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[short_code] = ((original_url, expiry_date, status), time.monotonic())
+            self._entries.move_to_end(short_code)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, short_code: str):
+        """Remove a single short code from the cache"""
+        with self._lock:
+            self._entries.pop(short_code, None)
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
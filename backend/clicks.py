@@ -0,0 +1,189 @@
+"""
+Click accumulator for Foxcode Shorter
+Write-behind aggregation of redirect clicks into batched UPDATEs
+"""
+
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, bindparam, text
+
+import userstats
+
+FLUSH_SQL = text(
+    "UPDATE shortlinks SET clicks = clicks + :clicks, last_clicked = :last_clicked "
+    "WHERE short_code = :short_code"
+).bindparams(bindparam("last_clicked", type_=DateTime))
+
+EVENT_SQL = text(
+    "INSERT INTO click_events (short_code, clicked_at, referrer, user_agent_hash) "
+    "VALUES (:short_code, :clicked_at, :referrer, :user_agent_hash)"
+).bindparams(bindparam("clicked_at", type_=DateTime))
+
+def hash_user_agent(user_agent: Optional[str]) -> Optional[str]:
+    """Short, non-reversible user agent fingerprint"""
+    if not user_agent:
+        return None
+    return hashlib.blake2b(user_agent.encode("utf-8"), digest_size=8).hexdigest()
+
+class ClickAccumulator:
+    """Collect clicks in memory and flush them in one transaction
+
+    A flush happens every ``flush_interval`` seconds, or as soon as
+    ``flush_threshold`` clicks are pending. ``max_unflushed`` caps how many
+    clicks wait in memory (and can be lost on a crash) besides the batch being
+    written: while a slow or failing flush holds that many, further clicks
+    are dropped and counted in ``dropped_clicks``, and a failed batch is only
+    put back as far as the cap allows. record() never writes itself, since it
+    may run on the event loop.
+
+    With ``record_events`` on, every click is also appended to the
+    click_events table in the same transaction as the counter update.
+    """
+
+    def __init__(self, engine, flush_interval: float = 5.0,
+                 flush_threshold: int = 1000, max_unflushed: int = 10000,
+                 record_events: bool = False):
+        self.engine = engine
+        self.record_events = record_events
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_unflushed = max(max_unflushed, 1)
+        self._pending: Dict[str, Tuple[int, datetime]] = {}  # short_code -> (clicks, last_clicked)
+        self._pending_clicks = 0
+        self._events: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.flushed_clicks = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.dropped_clicks = 0
+        self.dropped_events = 0
+
+    def record(self, short_code: str, clicked_at: datetime = None,
+               referrer: Optional[str] = None, user_agent: Optional[str] = None):
+        """Count one click for short_code"""
+        clicked_at = clicked_at or datetime.utcnow()
+        event = None
+        if self.record_events:
+            event = {
+                "short_code": short_code,
+                "clicked_at": clicked_at,
+                "referrer": referrer[:500] if referrer else None,
+                "user_agent_hash": hash_user_agent(user_agent)
+            }
+        with self._lock:
+            pending = self._pending_clicks
+            if pending >= self.max_unflushed:
+                self.dropped_clicks += 1
+                if event:
+                    self.dropped_events += 1
+            else:
+                clicks, _ = self._pending.get(short_code, (0, clicked_at))
+                self._pending[short_code] = (clicks + 1, clicked_at)
+                self._pending_clicks = pending = pending + 1
+                if event:
+                    self._events.append(event)
+
+        if pending >= min(self.flush_threshold, self.max_unflushed):
+            self._wakeup.set()
+
+    def pending_clicks(self, short_code: str) -> int:
+        """Clicks recorded for short_code but not yet written"""
+        with self._lock:
+            return self._pending.get(short_code, (0, None))[0]
+
+    def flush(self) -> int:
+        """Write all pending clicks; returns number of clicks written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                total, self._pending_clicks = self._pending_clicks, 0
+                events, self._events = self._events, []
+
+            if not batch:
+                return 0
+
+            rows = [
+                {"short_code": code, "clicks": clicks, "last_clicked": last_clicked}
+                for code, (clicks, last_clicked) in batch.items()
+            ]
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(FLUSH_SQL, rows)
+                    userstats.apply_clicks(conn, rows)
+                    if events:
+                        conn.execute(EVENT_SQL, events)
+            except Exception as e:
+                self.flush_errors += 1
+                print(f"Error flushing clicks: {e}")
+                self._restore(batch, events)
+                return 0
+
+            self.flushed_clicks += total
+            self.flush_count += 1
+            return total
+
+    def _restore(self, batch: Dict[str, Tuple[int, datetime]], events: List[dict]):
+        """Merge a failed batch back so it is retried, keeping at most max_unflushed"""
+        with self._lock:
+            room = max(self.max_unflushed - len(self._events), 0)
+            if len(events) > room:
+                self.dropped_events += len(events) - room
+                events = events[len(events) - room:] if room else []
+            self._events[:0] = events
+
+            room = self.max_unflushed - self._pending_clicks
+            for code, (clicks, last_clicked) in batch.items():
+                kept = min(clicks, max(room, 0))
+                self.dropped_clicks += clicks - kept
+                if not kept:
+                    continue
+                room -= kept
+                pending, pending_last = self._pending.get(code, (0, last_clicked))
+                self._pending[code] = (pending + kept, max(pending_last, last_clicked))
+                self._pending_clicks += kept
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="click-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and write whatever is still pending"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        """Accumulator counters"""
+        with self._lock:
+            pending_codes = len(self._pending)
+            pending_clicks = self._pending_clicks
+        return {
+            "pending_codes": pending_codes,
+            "pending_clicks": pending_clicks,
+            "max_unflushed": self.max_unflushed,
+            "flushed_clicks": self.flushed_clicks,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "dropped_clicks": self.dropped_clicks,
+            "dropped_events": self.dropped_events
+        }
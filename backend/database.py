@@ -3,22 +3,163 @@ Database connection and session management
 SQLAlchemy database setup for SQLite
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.concurrency import run_in_threadpool
 from models import Base
 import os
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./foxcode_shorter.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Async mode: async endpoints use SQLAlchemy asyncio (aiosqlite) instead of
+# running the blocking session on the threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+def _async_url(url: str) -> str:
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# SQLite connection settings, applied to every new connection. WAL lets
+# redirects read while a link is being written; busy_timeout makes writers
+# wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("DB_CACHE_SIZE", "-65536")),  # negative = KiB, i.e. 64 MiB
+    "temp_store": os.getenv("DB_TEMP_STORE", "MEMORY")
+}
+
+# Connection pools: one for writes, a separate read-only one for lookups
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+READ_ONLY_POOL = os.getenv("DB_READ_ONLY_POOL", "true").lower() in ("1", "true", "yes")
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    """Set the configured pragmas on a raw DB-API connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            # journal_mode is stored in the file and cannot be set read-only
+            if read_only and name == "journal_mode":
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+def _pool_args(pool_size: int) -> dict:
+    # In-memory SQLite uses a single-connection pool that takes no sizing
+    if IS_SQLITE and make_url(DATABASE_URL).database in (None, "", ":memory:"):
+        return {}
+    return {"pool_size": pool_size, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT}
+
+def _read_only_url(url: str) -> str:
+    """file: URI opening the same SQLite database with mode=ro"""
+    path = os.path.abspath(make_url(url).database)
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
 
 # Create engine
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **_pool_args(POOL_SIZE)
 )
 
-# Create session maker
+# Read-only engine for lookups (falls back to the main engine for
+# in-memory or non-SQLite databases)
+read_engine = engine
+if IS_SQLITE and READ_ONLY_POOL and _pool_args(READ_POOL_SIZE):
+    read_engine = create_engine(
+        _read_only_url(DATABASE_URL),
+        connect_args={"check_same_thread": False},
+        **_pool_args(READ_POOL_SIZE)
+    )
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+    if read_engine is not engine:
+        @event.listens_for(read_engine, "connect")
+        def _on_read_connect(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+# Create session makers
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+def _async_pool_args(pool_size: int) -> dict:
+    # aiosqlite defaults to NullPool, which takes no sizing arguments
+    pool_args = _pool_args(pool_size)
+    return dict(pool_args, poolclass=AsyncAdaptedQueuePool) if pool_args else {}
+
+# Async engines (only created when enabled, aiosqlite is optional otherwise),
+# with the same write/read-only split as the sync ones
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if DB_ASYNC:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_pool_args(POOL_SIZE))
+    async_read_engine = async_engine
+    if read_engine is not engine:
+        async_read_engine = create_async_engine(
+            _async_url(_read_only_url(DATABASE_URL)), **_async_pool_args(READ_POOL_SIZE)
+        )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+    if IS_SQLITE:
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _on_async_connect(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection)
+
+        if async_read_engine is not async_engine:
+            @event.listens_for(async_read_engine.sync_engine, "connect")
+            def _on_async_read_connect(dbapi_connection, connection_record):
+                apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+class ThreadedSession:
+    """Awaitable wrapper around a sync Session for async endpoints
+
+    Mirrors the subset of AsyncSession used by the API so async endpoints
+    work in both modes. Results are buffered inside the worker thread.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement, params=None):
+        def run():
+            result = self.session.execute(statement, params)
+            # UPDATE/INSERT results have no rows to buffer, only rowcount.
+            # ORM select() results have no returns_rows and always have rows.
+            return result.freeze() if getattr(result, "returns_rows", True) else result
+        result = await run_in_threadpool(run)
+        return result() if callable(result) else result
+
+    async def scalar(self, statement, params=None):
+        return await run_in_threadpool(self.session.scalar, statement, params)
+
+    async def scalars(self, statement, params=None):
+        return (await self.execute(statement, params)).scalars()
+
+    async def commit(self):
+        await run_in_threadpool(self.session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.session.close)
 
 def create_tables():
     """Create all database tables"""
@@ -32,6 +173,62 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Dependency to get a read-only database session"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def open_async_session():
+    """New awaitable session for the configured mode; caller must close it"""
+    if DB_ASYNC:
+        return AsyncSessionLocal()
+    return ThreadedSession(SessionLocal())
+
+async def get_async_db():
+    """Dependency to get an awaitable database session"""
+    db = open_async_session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def open_async_read_session():
+    """New awaitable session for lookups on the read-only pool"""
+    if DB_ASYNC:
+        return AsyncReadSessionLocal()
+    return ThreadedSession(ReadSessionLocal())
+
+async def get_async_read_db():
+    """Dependency to get an awaitable read-only database session"""
+    db = open_async_read_session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def database_report() -> dict:
+    """Effective connection settings, read back from live connections"""
+    report = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "async": DB_ASYNC,
+        "pool": engine.pool.status(),
+        "read_pool": read_engine.pool.status() if read_engine is not engine else "shared with writes"
+    }
+    if DB_ASYNC:
+        report["async_pool"] = async_engine.pool.status()
+        report["async_read_pool"] = (
+            async_read_engine.pool.status() if async_read_engine is not async_engine else "shared with writes"
+        )
+    if IS_SQLITE:
+        with engine.connect() as conn:
+            report["pragmas"] = {
+                name: conn.execute(text(f"PRAGMA {name}")).scalar() for name in SQLITE_PRAGMAS
+            }
+    return report
+
 def init_database():
     """Initialize database with default settings"""
     create_tables()
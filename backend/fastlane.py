@@ -0,0 +1,84 @@
+"""
+Redirect fast lane for Foxcode Shorter
+Raw ASGI handler for GET /{short_code} that skips FastAPI routing,
+dependency injection and response classes
+
+Run in front of the API:  uvicorn fastlane:create_app --factory
+"""
+
+import json
+from typing import Callable, Optional
+from urllib.parse import quote
+
+from resolver import FOUND, EXPIRED
+
+# First path segments that belong to the API, never short codes
+RESERVED_PATHS = {"api", "docs", "redoc", "openapi.json", "favicon.ico"}
+
+def _json_body(detail: str) -> bytes:
+    return json.dumps({"detail": detail}).encode("utf-8")
+
+NOT_FOUND_BODY = _json_body("Short URL not found")
+EXPIRED_BODY = _json_body("Short URL has expired")
+
+class RedirectFastLane:
+    """ASGI app that answers short code redirects and delegates everything else
+
+    Responses match the FastAPI route: 307 with a Location header, or 404
+    with the same JSON ``detail`` for unknown and expired codes.
+    """
+
+    def __init__(self, resolver, app=None, on_click: Optional[Callable] = None):
+        self.resolver = resolver
+        self.app = app
+        self.on_click = on_click
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            short_code = scope["path"][1:]
+            if short_code and "/" not in short_code and short_code not in RESERVED_PATHS:
+                await self.redirect(scope, short_code, send)
+                return
+
+        if self.app is None:
+            if scope["type"] == "http":
+                await self._send(send, 404, [(b"content-type", b"application/json")], NOT_FOUND_BODY)
+            return
+        await self.app(scope, receive, send)
+
+    async def redirect(self, scope, short_code: str, send):
+        try:
+            status, original_url = await self.resolver.resolve(short_code)
+        except Exception as e:
+            await self._send(send, 500, [(b"content-type", b"application/json")], _json_body(str(e)))
+            return
+
+        if status != FOUND:
+            body = EXPIRED_BODY if status == EXPIRED else NOT_FOUND_BODY
+            await self._send(send, 404, [(b"content-type", b"application/json")], body)
+            return
+
+        if self.on_click:
+            headers = dict(scope["headers"])
+            referrer = headers.get(b"referer")
+            user_agent = headers.get(b"user-agent")
+            self.on_click(
+                short_code,
+                referrer.decode("latin-1") if referrer else None,
+                user_agent.decode("latin-1") if user_agent else None
+            )
+
+        # Same escaping as starlette's RedirectResponse
+        location = quote(original_url, safe=":/%#?=@[]!$&'()*+,;")
+        await self._send(send, 307, [(b"location", location.encode("latin-1"))], b"")
+
+    @staticmethod
+    async def _send(send, status: int, headers, body: bytes):
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+def create_app():
+    """Fast lane mounted ahead of the full FastAPI app (which owns startup/shutdown)"""
+    import main
+    return RedirectFastLane(main.link_resolver, main.app, on_click=main.record_click)
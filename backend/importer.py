@@ -0,0 +1,196 @@
+"""
+Streaming URL import for Foxcode Shorter
+Shortens CSV or NDJSON files of any size in fixed-size chunks. Each chunk
+commits its links, the balance debit and the job checkpoint together, so a
+resumed job never re-charges links that were already created.
+
+CLI: python importer.py --telegram-id 123456789 urls.csv [--job-id ID] > results.ndjson
+"""
+
+import codecs
+import csv
+import json
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import update
+
+from bulk import create_shortlinks_bulk, InsufficientBalance
+from models import ImportJob
+
+URL_COLUMNS = ("original_url", "url", "link")
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    if requested:
+        return requested.lower()
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+def _expiry(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def iter_csv(binary) -> Iterator[dict]:
+    """Rows from a CSV file: a header with a url column, or url[,expiry_days] lines"""
+    reader = csv.reader(codecs.iterdecode(binary, "utf-8-sig"))
+    url_index, expiry_index = 0, 1
+    first = True
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if first:
+            first = False
+            header = [cell.strip().lower() for cell in row]
+            url_column = next((name for name in URL_COLUMNS if name in header), None)
+            if url_column:
+                url_index = header.index(url_column)
+                expiry_index = header.index("expiry_days") if "expiry_days" in header else None
+                continue
+        yield {
+            "original_url": row[url_index].strip() if len(row) > url_index else "",
+            "expiry_days": _expiry(row[expiry_index]) if expiry_index is not None and len(row) > expiry_index else None
+        }
+
+def iter_ndjson(binary) -> Iterator[dict]:
+    """Rows from NDJSON: {"url": ..., "expiry_days": ...} objects or bare strings"""
+    for line in codecs.iterdecode(binary, "utf-8-sig"):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield {"original_url": None, "error": "Invalid JSON"}
+            continue
+        if isinstance(value, str):
+            yield {"original_url": value, "expiry_days": None}
+        elif isinstance(value, dict):
+            url = next((value[name] for name in URL_COLUMNS if name in value), None)
+            yield {"original_url": url, "expiry_days": _expiry(value.get("expiry_days"))}
+        else:
+            yield {"original_url": None, "error": "Expected an object or string"}
+
+def iter_rows(binary, fmt: str) -> Iterator[dict]:
+    if fmt == "ndjson":
+        return iter_ndjson(binary)
+    if fmt == "csv":
+        return iter_csv(binary)
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+def start_job(db, user, filename: Optional[str]) -> ImportJob:
+    job = ImportJob(id=uuid.uuid4().hex, user_id=user.id, filename=filename, status="running")
+    db.add(job)
+    db.commit()
+    return job
+
+def run_import(db, job: ImportJob, user, rows: Iterator[dict], cost: float, allocator,
+               custom_domain: str, chunk_size: int = 500, max_url_length: int = 2000,
+               on_created: Optional[Callable] = None) -> Iterator[dict]:
+    """Process rows chunk by chunk, yielding one result dict per row and a final summary
+
+    Rows already covered by job.rows_processed are skipped, which is how an
+    interrupted job is resumed with the same file.
+    """
+    rows = islice(rows, job.rows_processed, None)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        offset = job.rows_processed
+        items = [row if not row.get("error") else {"original_url": None} for row in chunk]
+
+        def checkpoint(session, created, failed):
+            session.execute(
+                update(ImportJob).where(ImportJob.id == job.id).values(
+                    rows_processed=ImportJob.rows_processed + len(chunk),
+                    links_created=ImportJob.links_created + created,
+                    rows_failed=ImportJob.rows_failed + failed,
+                    amount_charged=ImportJob.amount_charged + created * cost,
+                    updated_at=datetime.utcnow()
+                )
+            )
+
+        try:
+            result = create_shortlinks_bulk(
+                db, user, items, cost, allocator, custom_domain,
+                max_url_length=max_url_length, before_commit=checkpoint
+            )
+        except InsufficientBalance as e:
+            db.execute(update(ImportJob).where(ImportJob.id == job.id).values(status="stopped"))
+            db.commit()
+            db.refresh(job)
+            yield {"type": "error", "row": offset, "error": str(e)}
+            break
+
+        db.refresh(job)
+        if on_created:
+            on_created(result["short_codes"])
+
+        for item, row in zip(result["results"], chunk):
+            item["row"] = offset + item.pop("index")
+            if row.get("error"):
+                item["error"] = row["error"]
+            yield dict(item, type="result")
+
+    if job.status == "running":
+        job.status = "completed"
+        db.commit()
+
+    yield {
+        "type": "summary",
+        "job_id": job.id,
+        "status": job.status,
+        "rows_processed": job.rows_processed,
+        "links_created": job.links_created,
+        "rows_failed": job.rows_failed,
+        "amount_charged": job.amount_charged,
+        "remaining_balance": user.balance
+    }
+
+def to_ndjson(record: dict) -> str:
+    return json.dumps(record, default=str) + "\n"
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from allocator import allocator_from_config
+    from database import SessionLocal, engine
+    from models import User
+
+    parser = argparse.ArgumentParser(description="Shorten every URL in a CSV or NDJSON file")
+    parser.add_argument("file")
+    parser.add_argument("--telegram-id", type=int, required=True)
+    parser.add_argument("--job-id", help="resume an interrupted import")
+    parser.add_argument("--format", choices=("csv", "ndjson"))
+    args = parser.parse_args()
+
+    with open("config.json", "r") as f:
+        config = json.load(f)
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.telegram_id == args.telegram_id).first()
+        if not user:
+            sys.exit("User not found")
+        job = db.get(ImportJob, args.job_id) if args.job_id else start_job(db, user, args.file)
+        if not job or job.user_id != user.id:
+            sys.exit("Import job not found")
+        job.status = "running"
+        db.commit()
+
+        with open(args.file, "rb") as binary:
+            for record in run_import(
+                db, job, user, iter_rows(binary, detect_format(args.file, args.format)),
+                config["shortlink_cost"], allocator_from_config(engine, config), config["custom_domain"],
+                chunk_size=config.get("imports", {}).get("chunk_size", 500),
+                max_url_length=config.get("limits", {}).get("max_url_length", 2000)
+            ):
+                sys.stdout.write(to_ndjson(record))
+    finally:
+        db.close()
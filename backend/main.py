@@ -4,22 +4,121 @@ FastAPI + SQLite Backend API for Telegram Bot
 Created by: codewithkanchan.com
 """
 
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from sqlalchemy import String, func, select, tuple_, type_coerce
 from sqlalchemy.orm import Session
-from database import get_db
-from models import User, Shortlink, Payment, Base
+from database import (
+    get_db, get_async_db, get_async_read_db, open_async_session, open_async_read_session,
+    database_report, engine, SessionLocal
+)
+from models import User, Shortlink, Payment, ClickRollup, ImportJob, UserStats, BroadcastMessage, Base
+from cache import LinkCache
+from clicks import ClickAccumulator
+from bloom import ShortCodeFilter
+from rollups import ClickCompactor, bucket_start
+from snapshot import SnapshotReader, SnapshotBuilder
+from resolver import LinkResolver, NOT_FOUND, EXPIRED
+from sweeper import ExpirySweeper
+from allocator import allocator_from_config
+from bulk import create_shortlinks_bulk, InsufficientBalance
+import importer
+import broadcasts
+import userstats
 import utils
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 
 # Load configuration
 with open('config.json', 'r') as f:
     config = json.load(f)
 
+# Collision-free short code allocation
+code_allocator = allocator_from_config(engine, config)
+
+# Redirect cache (short_code -> original_url, expiry_date, status)
+cache_config = config.get("redirect_cache", {})
+link_cache = LinkCache(
+    max_size=cache_config.get("max_size", 10000),
+    ttl_seconds=cache_config.get("ttl_seconds", 300)
+)
+
+# Write-behind click counter
+click_config = config.get("click_flush", {})
+click_accumulator = ClickAccumulator(
+    engine,
+    flush_interval=click_config.get("interval_seconds", 5),
+    flush_threshold=click_config.get("batch_size", 1000),
+    max_unflushed=click_config.get("max_unflushed_clicks", 10000),
+    record_events=config.get("click_events", {}).get("enabled", True)
+)
+
+# Hourly/daily rollups of click events
+events_config = config.get("click_events", {})
+click_compactor = ClickCompactor(
+    engine,
+    interval=events_config.get("compaction_interval_seconds", 300),
+    retention_days=events_config.get("retention_days", 30)
+)
+
+# Negative-lookup filter over active short codes
+filter_config = config.get("short_code_filter", {})
+short_code_filter = ShortCodeFilter(
+    engine,
+    capacity=filter_config.get("capacity", 100000),
+    fp_rate=filter_config.get("fp_rate", 0.01),
+    refresh_interval=filter_config.get("refresh_interval_seconds", 2)
+)
+FILTER_ENABLED = filter_config.get("enabled", True)
+
+# Shared mmap snapshot of active links for multi-worker deployments
+snapshot_config = config.get("redirect_snapshot", {})
+SNAPSHOT_ENABLED = snapshot_config.get("enabled", False)
+snapshot_path = snapshot_config.get("path", "redirect_snapshot.bin")
+snapshot_reader = SnapshotReader(snapshot_path, check_interval=snapshot_config.get("reload_check_seconds", 1))
+snapshot_builder = SnapshotBuilder(
+    engine,
+    snapshot_path,
+    interval=snapshot_config.get("rebuild_interval_seconds", 60),
+    debounce=snapshot_config.get("rebuild_debounce_seconds", 2)
+)
+SNAPSHOT_BUILDER = SNAPSHOT_ENABLED and snapshot_config.get("build_in_process", True)
+
+link_resolver = LinkResolver(
+    open_async_session,
+    link_cache,
+    code_filter=short_code_filter if FILTER_ENABLED else None,
+    snapshot=snapshot_reader if SNAPSHOT_ENABLED else None,
+    read_session_factory=open_async_read_session
+)
+
+def evict_expired(rows):
+    """Drop links expired by the sweeper from the in-process lookups"""
+    for row in rows:
+        link_cache.invalidate(row.short_code)
+        short_code_filter.remove(row.short_code)
+    if SNAPSHOT_BUILDER:
+        snapshot_builder.mark_dirty()
+
+# Background expiry of due links
+sweeper_config = config.get("expiry_sweeper", {})
+expiry_sweeper = ExpirySweeper(
+    engine,
+    interval=sweeper_config.get("interval_seconds", 60),
+    chunk_size=sweeper_config.get("chunk_size", 500),
+    pause=sweeper_config.get("chunk_pause_seconds", 0.05),
+    on_expired=evict_expired
+)
+SWEEPER_ENABLED = sweeper_config.get("enabled", True) and config.get("features", {}).get("expiry_cleanup", True)
+
+def record_click(short_code: str, referrer: Optional[str] = None, user_agent: Optional[str] = None):
+    """Count a successful redirect"""
+    click_accumulator.record(short_code, referrer=referrer, user_agent=user_agent)
+
 app = FastAPI(
     title="Foxcode Shorter API",
     description="AI Link Shortener SaaS Backend",
@@ -35,6 +134,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class BulkShortlinkItem(BaseModel):
+    original_url: str
+    expiry_days: Optional[int] = None
+
+class BulkShortlinkRequest(BaseModel):
+    telegram_id: int
+    items: List[BulkShortlinkItem]
+
+class BroadcastRequest(BaseModel):
+    message: str
+    admin_id: Optional[int] = None
+    created_by: Optional[str] = None
+
+class BroadcastProgress(BaseModel):
+    owner: str  # lease holder, as passed to /start
+    last_user_id: int
+    sent: int = 0
+    failed: int = 0
+    blocked: List[int] = []  # telegram_ids that blocked the bot
+    done: bool = False
+
+@app.on_event("startup")
+def report_database_settings():
+    try:
+        print(f"Database settings: {json.dumps(database_report(), default=str)}")
+    except Exception as e:
+        print(f"Could not read database settings: {e}")
+
+@app.on_event("startup")
+def check_short_code_secret():
+    # Fail fast instead of issuing codes that collide with existing ones
+    code_allocator.load_secret()
+
+@app.on_event("startup")
+def start_background_jobs():
+    click_accumulator.start()
+    if click_accumulator.record_events:
+        click_compactor.start()
+    if SNAPSHOT_BUILDER:
+        snapshot_builder.start()
+    if FILTER_ENABLED:
+        short_code_filter.start()
+    if SWEEPER_ENABLED:
+        expiry_sweeper.start()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    expiry_sweeper.stop()
+    short_code_filter.stop()
+    click_accumulator.stop()
+    click_compactor.stop()
+    snapshot_builder.stop()
+
 @app.get("/")
 def read_root():
     return {"message": "Foxcode Shorter API", "status": "running", "version": "1.0.0"}
@@ -45,6 +197,10 @@ def create_user(telegram_id: int, username: str, db: Session = Depends(get_db)):
     try:
         existing_user = db.query(User).filter(User.telegram_id == telegram_id).first()
         if existing_user:
+            if existing_user.bot_blocked_at:
+                # They are talking to the bot again, so broadcasts can reach them
+                existing_user.bot_blocked_at = None
+                db.commit()
             return {"message": "User already exists", "user_id": existing_user.id}
 
         new_user = User(
@@ -62,9 +218,9 @@ def create_user(telegram_id: int, username: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/users/{telegram_id}")
-def get_user(telegram_id: int, db: Session = Depends(get_db)):
+async def get_user(telegram_id: int, db=Depends(get_async_db)):
     """Get user information"""
-    user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    user = await db.scalar(select(User).where(User.telegram_id == telegram_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -74,25 +230,165 @@ def get_user(telegram_id: int, db: Session = Depends(get_db)):
         "username": user.username,
         "balance": user.balance,
         "status": user.status,
+        "terms_accepted_at": user.terms_accepted_at,
         "created_at": user.created_at
     }
 
+@app.put("/api/users/{telegram_id}/terms")
+def accept_terms(telegram_id: int, db: Session = Depends(get_db)):
+    """Record that the user accepted the terms (idempotent)"""
+    user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if not user.terms_accepted_at:
+        user.terms_accepted_at = datetime.utcnow()
+        db.commit()
+
+    return {"terms_accepted_at": user.terms_accepted_at}
+
+@app.get("/api/users/{telegram_id}/summary")
+async def get_user_summary(telegram_id: int, db=Depends(get_async_read_db)):
+    """Account info and link totals from user_stats (cost does not grow with link count)"""
+    row = (await db.execute(
+        select(User, UserStats).outerjoin(UserStats, UserStats.user_id == User.id)
+        .where(User.telegram_id == telegram_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="User not found")
+    user, stats = row
+
+    return {
+        "telegram_id": user.telegram_id,
+        "username": user.username,
+        "balance": user.balance,
+        "status": user.status,
+        "created_at": user.created_at,
+        "total_links": stats.total_links if stats else 0,
+        "active_links": stats.active_links if stats else 0,
+        "expired_links": stats.expired_links if stats else 0,
+        "total_clicks": stats.total_clicks if stats else 0,
+        "links_available": int(user.balance // config["shortlink_cost"]),
+        "shortlink_cost": config["shortlink_cost"]
+    }
+
+dashboard_config = config.get("dashboard", {})
+
+@app.get("/api/users/{telegram_id}/dashboard")
+async def get_user_dashboard(telegram_id: int, top: Optional[int] = None, payments: Optional[int] = None,
+                             db=Depends(get_async_read_db)):
+    """Everything the bot's /stats and /wallet screens show, in one response
+
+    Four indexed queries: account + user_stats totals, the top links by
+    clicks, the latest payments and per-status payment totals. None of them
+    reads more than N rows of a user's links.
+    """
+    max_items = dashboard_config.get("max_items", 20)
+    top = min(max(dashboard_config.get("top_links", 5) if top is None else top, 0), max_items)
+    payments = min(max(dashboard_config.get("recent_payments", 5) if payments is None else payments, 0), max_items)
+
+    row = (await db.execute(
+        select(User, UserStats).outerjoin(UserStats, UserStats.user_id == User.id)
+        .where(User.telegram_id == telegram_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="User not found")
+    user, stats = row
+
+    # idx_shortlinks_user_clicks
+    top_links = (await db.execute(
+        select(Shortlink.short_code, Shortlink.original_url, Shortlink.clicks, Shortlink.status)
+        .where(Shortlink.user_id == user.id)
+        .order_by(Shortlink.clicks.desc())
+        .limit(top)
+    )).all()
+    # idx_payments_user_created
+    recent_payments = (await db.execute(
+        select(Payment.id, Payment.amount, Payment.status, Payment.payment_method, Payment.created_at)
+        .where(Payment.user_id == user.id)
+        .order_by(Payment.created_at.desc())
+        .limit(payments)
+    )).all()
+    # idx_payments_user_status
+    payment_totals = (await db.execute(
+        select(Payment.status, func.count(), func.coalesce(func.sum(Payment.amount), 0))
+        .where(Payment.user_id == user.id)
+        .group_by(Payment.status)
+    )).all()
+
+    return {
+        "telegram_id": user.telegram_id,
+        "username": user.username,
+        "balance": user.balance,
+        "status": user.status,
+        "created_at": user.created_at,
+        "terms_accepted_at": user.terms_accepted_at,
+        "total_links": stats.total_links if stats else 0,
+        "active_links": stats.active_links if stats else 0,
+        "expired_links": stats.expired_links if stats else 0,
+        "total_clicks": stats.total_clicks if stats else 0,
+        "links_available": int(user.balance // config["shortlink_cost"]),
+        "shortlink_cost": config["shortlink_cost"],
+        "top_links": [
+            {
+                "short_code": link.short_code,
+                "short_url": f"{config['custom_domain']}/{link.short_code}",
+                "original_url": link.original_url,
+                "clicks": link.clicks,
+                "status": link.status
+            }
+            for link in top_links
+        ],
+        "recent_payments": [
+            {
+                "id": payment.id,
+                "amount": payment.amount,
+                "status": payment.status,
+                "payment_method": payment.payment_method,
+                "created_at": payment.created_at
+            }
+            for payment in recent_payments
+        ],
+        "payments": {status: {"count": count, "amount": amount} for status, count, amount in payment_totals}
+    }
+
 @app.post("/api/shortlinks")
 def create_shortlink(telegram_id: int, original_url: str, 
-                    expiry_days: Optional[int] = None, db: Session = Depends(get_db)):
-    """Create new shortlink"""
+                    expiry_days: Optional[int] = None, dedupe: Optional[bool] = None,
+                    db: Session = Depends(get_db)):
+    """Create new shortlink
+
+    With dedupe on, an active link the user already has for the same
+    canonical URL is returned instead of charging for a new one.
+    """
     try:
         user = db.query(User).filter(User.telegram_id == telegram_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
+        fingerprint = utils.url_fingerprint(original_url)
+        if dedupe if dedupe is not None else config.get("dedupe_links", False):
+            # Single lookup on idx_shortlinks_user_fingerprint
+            existing = db.query(Shortlink).filter(
+                Shortlink.user_id == user.id,
+                Shortlink.url_fingerprint == fingerprint,
+                Shortlink.status == "active"
+            ).order_by(Shortlink.id.desc()).first()
+            if existing and not (existing.expiry_date and datetime.utcnow() > existing.expiry_date):
+                return {
+                    "message": "Existing shortlink returned",
+                    "short_url": f"{config['custom_domain']}/{existing.short_code}",
+                    "short_code": existing.short_code,
+                    "expiry_date": existing.expiry_date,
+                    "remaining_balance": user.balance,
+                    "deduplicated": True
+                }
+
         if user.balance < config["shortlink_cost"]:
             raise HTTPException(status_code=400, detail="Insufficient balance")
 
-        # Generate unique short code
-        short_code = utils.generate_short_code()
-        while db.query(Shortlink).filter(Shortlink.short_code == short_code).first():
-            short_code = utils.generate_short_code()
+        # Allocate unique short code (no collision check needed)
+        short_code = code_allocator.allocate()
 
         # Calculate expiry date
         expiry_date = None
@@ -103,6 +399,7 @@ def create_shortlink(telegram_id: int, original_url: str,
         shortlink = Shortlink(
             user_id=user.id,
             original_url=original_url,
+            url_fingerprint=fingerprint,
             short_code=short_code,
             expiry_date=expiry_date,
             clicks=0,
@@ -112,8 +409,10 @@ def create_shortlink(telegram_id: int, original_url: str,
 
         # Deduct balance
         user.balance -= config["shortlink_cost"]
+        userstats.apply(db, user.id, links=1, active=1)
         db.commit()
         db.refresh(shortlink)
+        short_code_filter.add(short_code)
 
         short_url = f"{config['custom_domain']}/{short_code}"
 
@@ -128,60 +427,229 @@ def create_shortlink(telegram_id: int, original_url: str,
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/shortlinks/bulk")
+def create_shortlinks_in_bulk(request: BulkShortlinkRequest, db: Session = Depends(get_db)):
+    """Create many shortlinks with one balance debit and one transaction"""
+    max_items = config.get("bulk", {}).get("max_items", 500)
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(request.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} URLs per request")
+
+    user = db.query(User).filter(User.telegram_id == request.telegram_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        result = create_shortlinks_bulk(
+            db,
+            user,
+            [item.model_dump() for item in request.items],
+            config["shortlink_cost"],
+            code_allocator,
+            config["custom_domain"],
+            max_url_length=config.get("limits", {}).get("max_url_length", 2000)
+        )
+    except InsufficientBalance:
+        raise HTTPException(status_code=400, detail="Insufficient balance")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    for short_code in result.pop("short_codes"):
+        short_code_filter.add(short_code)
+
+    return dict(result, message=f"{result['created']} shortlinks created")
+
+@app.post("/api/imports")
+def import_shortlinks(telegram_id: int, file: UploadFile = File(...),
+                      job_id: Optional[str] = None, format: Optional[str] = None):
+    """Shorten a CSV/NDJSON upload in chunks, streaming NDJSON results
+
+    Pass the job_id from an interrupted import with the same file to resume it.
+    """
+    fmt = importer.detect_format(file.filename, format)
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.telegram_id == telegram_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        if job_id:
+            job = db.get(ImportJob, job_id)
+            if not job or job.user_id != user.id:
+                raise HTTPException(status_code=404, detail="Import job not found")
+            if job.status != "completed":
+                job.status = "running"
+                db.commit()
+        else:
+            job = importer.start_job(db, user, file.filename)
+    except Exception:
+        db.close()
+        raise
+
+    imports_config = config.get("imports", {})
+
+    def stream():
+        try:
+            yield importer.to_ndjson({"type": "job", "job_id": job.id, "resumed_at_row": job.rows_processed})
+            for record in importer.run_import(
+                db, job, user, importer.iter_rows(file.file, fmt),
+                config["shortlink_cost"], code_allocator, config["custom_domain"],
+                chunk_size=imports_config.get("chunk_size", 500),
+                max_url_length=config.get("limits", {}).get("max_url_length", 2000),
+                on_created=lambda codes: [short_code_filter.add(code) for code in codes]
+            ):
+                yield importer.to_ndjson(record)
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/api/imports/{job_id}")
+def get_import_job(job_id: str, db: Session = Depends(get_db)):
+    """Import job progress"""
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "rows_processed": job.rows_processed,
+        "links_created": job.links_created,
+        "rows_failed": job.rows_failed,
+        "amount_charged": job.amount_charged,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
 @app.get("/{short_code}")
-def redirect_shortlink(short_code: str, db: Session = Depends(get_db)):
+async def redirect_shortlink(short_code: str, request: Request):
     """Redirect to original URL"""
     try:
-        shortlink = db.query(Shortlink).filter(
-            Shortlink.short_code == short_code,
-            Shortlink.status == "active"
-        ).first()
-
-        if not shortlink:
+        status, original_url = await link_resolver.resolve(short_code)
+        if status == NOT_FOUND:
             raise HTTPException(status_code=404, detail="Short URL not found")
-
-        # Check expiry
-        if shortlink.expiry_date and datetime.utcnow() > shortlink.expiry_date:
-            shortlink.status = "expired"
-            db.commit()
+        if status == EXPIRED:
             raise HTTPException(status_code=404, detail="Short URL has expired")
 
-        # Increment click count
-        shortlink.clicks += 1
-        shortlink.last_clicked = datetime.utcnow()
-        db.commit()
+        # Increment click count (flushed in batches)
+        record_click(short_code, request.headers.get("referer"), request.headers.get("user-agent"))
 
-        return RedirectResponse(url=shortlink.original_url)
+        return RedirectResponse(url=original_url)
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Selectable fields for link listings -> columns they need
+LINK_FIELDS = {
+    "id": (Shortlink.id,),
+    "original_url": (Shortlink.original_url,),
+    "short_url": (Shortlink.short_code,),
+    "short_code": (Shortlink.short_code,),
+    "clicks": (Shortlink.clicks,),
+    "status": (Shortlink.status,),
+    "created_at": (Shortlink.created_at,),
+    "expiry_date": (Shortlink.expiry_date,),
+    "last_clicked": (Shortlink.last_clicked,)
+}
+pagination_config = config.get("pagination", {})
+
 @app.get("/api/shortlinks/{telegram_id}")
-def get_user_shortlinks(telegram_id: int, db: Session = Depends(get_db)):
-    """Get user's shortlinks"""
-    user = db.query(User).filter(User.telegram_id == telegram_id).first()
-    if not user:
+async def get_user_shortlinks(telegram_id: int, limit: Optional[int] = None, cursor: Optional[str] = None,
+                              status: Optional[str] = None, fields: Optional[str] = None,
+                              db=Depends(get_async_read_db)):
+    """Get user's shortlinks, newest first, one page at a time
+
+    Pass the returned next_cursor back as ``cursor`` for the next page.
+    ``fields`` is a comma-separated subset of LINK_FIELDS.
+    """
+    user_id = await db.scalar(select(User.id).where(User.telegram_id == telegram_id))
+    if not user_id:
         raise HTTPException(status_code=404, detail="User not found")
 
-    shortlinks = db.query(Shortlink).filter(Shortlink.user_id == user.id).all()
+    limit = min(limit or pagination_config.get("default_limit", 50), pagination_config.get("max_limit", 200))
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(LINK_FIELDS)
+    unknown = [name for name in requested if name not in LINK_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    # Only the requested columns are loaded, plus the keyset columns
+    columns = {Shortlink.created_at.key: Shortlink.created_at, Shortlink.id.key: Shortlink.id}
+    for name in requested:
+        for column in LINK_FIELDS[name]:
+            columns[column.key] = column
+
+    query = select(*columns.values()).where(Shortlink.user_id == user_id)
+    if status:
+        query = query.where(Shortlink.status == status)
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = utils.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(Shortlink.created_at, Shortlink.id) < tuple_(cursor_created_at, cursor_id))
+    # Walks idx_shortlinks_user_created; fetch one extra row to know if there is a next page
+    query = query.order_by(Shortlink.created_at.desc(), Shortlink.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
     result = []
-    for link in shortlinks:
-        result.append({
-            "id": link.id,
-            "original_url": link.original_url,
-            "short_url": f"{config['custom_domain']}/{link.short_code}",
-            "short_code": link.short_code,
-            "clicks": link.clicks,
-            "status": link.status,
-            "created_at": link.created_at,
-            "expiry_date": link.expiry_date,
-            "last_clicked": link.last_clicked
-        })
-
-    return {"shortlinks": result}
+    for row in rows:
+        link = {}
+        for name in requested:
+            if name == "short_url":
+                link[name] = f"{config['custom_domain']}/{row.short_code}"
+            else:
+                link[name] = getattr(row, name)
+        result.append(link)
+
+    return {
+        "shortlinks": result,
+        "next_cursor": utils.encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+        "has_more": has_more
+    }
+
+@app.get("/api/shortlinks/{short_code}/stats")
+async def get_shortlink_stats(short_code: str, hours: int = 48, days: int = 30,
+                              db=Depends(get_async_read_db)):
+    """Hourly and daily click histograms for a shortlink"""
+    shortlink = (await db.execute(
+        select(Shortlink.clicks, Shortlink.last_clicked).where(Shortlink.short_code == short_code)
+    )).first()
+    if not shortlink:
+        raise HTTPException(status_code=404, detail="Shortlink not found")
+
+    now = datetime.utcnow()
+    histograms = {}
+    for period, since in (("hour", now - timedelta(hours=hours)), ("day", now - timedelta(days=days))):
+        rows = (await db.execute(
+            select(ClickRollup.bucket_start, ClickRollup.clicks).where(
+                ClickRollup.short_code == short_code,
+                ClickRollup.period == period,
+                type_coerce(ClickRollup.bucket_start, String) >= bucket_start(period, since)
+            ).order_by(ClickRollup.bucket_start)
+        )).all()
+        histograms[period] = [{"bucket": bucket, "clicks": clicks} for bucket, clicks in rows]
+
+    return {
+        "short_code": short_code,
+        "total_clicks": shortlink.clicks + click_accumulator.pending_clicks(short_code),
+        "last_clicked": shortlink.last_clicked,
+        "hourly": histograms["hour"],
+        "daily": histograms["day"]
+    }
 
 @app.post("/api/payments")
 def create_payment_request(telegram_id: int, amount: float, 
@@ -240,11 +708,146 @@ def delete_shortlink(short_code: str, db: Session = Depends(get_db)):
     if not shortlink:
         raise HTTPException(status_code=404, detail="Shortlink not found")
 
+    was_active = shortlink.status == "active"
+    userstats.apply(
+        db, shortlink.user_id, links=-1, active=-int(was_active),
+        expired=-int(shortlink.status == "expired"), clicks=-(shortlink.clicks or 0)
+    )
     db.delete(shortlink)
     db.commit()
+    link_cache.invalidate(short_code)
+    if was_active:
+        short_code_filter.remove(short_code)
+        if SNAPSHOT_BUILDER:
+            snapshot_builder.mark_dirty()
 
     return {"message": "Shortlink deleted successfully"}
 
+@app.post("/api/admin/cleanup-expired")
+def cleanup_expired_links():
+    """Expire all due links now and return the counts"""
+    return dict(expiry_sweeper.sweep_once(), status="success")
+
+@app.post("/api/admin/rebuild-user-stats")
+def rebuild_user_stats():
+    """Recompute user_stats from shortlinks (after manual edits to the database)"""
+    return {"users_rebuilt": userstats.rebuild(engine)}
+
+@app.get("/api/admin/cache")
+def get_cache_stats():
+    """Redirect cache hit/miss counters"""
+    return link_cache.stats()
+
+@app.get("/api/admin/bloom")
+def get_filter_stats():
+    """Short code filter size, false-positive rate and memory use"""
+    return dict(short_code_filter.stats(), enabled=FILTER_ENABLED)
+
+@app.get("/api/admin/snapshot")
+def get_snapshot_stats():
+    """Redirect snapshot status"""
+    return dict(snapshot_reader.stats(), enabled=SNAPSHOT_ENABLED, last_build=snapshot_builder.last_result)
+
+@app.get("/api/admin/clicks")
+def get_click_stats():
+    """Pending and flushed click counters"""
+    return click_accumulator.stats()
+
+broadcast_config = config.get("broadcast", {})
+
+def get_broadcast_or_404(db: Session, broadcast_id: int) -> BroadcastMessage:
+    broadcast = db.get(BroadcastMessage, broadcast_id)
+    if not broadcast:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return broadcast
+
+@app.post("/api/admin/broadcast")
+def create_broadcast(request: BroadcastRequest, db: Session = Depends(get_db)):
+    """Queue a message for all active users; the bot picks it up and sends it"""
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message is empty")
+    created_by = request.created_by or (f"telegram:{request.admin_id}" if request.admin_id else "admin")
+    return broadcasts.to_dict(broadcasts.create(db, request.message, created_by))
+
+@app.get("/api/admin/broadcasts")
+def list_broadcasts(status: Optional[str] = None, limit: int = 50, db: Session = Depends(get_db)):
+    """Recent broadcasts, optionally filtered by a comma-separated status list"""
+    query = db.query(BroadcastMessage)
+    if status:
+        query = query.filter(BroadcastMessage.status.in_(status.split(",")))
+    rows = query.order_by(BroadcastMessage.id.desc()).limit(min(max(limit, 1), 200)).all()
+    return {"broadcasts": [broadcasts.to_dict(row) for row in rows]}
+
+@app.get("/api/admin/broadcasts/{broadcast_id}")
+def get_broadcast(broadcast_id: int, db: Session = Depends(get_db)):
+    """Broadcast progress"""
+    return broadcasts.to_dict(get_broadcast_or_404(db, broadcast_id))
+
+def claim_broadcast_or_409(db: Session, broadcast_id: int, owner: str) -> BroadcastMessage:
+    broadcast = get_broadcast_or_404(db, broadcast_id)
+    if broadcast.status not in broadcasts.ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Broadcast is {broadcast.status}")
+    claimed = broadcasts.claim(db, broadcast_id, owner, broadcast_config.get("lease_seconds", 60))
+    db.refresh(broadcast)
+    if not claimed:
+        if broadcast.status not in broadcasts.ACTIVE_STATUSES:
+            raise HTTPException(status_code=409, detail=f"Broadcast is {broadcast.status}")
+        raise HTTPException(status_code=409, detail=f"Broadcast is being sent by {broadcast.owner}")
+    return broadcast
+
+@app.post("/api/admin/broadcasts/{broadcast_id}/start")
+def start_broadcast(broadcast_id: int, owner: str, db: Session = Depends(get_db)):
+    """Claim the send lease for `owner`, then mark a pending broadcast as sending
+
+    Idempotent for the lease holder; 409 while another owner's lease is live.
+    """
+    broadcast = claim_broadcast_or_409(db, broadcast_id, owner)
+    return broadcasts.to_dict(broadcasts.begin(db, broadcast))
+
+@app.post("/api/admin/broadcasts/{broadcast_id}/heartbeat")
+def renew_broadcast_lease(broadcast_id: int, owner: str, db: Session = Depends(get_db)):
+    """Extend the sender's lease; 409 once it is lost and sending must stop"""
+    return broadcasts.to_dict(claim_broadcast_or_409(db, broadcast_id, owner))
+
+@app.get("/api/admin/broadcasts/{broadcast_id}/recipients")
+def get_broadcast_recipients(broadcast_id: int, after: Optional[int] = None, limit: Optional[int] = None,
+                             db: Session = Depends(get_db)):
+    """Next chunk of recipients after `after` (default: the broadcast's checkpoint)"""
+    broadcast = get_broadcast_or_404(db, broadcast_id)
+    after = (broadcast.last_user_id or 0) if after is None else after
+    max_chunk = broadcast_config.get("max_chunk", 1000)
+    limit = min(max(limit or max_chunk, 1), max_chunk)
+    rows = broadcasts.recipients(db, after, limit)
+    return {
+        "recipients": rows,
+        "next_after": rows[-1]["user_id"] if rows else after,
+        "has_more": len(rows) == limit
+    }
+
+@app.post("/api/admin/broadcasts/{broadcast_id}/progress")
+def record_broadcast_progress(broadcast_id: int, progress: BroadcastProgress, db: Session = Depends(get_db)):
+    """Checkpoint sent/failed counts and mark users who blocked the bot"""
+    broadcast = get_broadcast_or_404(db, broadcast_id)
+    if broadcast.owner != progress.owner:
+        raise HTTPException(status_code=409, detail=f"Broadcast is being sent by {broadcast.owner}")
+    applied = broadcasts.record_progress(
+        db, broadcast_id, progress.owner, progress.last_user_id, sent=progress.sent, failed=progress.failed,
+        blocked_telegram_ids=progress.blocked, done=progress.done,
+        lease_seconds=broadcast_config.get("lease_seconds", 60)
+    )
+    db.refresh(broadcast)
+    return dict(broadcasts.to_dict(broadcast), applied=applied)
+
+@app.post("/api/admin/broadcasts/{broadcast_id}/cancel")
+def cancel_broadcast(broadcast_id: int, db: Session = Depends(get_db)):
+    """Stop a broadcast; the bot checks the status after each checkpoint"""
+    broadcast = get_broadcast_or_404(db, broadcast_id)
+    if broadcast.status in broadcasts.ACTIVE_STATUSES:
+        broadcast.status = "cancelled"
+        broadcast.updated_at = datetime.utcnow()
+        db.commit()
+    return broadcasts.to_dict(broadcast)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,111 @@
+"""Baseline schema (users, shortlinks, payments, admins, settings, broadcasts)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created earlier with create_all() already have these tables;
+existing tables are left untouched so `alembic upgrade head` works on both.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("telegram_id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(100), nullable=False),
+            sa.Column("balance", sa.Float(), default=0.0),
+            sa.Column("status", sa.String(20), default="active"),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime())
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_telegram_id", "users", ["telegram_id"], unique=True)
+
+    if "shortlinks" not in existing:
+        op.create_table(
+            "shortlinks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("original_url", sa.Text(), nullable=False),
+            sa.Column("short_code", sa.String(20), nullable=False),
+            sa.Column("clicks", sa.Integer(), default=0),
+            sa.Column("status", sa.String(20), default="active"),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("expiry_date", sa.DateTime(), nullable=True),
+            sa.Column("last_clicked", sa.DateTime(), nullable=True)
+        )
+        op.create_index("ix_shortlinks_id", "shortlinks", ["id"])
+        op.create_index("ix_shortlinks_short_code", "shortlinks", ["short_code"], unique=True)
+
+    if "payments" not in existing:
+        op.create_table(
+            "payments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("payment_method", sa.String(50), default="manual"),
+            sa.Column("payment_proof", sa.Text(), nullable=True),
+            sa.Column("razorpay_order_id", sa.String(100), nullable=True),
+            sa.Column("razorpay_payment_id", sa.String(100), nullable=True),
+            sa.Column("status", sa.String(20), default="pending"),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("processed_at", sa.DateTime(), nullable=True),
+            sa.Column("processed_by", sa.String(100), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True)
+        )
+        op.create_index("ix_payments_id", "payments", ["id"])
+
+    if "admins" not in existing:
+        op.create_table(
+            "admins",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(100), nullable=False, unique=True),
+            sa.Column("email", sa.String(150), nullable=False, unique=True),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+            sa.Column("role", sa.String(20), default="admin"),
+            sa.Column("is_active", sa.Boolean(), default=True),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("last_login", sa.DateTime(), nullable=True)
+        )
+        op.create_index("ix_admins_id", "admins", ["id"])
+
+    if "settings" not in existing:
+        op.create_table(
+            "settings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("key", sa.String(100), nullable=False, unique=True),
+            sa.Column("value", sa.Text(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("updated_at", sa.DateTime())
+        )
+        op.create_index("ix_settings_id", "settings", ["id"])
+
+    if "broadcast_messages" not in existing:
+        op.create_table(
+            "broadcast_messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("sent_count", sa.Integer(), default=0),
+            sa.Column("total_users", sa.Integer(), default=0),
+            sa.Column("status", sa.String(20), default="pending"),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+            sa.Column("created_by", sa.String(100), nullable=False)
+        )
+        op.create_index("ix_broadcast_messages_id", "broadcast_messages", ["id"])
+
+def downgrade():
+    for table in ("broadcast_messages", "settings", "admins", "payments", "shortlinks", "users"):
+        op.drop_table(table)
@@ -0,0 +1,103 @@
+"""Click events and rollups, import jobs, URL fingerprints
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Adds the tables and shortlink columns introduced since the baseline and
+backfills url_fingerprint for existing links in batches.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+import utils
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    if "click_events" not in existing:
+        op.create_table(
+            "click_events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("short_code", sa.String(20), nullable=False),
+            sa.Column("clicked_at", sa.DateTime()),
+            sa.Column("referrer", sa.Text(), nullable=True),
+            sa.Column("user_agent_hash", sa.String(16), nullable=True)
+        )
+        op.create_index("ix_click_events_id", "click_events", ["id"])
+        op.create_index("ix_click_events_clicked_at", "click_events", ["clicked_at"])
+
+    if "click_rollups" not in existing:
+        op.create_table(
+            "click_rollups",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("short_code", sa.String(20), nullable=False),
+            sa.Column("period", sa.String(10), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("clicks", sa.Integer(), default=0),
+            sa.UniqueConstraint("short_code", "period", "bucket_start")
+        )
+        op.create_index("ix_click_rollups_id", "click_rollups", ["id"])
+
+    if "import_jobs" not in existing:
+        op.create_table(
+            "import_jobs",
+            sa.Column("id", sa.String(32), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("filename", sa.String(255), nullable=True),
+            sa.Column("status", sa.String(20), default="running"),
+            sa.Column("rows_processed", sa.Integer(), default=0),
+            sa.Column("links_created", sa.Integer(), default=0),
+            sa.Column("rows_failed", sa.Integer(), default=0),
+            sa.Column("amount_charged", sa.Float(), default=0.0),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime())
+        )
+
+    columns = {column["name"] for column in inspector.get_columns("shortlinks")}
+    if "url_fingerprint" not in columns:
+        with op.batch_alter_table("shortlinks") as batch:
+            batch.add_column(sa.Column("url_fingerprint", sa.String(32), nullable=True))
+
+    indexes = {index["name"] for index in inspector.get_indexes("shortlinks")}
+    if "idx_shortlinks_status_expiry" not in indexes:
+        op.create_index("idx_shortlinks_status_expiry", "shortlinks", ["status", "expiry_date"])
+    if "idx_shortlinks_user_fingerprint" not in indexes:
+        op.create_index("idx_shortlinks_user_fingerprint", "shortlinks", ["user_id", "url_fingerprint"])
+
+    backfill_fingerprints(op.get_bind())
+
+def backfill_fingerprints(connection):
+    """Fingerprint links created before the column existed"""
+    select_batch = sa.text(
+        "SELECT id, original_url FROM shortlinks "
+        "WHERE url_fingerprint IS NULL AND id > :last_id ORDER BY id LIMIT :limit"
+    )
+    update_row = sa.text("UPDATE shortlinks SET url_fingerprint = :fingerprint WHERE id = :id")
+    last_id = 0
+    while True:
+        rows = connection.execute(select_batch, {"last_id": last_id, "limit": BACKFILL_BATCH}).all()
+        if not rows:
+            break
+        connection.execute(update_row, [
+            {"id": row.id, "fingerprint": utils.url_fingerprint(row.original_url)} for row in rows
+        ])
+        last_id = rows[-1].id
+
+def downgrade():
+    op.drop_index("idx_shortlinks_user_fingerprint", table_name="shortlinks")
+    op.drop_index("idx_shortlinks_status_expiry", table_name="shortlinks")
+    with op.batch_alter_table("shortlinks") as batch:
+        batch.drop_column("url_fingerprint")
+    op.drop_table("import_jobs")
+    op.drop_table("click_rollups")
+    op.drop_table("click_events")
@@ -0,0 +1,47 @@
+"""Composite indexes for the hot query paths
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+- shortlinks(user_id, status): a user's links and stats screens
+- shortlinks(user_id, url_fingerprint, status): dedupe lookup; replaces the
+  two-column index from 0002, which lost to (user_id, status) once that existed
+- payments(status, created_at): admin panel pending payments, newest first
+- payments(user_id, status): approved payments per user in the users list
+shortlinks(status, expiry_date) for the expiry sweeper exists since 0002.
+The redirect lookup (short_code, status) needs nothing new: short_code is
+unique, so its own index already returns at most one row.
+Checked by tests/test_query_plans.py.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("idx_shortlinks_user_fingerprint", "shortlinks", ["user_id", "url_fingerprint", "status"]),
+    ("idx_shortlinks_user_status", "shortlinks", ["user_id", "status"]),
+    ("idx_payments_status_created", "payments", ["status", "created_at"]),
+    ("idx_payments_user_status", "payments", ["user_id", "status"]),
+]
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        existing = {index["name"]: index["column_names"] for index in inspector.get_indexes(table)}
+        if existing.get(name) == columns:
+            continue
+        if name in existing:
+            op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES[1:]):
+        op.drop_index(name, table_name=table)
+    op.drop_index("idx_shortlinks_user_fingerprint", table_name="shortlinks")
+    op.create_index("idx_shortlinks_user_fingerprint", "shortlinks", ["user_id", "url_fingerprint"])
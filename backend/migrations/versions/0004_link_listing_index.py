@@ -0,0 +1,25 @@
+"""Index for keyset-paginated link listings
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+GET /api/shortlinks/{telegram_id} pages through a user's links ordered by
+(created_at, id); this index serves both the seek and the order.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("shortlinks")}
+    if "idx_shortlinks_user_created" not in indexes:
+        op.create_index("idx_shortlinks_user_created", "shortlinks", ["user_id", "created_at", "id"])
+
+def downgrade():
+    op.drop_index("idx_shortlinks_user_created", table_name="shortlinks")
@@ -0,0 +1,37 @@
+"""Per-user link statistics
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+Creates user_stats and fills it from the existing shortlinks.
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+import userstats
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if "user_stats" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "user_stats",
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("total_links", sa.Integer(), default=0),
+            sa.Column("active_links", sa.Integer(), default=0),
+            sa.Column("expired_links", sa.Integer(), default=0),
+            sa.Column("total_clicks", sa.Integer(), default=0),
+            sa.Column("updated_at", sa.DateTime())
+        )
+    op.execute(sa.text("DELETE FROM user_stats"))
+    op.get_bind().execute(userstats.REBUILD_SQL, {"now": datetime.utcnow()})
+
+def downgrade():
+    op.drop_table("user_stats")
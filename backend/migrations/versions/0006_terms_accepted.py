@@ -0,0 +1,27 @@
+"""Terms acceptance on users
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+The bot used to keep this flag in process memory, so users had to accept
+the terms again after every restart.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+    if "terms_accepted_at" not in columns:
+        with op.batch_alter_table("users") as batch:
+            batch.add_column(sa.Column("terms_accepted_at", sa.DateTime(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("terms_accepted_at")
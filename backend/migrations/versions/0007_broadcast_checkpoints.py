@@ -0,0 +1,51 @@
+"""Broadcast progress checkpoints
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+Adds the resume point and failure counters to broadcast_messages, and
+users.bot_blocked_at so users who blocked the bot are skipped. The recipients
+query walks idx_users_status (status, rowid) from the checkpoint.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+BROADCAST_COLUMNS = (
+    ("failed_count", sa.Integer(), "0"),
+    ("blocked_count", sa.Integer(), "0"),
+    ("last_user_id", sa.Integer(), "0"),
+    ("updated_at", sa.DateTime(), None),
+)
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {column["name"] for column in inspector.get_columns("users")}
+    if "bot_blocked_at" not in columns:
+        with op.batch_alter_table("users") as batch:
+            batch.add_column(sa.Column("bot_blocked_at", sa.DateTime(), nullable=True))
+
+    columns = {column["name"] for column in inspector.get_columns("broadcast_messages")}
+    missing = [column for column in BROADCAST_COLUMNS if column[0] not in columns]
+    if missing:
+        with op.batch_alter_table("broadcast_messages") as batch:
+            for name, type_, default in missing:
+                batch.add_column(sa.Column(name, type_, nullable=True, server_default=default))
+
+    if "idx_users_status" not in {index["name"] for index in inspector.get_indexes("users")}:
+        op.create_index("idx_users_status", "users", ["status"])
+
+def downgrade():
+    op.drop_index("idx_users_status", table_name="users")
+    with op.batch_alter_table("broadcast_messages") as batch:
+        for name, _, _ in reversed(BROADCAST_COLUMNS):
+            batch.drop_column(name)
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("bot_blocked_at")
@@ -0,0 +1,33 @@
+"""Indexes for the user dashboard
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+GET /api/users/{telegram_id}/dashboard reads a user's most-clicked links and
+latest payments; these indexes let both stop after N rows instead of
+sorting all of the user's rows.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("idx_shortlinks_user_clicks", "shortlinks", ["user_id", "clicks"]),
+    ("idx_payments_user_created", "payments", ["user_id", "created_at"]),
+)
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,36 @@
+"""Broadcast send leases
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+
+A broadcast is claimed by one bot process (owner) for a renewable lease,
+so several bot processes can run the broadcast engine without sending the
+same broadcast twice.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ("owner", sa.String(100)),
+    ("lease_expires_at", sa.DateTime()),
+)
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("broadcast_messages")}
+    missing = [column for column in COLUMNS if column[0] not in columns]
+    if missing:
+        with op.batch_alter_table("broadcast_messages") as batch:
+            for name, type_ in missing:
+                batch.add_column(sa.Column(name, type_, nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("broadcast_messages") as batch:
+        for name, _ in reversed(COLUMNS):
+            batch.drop_column(name)
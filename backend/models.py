@@ -3,7 +3,7 @@ Database models for Foxcode Shorter
 SQLAlchemy ORM models for users, shortlinks, and payments
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -12,12 +12,15 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("idx_users_status", "status"),)
 
     id = Column(Integer, primary_key=True, index=True)
     telegram_id = Column(Integer, unique=True, index=True, nullable=False)
     username = Column(String(100), nullable=False)
     balance = Column(Float, default=0.0)
     status = Column(String(20), default="active")  # active, blocked, banned
+    terms_accepted_at = Column(DateTime, nullable=True)
+    bot_blocked_at = Column(DateTime, nullable=True)  # user blocked the bot; skipped by broadcasts
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -27,10 +30,18 @@ class User(Base):
 
 class Shortlink(Base):
     __tablename__ = "shortlinks"
+    __table_args__ = (
+        Index("idx_shortlinks_status_expiry", "status", "expiry_date"),
+        Index("idx_shortlinks_user_fingerprint", "user_id", "url_fingerprint", "status"),
+        Index("idx_shortlinks_user_status", "user_id", "status"),
+        Index("idx_shortlinks_user_created", "user_id", "created_at", "id"),
+        Index("idx_shortlinks_user_clicks", "user_id", "clicks"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     original_url = Column(Text, nullable=False)
+    url_fingerprint = Column(String(32), nullable=True)  # hash of utils.canonicalize_url
     short_code = Column(String(20), unique=True, index=True, nullable=False)
     clicks = Column(Integer, default=0)
     status = Column(String(20), default="active")  # active, expired, deleted
@@ -43,6 +54,11 @@ class Shortlink(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("idx_payments_status_created", "status", "created_at"),
+        Index("idx_payments_user_status", "user_id", "status"),
+        Index("idx_payments_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -87,8 +103,57 @@ class BroadcastMessage(Base):
     id = Column(Integer, primary_key=True, index=True)
     message = Column(Text, nullable=False)
     sent_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    blocked_count = Column(Integer, default=0)
     total_users = Column(Integer, default=0)
-    status = Column(String(20), default="pending")  # pending, sending, completed, failed
+    last_user_id = Column(Integer, default=0)  # checkpoint: recipients up to this users.id are done
+    status = Column(String(20), default="pending")  # pending, sending, completed, cancelled, failed
+    owner = Column(String(100), nullable=True)  # bot process holding the send lease
+    lease_expires_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True)
     sent_at = Column(DateTime, nullable=True)
     created_by = Column(String(100), nullable=False)
+
+class ClickEvent(Base):
+    __tablename__ = "click_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    short_code = Column(String(20), nullable=False)
+    clicked_at = Column(DateTime, default=datetime.utcnow, index=True)
+    referrer = Column(Text, nullable=True)
+    user_agent_hash = Column(String(16), nullable=True)
+
+class ClickRollup(Base):
+    __tablename__ = "click_rollups"
+    __table_args__ = (UniqueConstraint("short_code", "period", "bucket_start"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    short_code = Column(String(20), nullable=False)
+    period = Column(String(10), nullable=False)  # hour, day
+    bucket_start = Column(DateTime, nullable=False)
+    clicks = Column(Integer, default=0)
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String(255), nullable=True)
+    status = Column(String(20), default="running")  # running, completed, stopped
+    rows_processed = Column(Integer, default=0)
+    links_created = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    amount_charged = Column(Float, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_links = Column(Integer, default=0)
+    active_links = Column(Integer, default=0)
+    expired_links = Column(Integer, default=0)
+    total_clicks = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
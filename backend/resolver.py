@@ -0,0 +1,92 @@
+"""
+Short code resolution for Foxcode Shorter
+Shared lookup path used by the FastAPI redirect route and the ASGI fast lane
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+
+from models import Shortlink
+import userstats
+
+FOUND = "found"
+NOT_FOUND = "not_found"
+EXPIRED = "expired"
+
+Resolution = Tuple[str, Optional[str]]  # (status, original_url)
+
+class LinkResolver:
+    """Resolve a short code via cache, negative filter, snapshot, then database
+
+    Any object with ``async resolve(short_code) -> (status, url)`` can be used
+    in its place by the fast lane.
+    """
+
+    def __init__(self, session_factory, cache, code_filter=None, snapshot=None,
+                 read_session_factory=None):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.cache = cache
+        self.code_filter = code_filter
+        self.snapshot = snapshot
+
+    async def resolve(self, short_code: str) -> Resolution:
+        cached = self.cache.get(short_code)
+        if cached:
+            original_url, expiry_date, _ = cached
+        elif self.code_filter and not self.code_filter.might_exist(short_code):
+            return NOT_FOUND, None
+        else:
+            # Snapshot first; links newer than the snapshot fall back to the DB
+            row = self.snapshot.lookup(short_code) if self.snapshot else None
+            if not row:
+                row = await self._fetch(short_code)
+            if not row:
+                return NOT_FOUND, None
+            original_url, expiry_date = row
+
+        if expiry_date and datetime.utcnow() > expiry_date:
+            await self.expire(short_code)
+            return EXPIRED, None
+
+        if not cached:
+            self.cache.set(short_code, original_url, expiry_date)
+        return FOUND, original_url
+
+    async def _fetch(self, short_code: str):
+        db = self.read_session_factory()
+        try:
+            return (await db.execute(
+                select(Shortlink.original_url, Shortlink.expiry_date).where(
+                    Shortlink.short_code == short_code,
+                    Shortlink.status == "active"
+                )
+            )).first()
+        finally:
+            await db.close()
+
+    async def expire(self, short_code: str):
+        """Mark an expired link and drop it from the in-process lookups
+
+        Only the request whose UPDATE expires the row removes the code from
+        the filter: removing a code twice lowers counters other codes share.
+        """
+        self.cache.invalidate(short_code)
+
+        db = self.session_factory()
+        try:
+            result = await db.execute(
+                update(Shortlink).where(
+                    Shortlink.short_code == short_code,
+                    Shortlink.status == "active"
+                ).values(status="expired")
+            )
+            if result.rowcount:
+                await db.execute(userstats.APPLY_BY_CODE_SQL, userstats.delta(short_code=short_code, active=-1, expired=1))
+            await db.commit()
+        finally:
+            await db.close()
+        if result.rowcount and self.code_filter:
+            self.code_filter.remove(short_code)
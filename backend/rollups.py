@@ -0,0 +1,103 @@
+"""
+Click rollups for Foxcode Shorter
+Compacts raw click_events into hourly/daily buckets and prunes old events
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, bindparam, text
+
+WATERMARK_KEY = "click_rollup_watermark"
+
+BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00"
+}
+
+def bucket_start(period: str, moment: datetime) -> str:
+    """Start of the bucket holding moment, in the text format stored in bucket_start
+
+    SQLite compares the column as text, so a bound like '... 12:00:00.000000'
+    would sort after the stored '... 12:00:00' and skip that bucket.
+    """
+    return moment.strftime(BUCKET_FORMATS[period])
+
+ROLLUP_SQL = """
+INSERT INTO click_rollups (short_code, period, bucket_start, clicks)
+SELECT short_code, '{period}', strftime('{fmt}', clicked_at), COUNT(*)
+FROM click_events
+WHERE id > :after_id AND id <= :max_id
+GROUP BY short_code, strftime('{fmt}', clicked_at)
+ON CONFLICT (short_code, period, bucket_start) DO UPDATE SET clicks = clicks + excluded.clicks
+"""
+
+def compact_clicks(engine, retention_days: int = 30) -> dict:
+    """Roll up events newer than the watermark, then drop expired raw events"""
+    with engine.begin() as conn:
+        watermark = conn.execute(
+            text("SELECT value FROM settings WHERE key = :key"), {"key": WATERMARK_KEY}
+        ).scalar()
+        after_id = int(watermark) if watermark else 0
+        max_id = conn.execute(text("SELECT MAX(id) FROM click_events")).scalar() or after_id
+
+        rolled_up = 0
+        if max_id > after_id:
+            params = {"after_id": after_id, "max_id": max_id}
+            for period, fmt in BUCKET_FORMATS.items():
+                conn.execute(text(ROLLUP_SQL.format(period=period, fmt=fmt)), params)
+            rolled_up = max_id - after_id
+
+            conn.execute(
+                text(
+                    "INSERT INTO settings (key, value, description) "
+                    "VALUES (:key, :value, 'Last click_events id rolled up') "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+                ),
+                {"key": WATERMARK_KEY, "value": str(max_id)}
+            )
+
+        # Only events already rolled up may be deleted
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        pruned = conn.execute(
+            text("DELETE FROM click_events WHERE clicked_at < :cutoff AND id <= :max_id").bindparams(
+                bindparam("cutoff", type_=DateTime)
+            ),
+            {"cutoff": cutoff, "max_id": max_id}
+        ).rowcount
+
+    return {"rolled_up_events": rolled_up, "pruned_events": pruned, "watermark": max_id}
+
+class ClickCompactor:
+    """Runs compact_clicks on a fixed interval in a background thread"""
+
+    def __init__(self, engine, interval: float = 300, retention_days: int = 30):
+        self.engine = engine
+        self.interval = interval
+        self.retention_days = retention_days
+        self.last_result = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def run_once(self) -> dict:
+        self.last_result = compact_clicks(self.engine, self.retention_days)
+        return self.last_result
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error compacting click events: {e}")
+
+    def start(self):
+        """Start the background compaction thread"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="click-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,229 @@
+"""
+Redirect snapshot for Foxcode Shorter
+Compiles active shortlinks into a read-only hash table file that redirect
+workers mmap and share through the page cache
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+
+MAGIC = b"FXSNAP1\0"
+HEADER = struct.Struct("<8sIIQd")  # magic, slot_count, entry_count, max_id, built_at
+SLOT = struct.Struct("<QQ")  # code hash (0 = empty), record offset
+RECORD = struct.Struct("<BIq")  # code length, url length, expiry (epoch seconds, 0 = none)
+
+ACTIVE_SQL = text(
+    "SELECT id, short_code, original_url, expiry_date FROM shortlinks WHERE status = 'active'"
+)
+
+def _hash(code: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(code, digest_size=8).digest(), "little") | 1
+
+def _to_epoch(value) -> int:
+    if not value:
+        return 0
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+def build_snapshot(engine, path: str) -> dict:
+    """Write all active shortlinks to path, replacing any previous snapshot atomically
+
+    Layout: header, open-addressing slot table (linear probing, at most
+    half full), then the record blob. Only the slot table is held in memory.
+    """
+    started = time.monotonic()
+    with engine.connect() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM shortlinks WHERE status = 'active'")).scalar()
+        slot_count = 1
+        while slot_count < max(count * 2, 16):
+            slot_count <<= 1
+        slots = bytearray(slot_count * SLOT.size)
+        mask = slot_count - 1
+        blob_start = HEADER.size + len(slots)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        entries, max_id = 0, 0
+        with open(tmp_path, "wb") as f:
+            f.seek(blob_start)
+            offset = blob_start
+            for row_id, short_code, original_url, expiry_date in conn.execute(ACTIVE_SQL):
+                code = short_code.encode("utf-8")
+                url = original_url.encode("utf-8")
+                code_hash = _hash(code)
+                slot = code_hash & mask
+                while SLOT.unpack_from(slots, slot * SLOT.size)[0]:
+                    slot = (slot + 1) & mask
+                SLOT.pack_into(slots, slot * SLOT.size, code_hash, offset)
+
+                f.write(RECORD.pack(len(code), len(url), _to_epoch(expiry_date)))
+                f.write(code)
+                f.write(url)
+                offset += RECORD.size + len(code) + len(url)
+                entries += 1
+                max_id = max(max_id, row_id)
+                if entries >= count:
+                    break  # rows added since COUNT(*) wait for the next build
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, slot_count, entries, max_id, time.time()))
+            f.write(slots)
+            f.flush()
+            os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return {
+        "entries": entries,
+        "slots": slot_count,
+        "max_id": max_id,
+        "bytes": offset,
+        "build_seconds": round(time.monotonic() - started, 3)
+    }
+
+class SnapshotReader:
+    """mmap-backed lookups against the latest snapshot file
+
+    The file is re-opened when its inode changes (a new snapshot was renamed
+    into place); the check runs at most every ``check_interval`` seconds.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._current = None  # (mmap, slot_count, entry_count, max_id, built_at, inode)
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                self._current = None
+                return
+            if self._current and self._current[5] == inode:
+                return
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, slot_count, entries, max_id, built_at = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC:
+                mm.close()
+                raise ValueError(f"{self.path} is not a redirect snapshot")
+            # The previous mmap is released once in-flight lookups drop it
+            self._current = (mm, slot_count, entries, max_id, built_at, inode)
+
+    def lookup(self, short_code: str) -> Optional[Tuple[str, Optional[datetime]]]:
+        """Return (original_url, expiry_date), or None if not in the snapshot"""
+        self._maybe_reload()
+        current = self._current
+        if current is None:
+            return None
+
+        mm, slot_count, _, _, _, _ = current
+        code = short_code.encode("utf-8")
+        code_hash = _hash(code)
+        mask = slot_count - 1
+        slot = code_hash & mask
+        while True:
+            stored_hash, offset = SLOT.unpack_from(mm, HEADER.size + slot * SLOT.size)
+            if not stored_hash:
+                self.misses += 1
+                return None
+            if stored_hash == code_hash:
+                code_len, url_len, expiry = RECORD.unpack_from(mm, offset)
+                start = offset + RECORD.size
+                if mm[start:start + code_len] == code:
+                    url = mm[start + code_len:start + code_len + url_len].decode("utf-8")
+                    expiry_date = datetime.utcfromtimestamp(expiry) if expiry else None
+                    self.hits += 1
+                    return url, expiry_date
+            slot = (slot + 1) & mask
+
+    def stats(self) -> dict:
+        current = self._current
+        data = {"path": self.path, "loaded": current is not None, "hits": self.hits, "misses": self.misses}
+        if current:
+            data.update({
+                "entries": current[2],
+                "slots": current[1],
+                "max_id": current[3],
+                "built_at": datetime.utcfromtimestamp(current[4]),
+                "bytes": len(current[0])
+            })
+        return data
+
+class SnapshotBuilder:
+    """Rebuilds the snapshot periodically, or soon after mark_dirty()"""
+
+    def __init__(self, engine, path: str, interval: float = 60, debounce: float = 2):
+        self.engine = engine
+        self.path = path
+        self.interval = interval
+        self.debounce = debounce
+        self.last_result = None
+        self._dirty = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def mark_dirty(self):
+        """Request a rebuild, e.g. after a link was deleted"""
+        self._dirty.set()
+
+    def rebuild(self) -> dict:
+        self._dirty.clear()
+        self.last_result = build_snapshot(self.engine, self.path)
+        return self.last_result
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if self._dirty.wait(self.interval) and not self._stopping.is_set():
+                # Coalesce bursts of deletes into one rebuild
+                self._stopping.wait(self.debounce)
+            if self._stopping.is_set():
+                break
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"Error building redirect snapshot: {e}")
+
+    def start(self):
+        """Build once, then keep the snapshot fresh in the background"""
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"Error building redirect snapshot: {e}")
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-builder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._dirty.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+if __name__ == "__main__":
+    import json
+    from database import engine
+
+    with open("config.json", "r") as f:
+        snapshot_path = json.load(f).get("redirect_snapshot", {}).get("path", "redirect_snapshot.bin")
+
+    print(build_snapshot(engine, snapshot_path))
@@ -0,0 +1,93 @@
+"""
+Expiry sweeper for Foxcode Shorter
+Marks links whose expiry_date has passed, in small chunks so redirects are
+never blocked behind one long write transaction
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import DateTime, bindparam, text
+
+import userstats
+
+# Range scan on idx_shortlinks_status_expiry
+DUE_SQL = text(
+    "SELECT id, short_code, user_id FROM shortlinks "
+    "WHERE status = 'active' AND expiry_date <= :now "
+    "ORDER BY expiry_date LIMIT :limit"
+).bindparams(bindparam("now", type_=DateTime))
+
+EXPIRE_SQL = text(
+    "UPDATE shortlinks SET status = 'expired' WHERE status = 'active' AND id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+class ExpirySweeper:
+    """Periodically expires due links, ``chunk_size`` rows per transaction
+
+    ``on_expired`` is called with the expired rows (id, short_code, user_id)
+    after each chunk commits, so in-process caches can evict them.
+    """
+
+    def __init__(self, engine, interval: float = 60, chunk_size: int = 500,
+                 pause: float = 0.05, on_expired: Optional[Callable[[List], None]] = None):
+        self.engine = engine
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.on_expired = on_expired
+        self.last_result = None
+        self._sweep_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def sweep_once(self) -> dict:
+        """Expire everything due right now; returns counts"""
+        with self._sweep_lock:
+            started = time.monotonic()
+            now = datetime.utcnow()
+            expired, chunks = 0, 0
+            while not self._stopping.is_set():
+                with self.engine.begin() as conn:
+                    rows = conn.execute(DUE_SQL, {"now": now, "limit": self.chunk_size}).all()
+                    if not rows:
+                        break
+                    expired += conn.execute(EXPIRE_SQL, {"ids": [row.id for row in rows]}).rowcount
+                    userstats.apply_expired(conn, rows)
+                chunks += 1
+
+                if self.on_expired:
+                    self.on_expired(rows)
+                if len(rows) < self.chunk_size:
+                    break
+                # Give queued writers (click flushes, link creation) the lock
+                time.sleep(self.pause)
+
+            self.last_result = {
+                "expired_links": expired,
+                "chunks": chunks,
+                "duration_seconds": round(time.monotonic() - started, 3),
+                "swept_at": now.isoformat()
+            }
+            return self.last_result
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.sweep_once()
+            except Exception as e:
+                print(f"Error sweeping expired links: {e}")
+
+    def start(self):
+        """Start the background sweep thread"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="expiry-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
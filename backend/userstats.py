@@ -0,0 +1,91 @@
+"""
+Per-user link statistics for Foxcode Shorter
+user_stats keeps running totals that are updated in the same transaction
+as the change they describe, so /stats never has to read a user's links.
+
+CLI: python userstats.py --rebuild
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List
+
+from sqlalchemy import DateTime, bindparam, text
+
+COLUMNS = ("total_links", "active_links", "expired_links", "total_clicks")
+
+_UPSERT = (
+    "ON CONFLICT (user_id) DO UPDATE SET "
+    + ", ".join(f"{column} = user_stats.{column} + excluded.{column}" for column in COLUMNS)
+    + ", updated_at = excluded.updated_at"
+)
+
+# Apply deltas to one user's totals (row is created on first use)
+APPLY_SQL = text(
+    "INSERT INTO user_stats (user_id, total_links, active_links, expired_links, total_clicks, updated_at) "
+    "VALUES (:user_id, :links, :active, :expired, :clicks, :now) " + _UPSERT
+).bindparams(bindparam("now", type_=DateTime))
+
+# Same, for callers that only know the short code (click flush, redirect expiry)
+APPLY_BY_CODE_SQL = text(
+    "INSERT INTO user_stats (user_id, total_links, active_links, expired_links, total_clicks, updated_at) "
+    "SELECT user_id, :links, :active, :expired, :clicks, :now FROM shortlinks "
+    "WHERE short_code = :short_code " + _UPSERT
+).bindparams(bindparam("now", type_=DateTime))
+
+REBUILD_SQL = text(
+    "INSERT INTO user_stats (user_id, total_links, active_links, expired_links, total_clicks, updated_at) "
+    "SELECT user_id, COUNT(*), "
+    "SUM(CASE WHEN status = 'active' THEN 1 ELSE 0 END), "
+    "SUM(CASE WHEN status = 'expired' THEN 1 ELSE 0 END), "
+    "COALESCE(SUM(clicks), 0), :now "
+    "FROM shortlinks GROUP BY user_id"
+).bindparams(bindparam("now", type_=DateTime))
+
+def delta(user_id: int = None, short_code: str = None, links: int = 0, active: int = 0,
+          expired: int = 0, clicks: int = 0) -> dict:
+    """Parameters for APPLY_SQL (user_id) or APPLY_BY_CODE_SQL (short_code)"""
+    params = {"links": links, "active": active, "expired": expired, "clicks": clicks, "now": datetime.utcnow()}
+    if short_code is not None:
+        params["short_code"] = short_code
+    else:
+        params["user_id"] = user_id
+    return params
+
+def apply(conn, user_id: int, **changes):
+    """Apply deltas for one user on an open connection or session"""
+    conn.execute(APPLY_SQL, delta(user_id, **changes))
+
+def apply_expired(conn, rows: Iterable):
+    """Move expired links (rows with a user_id) from active to expired"""
+    counts = Counter(row.user_id for row in rows)
+    if counts:
+        conn.execute(APPLY_SQL, [
+            delta(user_id, active=-count, expired=count) for user_id, count in counts.items()
+        ])
+
+def apply_clicks(conn, rows: List[dict]):
+    """Add flushed click counts (rows with short_code and clicks)"""
+    if rows:
+        conn.execute(APPLY_BY_CODE_SQL, [
+            delta(short_code=row["short_code"], clicks=row["clicks"]) for row in rows
+        ])
+
+def rebuild(engine) -> int:
+    """Recompute every user's totals from shortlinks; returns users rebuilt"""
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM user_stats"))
+        return conn.execute(REBUILD_SQL, {"now": datetime.utcnow()}).rowcount
+
+if __name__ == "__main__":
+    import argparse
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Maintain the user_stats summary table")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all totals from shortlinks")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"Rebuilt statistics for {rebuild(engine)} users")
+    else:
+        parser.print_help()
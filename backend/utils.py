@@ -5,6 +5,7 @@ Helper functions for short code generation, password hashing, etc.
 
 import string
 import random
+import secrets
 import hashlib
 import bcrypt
 import re
@@ -12,12 +13,12 @@ from datetime import datetime, timedelta
 import qrcode
 import io
 import base64
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 
 def generate_short_code(length=8):
     """Generate random short code for URLs"""
     characters = string.ascii_letters + string.digits
-    return ''.join(random.choice(characters) for _ in range(length))
+    return ''.join(secrets.choice(characters) for _ in range(length))
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
@@ -31,6 +32,7 @@ def is_valid_url(url: str) -> bool:
     """Validate URL format"""
     try:
         result = urlparse(url)
+        result.port  # raises ValueError for a non-numeric or out-of-range port
         return all([result.scheme, result.netloc])
     except:
         return False
@@ -41,6 +43,67 @@ def clean_url(url: str) -> str:
         url = 'https://' + url
     return url
 
+# Query parameters that never change the destination page
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ref_src'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url: str) -> str:
+    """Normalize URL for duplicate detection (not for redirecting)
+
+    http/https, host case, default ports, trailing slashes, fragments,
+    tracking parameters and query parameter order are all ignored. Route-like
+    fragments (#/path, #!/path) are kept: single-page apps route on them.
+    Raises ValueError for URLs that cannot be parsed (e.g. a bad port).
+    """
+    parts = urlsplit(clean_url(url.strip()))
+    host = (parts.hostname or '').rstrip('.')
+    if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        host = f"{userinfo}@{host}"
+
+    path = parts.path.rstrip('/') or '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    fragment = parts.fragment if parts.fragment.startswith(('/', '!/')) else ''
+    return urlunsplit(('https', host, path, urlencode(query), fragment))
+
+def url_fingerprint(url: str) -> str:
+    """Fixed-width (32 hex chars) hash of the canonical URL
+
+    URLs that cannot be canonicalized are hashed as given, so they still
+    only match themselves.
+    """
+    try:
+        key = canonicalize_url(url)
+    except ValueError:
+        key = url.strip()
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+CURSOR_EPOCH = datetime(1970, 1, 1)
+
+def _base36(number: int) -> str:
+    digits = string.digits + string.ascii_lowercase
+    text = ''
+    while True:
+        number, digit = divmod(number, 36)
+        text = digits[digit] + text
+        if not number:
+            return text
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Compact keyset cursor for (created_at, id); short enough for callback data"""
+    micros = (created_at - CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f"{_base36(micros)}-{_base36(row_id)}"
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    micros, row_id = cursor.split('-')
+    return CURSOR_EPOCH + timedelta(microseconds=int(micros, 36)), int(row_id, 36)
+
 def generate_qr_code(text: str) -> str:
     """Generate QR code and return base64 string"""
     try:
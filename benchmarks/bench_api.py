@@ -0,0 +1,156 @@
+"""
+API load test for Foxcode Shorter
+Seeds a local SQLite file, starts the backend under uvicorn and drives the
+redirect, create and list endpoints over HTTP with Zipf-distributed keys.
+Results (throughput and p50/p95/p99 per scenario) are printed as JSON.
+
+Usage: python benchmarks/bench_api.py --users 1000 --links 50000 --concurrency 64 --duration 15
+       python benchmarks/bench_api.py --scenarios redirect --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import aiohttp
+
+from common import BACKEND_DIR, ZipfSampler, git_revision, seed, summarize, use_backend
+
+SCENARIOS = ("redirect", "create", "list")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(database_url: str, port: int, workers: int, entry: str):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    command = [sys.executable, "-m", "uvicorn", entry, "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    if entry.endswith("create_app"):
+        command.append("--factory")
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+async def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("backend did not start in time")
+
+def build_request(scenario: str, users: ZipfSampler, codes: ZipfSampler, counter):
+    """(method, path, params, expected status) for one request"""
+    if scenario == "redirect":
+        return "GET", f"/{codes.sample()}", None, 307
+    if scenario == "create":
+        n = next(counter)
+        return "POST", "/api/shortlinks", {
+            "telegram_id": users.sample(),
+            "original_url": f"https://example.com/new/{n}"
+        }, 200
+    return "GET", f"/api/shortlinks/{users.sample()}", None, 200
+
+async def run_scenario(base_url: str, scenario: str, users: ZipfSampler, codes: ZipfSampler,
+                       concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(10 ** 12))
+    deadline = time.monotonic() + duration
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                method, path, params, expected = build_request(scenario, users, codes, counter)
+                started = time.perf_counter()
+                try:
+                    async with session.request(method, base_url + path, params=params,
+                                               allow_redirects=False) as response:
+                        await response.read()
+                        ok = response.status == expected
+                except aiohttp.ClientError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed, errors)
+
+async def bench(args, base_url: str, telegram_ids, short_codes) -> dict:
+    await wait_ready(base_url)
+    users = ZipfSampler(telegram_ids, s=args.zipf_s)
+    codes = ZipfSampler(short_codes, s=args.zipf_s)
+
+    results = {}
+    for scenario in args.scenarios:
+        if args.warmup:
+            await run_scenario(base_url, scenario, users, codes, args.concurrency, args.warmup)
+        results[scenario] = await run_scenario(base_url, scenario, users, codes, args.concurrency, args.duration)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--links", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before each scenario")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for key popularity")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--entry", default="main:app", help="ASGI entry point, e.g. fastlane:create_app")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)  # use_backend() changes directory
+
+    workdir = tempfile.mkdtemp(prefix="foxcode-bench-")
+    database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    use_backend(database_url)
+
+    seed_started = time.perf_counter()
+    telegram_ids, short_codes = seed(args.users, args.links)
+    seed_seconds = time.perf_counter() - seed_started
+
+    port = free_port()
+    server = start_server(database_url, port, args.workers, args.entry)
+    try:
+        results = asyncio.run(bench(args, f"http://127.0.0.1:{port}", telegram_ids, short_codes))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": dict(vars(args), seed_seconds=round(seed_seconds, 2)),
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Bot update throughput benchmark
+Replays synthetic Telegram updates through the bot's ChatOrderedUpdateProcessor
+with a handler that waits like a slow backend call, and reports updates/sec at
+each concurrency level. Per-chat ordering is checked on every run.
+
+Usage: python benchmarks/bench_bot_updates.py --updates 2000 --chats 200 --latency-ms 50
+       python benchmarks/bench_bot_updates.py --concurrency 1 16 64 256 --output updates.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from common import git_revision, summarize
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bot")
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from telegram import Chat, Message, Update, User
+
+from updates import ChatOrderedUpdateProcessor
+
+def synthetic_updates(count: int, chats: int, seed: int = 42):
+    """Text-message updates spread over `chats` private chats"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    updates = []
+    for update_id in range(1, count + 1):
+        chat_id = rng.randint(1, chats)
+        message = Message(
+            message_id=update_id,
+            date=now,
+            chat=Chat(id=chat_id, type=Chat.PRIVATE),
+            from_user=User(id=chat_id, first_name="bench", is_bot=False),
+            text=f"https://example.com/page/{update_id}"
+        )
+        updates.append(Update(update_id=update_id, message=message))
+    return updates
+
+async def replay(updates, concurrency: int, latency: float, jitter: float) -> dict:
+    """Feed updates the way Application does: one task per update, in arrival order"""
+    processor = ChatOrderedUpdateProcessor(concurrency)
+    rng = random.Random(7)
+    seen = {}
+    latencies = []
+    reordered = 0
+
+    async def handle(update: Update, received: float):
+        nonlocal reordered
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+        chat_id = update.effective_chat.id
+        if seen.get(chat_id, 0) > update.update_id:
+            reordered += 1
+        seen[chat_id] = update.update_id
+        latencies.append(time.perf_counter() - received)
+
+    await processor.initialize()
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(processor.process_update(update, handle(update, time.perf_counter())))
+        for update in updates
+    ]
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await processor.shutdown()
+
+    result = summarize(latencies, elapsed)
+    result["updates_per_sec"] = result.pop("requests_per_sec")
+    result["concurrency"] = concurrency
+    result["reordered"] = reordered
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic updates through the bot's update processor")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated handler/backend latency")
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64, 256])
+    parser.add_argument("--output", help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    updates = synthetic_updates(args.updates, args.chats)
+    results = []
+    for concurrency in args.concurrency:
+        result = asyncio.run(replay(updates, concurrency, args.latency_ms / 1000, args.jitter_ms / 1000))
+        results.append(result)
+        print(f"concurrency={concurrency:>4}  {result['updates_per_sec']:>9.1f} updates/sec  "
+              f"p95={result['p95_ms']:.1f}ms  reordered={result['reordered']}", file=sys.stderr)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "updates": args.updates,
+        "chats": args.chats,
+        "latency_ms": args.latency_ms,
+        "results": results
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Redirect benchmark: FastAPI route vs ASGI fast lane
+Drives both apps in-process (no sockets) against a seeded SQLite file and
+prints requests/sec and latency percentiles as JSON
+
+Usage: python benchmarks/bench_redirect.py --links 1000 --requests 20000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from common import seed, summarize, use_backend
+
+async def call(app, path: str):
+    """Issue one GET through an ASGI app; returns the response status"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")]
+    }
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status["code"]
+
+async def run(app, codes, total: int, concurrency: int) -> dict:
+    paths = ["/" + random.choice(codes) for _ in range(total)]
+    latencies = []
+    queue = iter(paths)
+
+    async def worker():
+        for path in queue:
+            started = time.perf_counter()
+            code = await call(app, path)
+            latencies.append(time.perf_counter() - started)
+            if code != 307:
+                raise RuntimeError(f"{path} returned {code}")
+
+    # Warm the redirect cache so both lanes measure the same hot path
+    for code in codes:
+        await call(app, "/" + code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="foxcode-bench-")
+    use_backend(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    _, codes = seed(1, args.links)
+
+    import main as backend
+    from fastlane import RedirectFastLane
+
+    fast_lane = RedirectFastLane(backend.link_resolver, backend.app, on_click=backend.record_click)
+
+    async def bench():
+        return {
+            "fastapi_route": await run(backend.app, codes, args.requests, args.concurrency),
+            "fast_lane": await run(fast_lane, codes, args.requests, args.concurrency)
+        }
+
+    results = asyncio.run(bench())
+    results["config"] = vars(args)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
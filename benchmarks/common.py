@@ -0,0 +1,93 @@
+"""
+Shared helpers for the benchmark scripts
+Seeding, key popularity sampling and latency summaries
+"""
+
+import bisect
+import itertools
+import os
+import random
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+def use_backend(database_url: str):
+    """Point the backend modules at database_url and make them importable"""
+    os.environ["DATABASE_URL"] = database_url
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)  # main.py reads config.json from the working directory
+
+def seed(users: int, links: int, balance: float = 1_000_000):
+    """Create `users` users and `links` active shortlinks spread across them
+
+    Returns (telegram_ids, short_codes). Call use_backend() first.
+    """
+    from database import SessionLocal, create_tables
+    from models import User, Shortlink
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        telegram_ids = [100000000 + i for i in range(users)]
+        db.bulk_insert_mappings(User, [
+            {"telegram_id": telegram_id, "username": f"bench{telegram_id}", "balance": balance, "status": "active"}
+            for telegram_id in telegram_ids
+        ])
+        db.flush()
+        user_ids = [row.id for row in db.query(User.id).order_by(User.id)]
+
+        short_codes = [f"b{i:07d}" for i in range(links)]
+        for start in range(0, links, 5000):
+            db.bulk_insert_mappings(Shortlink, [
+                {"user_id": user_ids[i % users], "original_url": f"https://example.com/page/{i}",
+                 "short_code": short_codes[i], "clicks": 0, "status": "active"}
+                for i in range(start, min(start + 5000, links))
+            ])
+        db.commit()
+        return telegram_ids, short_codes
+    finally:
+        db.close()
+
+class ZipfSampler:
+    """Pick items with Zipf(s) popularity: the item at rank r has weight 1/r^s"""
+
+    def __init__(self, items, s: float = 1.1, seed: int = 42):
+        self.items = list(items)
+        self.random = random.Random(seed)
+        self.random.shuffle(self.items)  # hot keys are not simply the first ones created
+        self.cum_weights = list(itertools.accumulate(1 / (rank ** s) for rank in range(1, len(self.items) + 1)))
+
+    def sample(self):
+        x = self.random.random() * self.cum_weights[-1]
+        return self.items[bisect.bisect_left(self.cum_weights, x)]
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def summarize(latencies, elapsed: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (milliseconds)"""
+    latencies = sorted(latencies)
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "requests_per_sec": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0
+    }
+
+def git_revision() -> str:
+    """Current commit, so results can be compared across revisions"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
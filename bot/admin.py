@@ -3,14 +3,21 @@ Admin Management
 Handle admin operations and bot management
 """
 
-import aiohttp
 import json
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+from client import BackendClient
+from broadcast import BroadcastEngine
+from usercache import UserCache
+
 class AdminManager:
-    def __init__(self, api_base_url: str):
-        self.api_base_url = api_base_url
+    def __init__(self, backend: BackendClient, broadcaster: Optional[BroadcastEngine] = None,
+                 user_cache: Optional[UserCache] = None):
+        self.backend = backend
+        self.broadcaster = broadcaster
+        self.user_cache = user_cache
+        self.api_base_url = backend.base_url
         # List of authorized admin user IDs
         self.authorized_admins = [123456789]  # Add admin telegram IDs here
 
@@ -47,93 +54,101 @@ class AdminManager:
             }
         ]
 
-    async def approve_payment(self, payment_id: int, admin_id: int) -> Dict[str, Any]:
-        """Approve a payment request"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                payload = {
-                    "payment_id": payment_id,
-                    "action": "approve",
-                    "admin_id": admin_id
-                }
-
-                async with session.put(
-                    f"{self.api_base_url}/api/admin/payments/{payment_id}",
-                    json=payload
-                ) as response:
-                    return await response.json()
-
-            except Exception as e:
-                return {"error": f"Failed to approve payment: {e}"}
+    async def approve_payment(self, payment_id: int, admin_id: int,
+                              telegram_id: Optional[int] = None) -> Dict[str, Any]:
+        """Approve a payment request
+
+        telegram_id is the payer (``user_id`` in get_pending_payments); their
+        cached balance is dropped once the approval succeeds.
+        """
+        try:
+            payload = {
+                "payment_id": payment_id,
+                "action": "approve",
+                "admin_id": admin_id
+            }
+
+            response = await self.backend.put(f"/api/admin/payments/{payment_id}", json=payload)
+            result = response.json({})
+            if response.ok and self.user_cache and telegram_id is not None:
+                self.user_cache.invalidate(telegram_id)
+            return result
+
+        except Exception as e:
+            return {"error": f"Failed to approve payment: {e}"}
 
     async def reject_payment(self, payment_id: int, admin_id: int, reason: str) -> Dict[str, Any]:
         """Reject a payment request"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                payload = {
-                    "payment_id": payment_id,
-                    "action": "reject",
-                    "admin_id": admin_id,
-                    "reason": reason
-                }
-
-                async with session.put(
-                    f"{self.api_base_url}/api/admin/payments/{payment_id}",
-                    json=payload
-                ) as response:
-                    return await response.json()
-
-            except Exception as e:
-                return {"error": f"Failed to reject payment: {e}"}
+        try:
+            payload = {
+                "payment_id": payment_id,
+                "action": "reject",
+                "admin_id": admin_id,
+                "reason": reason
+            }
+
+            response = await self.backend.put(f"/api/admin/payments/{payment_id}", json=payload)
+            return response.json({})
+
+        except Exception as e:
+            return {"error": f"Failed to reject payment: {e}"}
 
     async def broadcast_message(self, message: str, admin_id: int) -> Dict[str, Any]:
         """Send broadcast message to all users"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                payload = {
-                    "message": message,
-                    "admin_id": admin_id
-                }
-
-                async with session.post(
-                    f"{self.api_base_url}/api/admin/broadcast",
-                    json=payload
-                ) as response:
-                    return await response.json()
-
-            except Exception as e:
-                return {"error": f"Failed to send broadcast: {e}"}
+        try:
+            payload = {
+                "message": message,
+                "admin_id": admin_id
+            }
+
+            response = await self.backend.post("/api/admin/broadcast", json=payload)
+            result = response.json({})
+            if response.ok and self.broadcaster:
+                # Start now instead of waiting for the next poll
+                self.broadcaster.launch(result["broadcast_id"])
+            return result
+
+        except Exception as e:
+            return {"error": f"Failed to send broadcast: {e}"}
+
+    async def get_broadcast_status(self, broadcast_id: int) -> Dict[str, Any]:
+        """Sent, failed and blocked counts of a broadcast"""
+        try:
+            response = await self.backend.get(f"/api/admin/broadcasts/{broadcast_id}")
+            return response.json({})
+        except Exception as e:
+            return {"error": f"Failed to get broadcast status: {e}"}
 
     async def get_user_details(self, telegram_id: int) -> Dict[str, Any]:
         """Get detailed user information"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(f"{self.api_base_url}/api/users/{telegram_id}") as response:
-                    if response.status == 200:
-                        return await response.json()
-                    return {"error": "User not found"}
+        try:
+            response = await self.backend.get(f"/api/users/{telegram_id}")
+            if response.status == 200:
+                return response.data
+            return {"error": "User not found"}
 
-            except Exception as e:
-                return {"error": f"Failed to fetch user details: {e}"}
+        except Exception as e:
+            return {"error": f"Failed to fetch user details: {e}"}
 
     async def update_user_balance(self, telegram_id: int, amount: float, action: str) -> Dict[str, Any]:
         """Update user balance (add/deduct)"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                payload = {"amount": amount, "action": action}
+        try:
+            payload = {"amount": amount, "action": action}
 
-                async with session.put(
-                    f"{self.api_base_url}/api/users/{telegram_id}/balance",
-                    json=payload
-                ) as response:
-                    return await response.json()
+            response = await self.backend.put(f"/api/users/{telegram_id}/balance", json=payload)
+            result = response.json({})
+            if response.ok and self.user_cache:
+                self.user_cache.update(telegram_id, balance=result["new_balance"])
+            return result
 
-            except Exception as e:
-                return {"error": f"Failed to update balance: {e}"}
+        except Exception as e:
+            return {"error": f"Failed to update balance: {e}"}
 
     async def block_user(self, telegram_id: int, reason: str, admin_id: int) -> Dict[str, Any]:
         """Block a user"""
         # This would update user status in database
+        if self.user_cache:
+            self.user_cache.invalidate(telegram_id)
         return {
             "status": "success",
             "message": f"User {telegram_id} blocked successfully",
@@ -144,6 +159,8 @@ class AdminManager:
 
     async def unblock_user(self, telegram_id: int, admin_id: int) -> Dict[str, Any]:
         """Unblock a user"""
+        if self.user_cache:
+            self.user_cache.invalidate(telegram_id)
         return {
             "status": "success",
             "message": f"User {telegram_id} unblocked successfully",
@@ -153,13 +170,14 @@ class AdminManager:
 
     async def delete_shortlink(self, short_code: str, admin_id: int) -> Dict[str, Any]:
         """Delete a shortlink (admin action)"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.delete(f"{self.api_base_url}/api/shortlinks/{short_code}") as response:
-                    return await response.json()
+        try:
+            response = await self.backend.delete(
+                f"/api/shortlinks/{short_code}", endpoint="DELETE /api/shortlinks/{short_code}"
+            )
+            return response.json({})
 
-            except Exception as e:
-                return {"error": f"Failed to delete shortlink: {e}"}
+        except Exception as e:
+            return {"error": f"Failed to delete shortlink: {e}"}
 
     async def get_system_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent system logs"""
@@ -180,14 +198,17 @@ class AdminManager:
         ]
 
     async def cleanup_expired_links(self) -> Dict[str, Any]:
-        """Clean up expired links"""
-        # This would run cleanup job
-        return {
-            "status": "success",
-            "deleted_links": 25,
-            "freed_codes": 25,
-            "cleanup_time": datetime.utcnow().isoformat()
-        }
+        """Expire all due links and return the real counts"""
+        try:
+            response = await self.backend.post("/api/admin/cleanup-expired")
+            return response.json({})
+
+        except Exception as e:
+            return {"error": f"Failed to clean up expired links: {e}"}
+
+    def get_backend_stats(self) -> Dict[str, Any]:
+        """Per-endpoint latency percentiles and error counts of the bot's backend calls"""
+        return self.backend.stats()
 
     async def generate_report(self, report_type: str, date_range: Dict[str, str]) -> Dict[str, Any]:
         """Generate various reports"""
@@ -11,6 +11,7 @@ import asyncio
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler, ContextTypes
 from telegram.constants import ParseMode
+from telegram.error import RetryAfter
 import aiohttp
 import sys
 
@@ -30,16 +31,80 @@ from handlers import (
 from keyboards import get_main_keyboard, get_terms_keyboard
 from wallet import WalletManager
 from admin import AdminManager
+from client import BackendClient
+from state import state_store_from_config
+from pending import PendingUrlStore
+from usercache import user_cache_from_config
+from updates import ChatOrderedUpdateProcessor
+from ratelimit import rate_limiter_from_config
+from broadcast import BroadcastEngine
+from webhook import run_webhook, webhook_settings
 
 class FoxcodeShorterBot:
     def __init__(self, token: str, api_base_url: str):
         self.token = token
         self.api_base_url = api_base_url
-        self.application = Application.builder().token(token).build()
-        self.wallet_manager = WalletManager(api_base_url)
-        self.admin_manager = AdminManager(api_base_url)
+        client_config = config.get("backend_client", {})
+        self.backend = BackendClient(
+            api_base_url,
+            pool_size=client_config.get("pool_size", 20),
+            timeout=client_config.get("timeout_seconds", 10),
+            connect_timeout=client_config.get("connect_timeout_seconds", 3),
+            retries=client_config.get("retries", 2),
+            backoff=client_config.get("backoff_seconds", 0.2)
+        )
+        self.state_store = state_store_from_config(config, self.backend)
+        runtime_config = config.get("bot_runtime", {})
+        self.mode = os.getenv("BOT_MODE", runtime_config.get("mode", "polling"))
+        self.application = (
+            Application.builder().token(token)
+            .concurrent_updates(ChatOrderedUpdateProcessor(runtime_config.get("max_concurrent_updates", 64)))
+            .rate_limiter(rate_limiter_from_config(config))
+            .post_init(self.start_background_tasks)
+            .post_shutdown(self.close_backend)
+            .build()
+        )
+        self.application.bot_data["api_base_url"] = api_base_url
+        self.application.bot_data["backend"] = self.backend
+        self.application.bot_data["state"] = self.state_store
+        pending_config = config.get("pending_urls", {})
+        self.application.bot_data["pending_urls"] = PendingUrlStore(
+            ttl_seconds=pending_config.get("ttl_seconds", 900),
+            max_per_user=pending_config.get("max_per_user", 5)
+        )
+        broadcast_config = config.get("broadcast", {})
+        self.broadcaster = BroadcastEngine(
+            self.application.bot,
+            self.backend,
+            chunk_size=broadcast_config.get("chunk_size", 500),
+            checkpoint_every=broadcast_config.get("checkpoint_every", 100),
+            poll_interval=broadcast_config.get("poll_interval_seconds", 30),
+            heartbeat_interval=broadcast_config.get("heartbeat_seconds", 15)
+        )
+        self.broadcasts_enabled = config.get("features", {}).get("broadcast_system", True)
+        self.user_cache = user_cache_from_config(config, self.backend)
+        self.application.bot_data["user_cache"] = self.user_cache
+        self.wallet_manager = WalletManager(self.backend, self.user_cache)
+        self.admin_manager = AdminManager(
+            self.backend, self.broadcaster if self.broadcasts_enabled else None, self.user_cache
+        )
         self.setup_handlers()
 
+    async def start_background_tasks(self, application: Application):
+        self.state_store.start()
+        if self.broadcasts_enabled:
+            # Also resumes broadcasts interrupted by the last shutdown
+            self.broadcaster.start()
+
+    async def close_backend(self, application: Application):
+        """Flush pending state, log backend latency stats and close the connection pool"""
+        await self.broadcaster.stop()
+        await self.state_store.stop()
+        logger.info("State store stats: %s", json.dumps(self.state_store.stats()))
+        logger.info("User cache stats: %s", json.dumps(self.user_cache.stats()))
+        logger.info("Backend client stats: %s", json.dumps(self.backend.stats()))
+        await self.backend.close()
+
     def setup_handlers(self):
         """Setup all bot handlers"""
         # Command handlers
@@ -65,17 +130,27 @@ class FoxcodeShorterBot:
 
     async def error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle errors"""
+        if isinstance(context.error, RetryAfter):
+            # Replying now would only hit the same flood limit
+            logger.warning("Flood control exceeded while handling an update: retry after %ss",
+                           context.error.retry_after)
+            return
+
         logger.error(msg="Exception while handling an update:", exc_info=context.error)
 
-        if update and hasattr(update, 'effective_message'):
+        if update and getattr(update, 'effective_message', None):
             await update.effective_message.reply_text(
                 "âŒ An error occurred. Please try again later or contact support."
             )
 
     def run(self):
-        """Run the bot"""
+        """Run the bot (long polling, or a webhook when bot_runtime.mode is "webhook")"""
         logger.info("ðŸ¤– Starting Foxcode Shorter Bot...")
-        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if self.mode == "webhook":
+            settings = webhook_settings(config, os.getenv("WEBHOOK_URL"), os.getenv("WEBHOOK_SECRET"))
+            asyncio.run(run_webhook(self.application, **settings))
+        else:
+            self.application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 # Load configuration
 try:
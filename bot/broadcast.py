@@ -0,0 +1,206 @@
+"""
+Broadcast Engine
+Sends queued broadcasts to every active user at bulk priority through the
+outbound rate limiter, and checkpoints progress through the API so a restart
+resumes after the last reported recipient instead of sending again
+"""
+
+import asyncio
+import logging
+import os
+import random
+import secrets
+import socket
+from typing import Dict, List, Optional
+
+from telegram import Bot
+from telegram.error import Forbidden, RetryAfter, TelegramError
+
+from client import BackendClient, BackendError
+from ratelimit import PRIORITY_BULK
+
+logger = logging.getLogger(__name__)
+
+SENT, FAILED, BLOCKED = "sent", "failed", "blocked"
+
+class LeaseLost(Exception):
+    """Another bot process holds the broadcast now"""
+
+class BroadcastEngine:
+    """Runs broadcasts created via POST /api/admin/broadcast (or the admin panel)
+
+    Recipients are read in keyset chunks of ``chunk_size`` and sent
+    concurrently; the rate limiter decides the actual pace. Every
+    ``checkpoint_every`` recipients the counts, the last users.id and the
+    users who blocked the bot are reported in one call. A poller picks up
+    broadcasts that are pending or were interrupted.
+
+    A broadcast is only sent after the API granted this engine its lease
+    (``owner``). The lease is renewed every ``heartbeat_interval`` seconds;
+    if it is lost, e.g. after a long stall let another process take over,
+    sending stops.
+    """
+
+    def __init__(self, bot: Bot, backend: BackendClient, chunk_size: int = 500,
+                 checkpoint_every: int = 100, poll_interval: float = 30, send_attempts: int = 3,
+                 heartbeat_interval: float = 15, owner: str = None):
+        self.bot = bot
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.checkpoint_every = checkpoint_every
+        self.poll_interval = poll_interval
+        self.send_attempts = send_attempts
+        self.heartbeat_interval = heartbeat_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    def launch(self, broadcast_id: int) -> bool:
+        """Start sending broadcast_id unless it is already running here"""
+        if broadcast_id in self._tasks:
+            return False
+        task = asyncio.get_running_loop().create_task(self.run(broadcast_id))
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+        return True
+
+    async def resume_pending(self) -> int:
+        """Launch pending and interrupted broadcasts; returns how many were started"""
+        response = await self.backend.get("/api/admin/broadcasts", params={"status": "pending,sending"})
+        if not response.ok:
+            return 0
+        broadcasts = response.json({}).get("broadcasts", [])
+        return sum(self.launch(broadcast["broadcast_id"]) for broadcast in reversed(broadcasts))
+
+    async def _poll(self):
+        while True:
+            try:
+                await self.resume_pending()
+            except BackendError as e:
+                logger.warning("Could not check for broadcasts: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._poller is None:
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+
+    async def stop(self):
+        tasks = [task for task in (self._poller, *self._tasks.values()) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._poller = None
+
+    async def _send(self, chat_id: int, text: str) -> str:
+        for _ in range(self.send_attempts):
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, rate_limit_args=PRIORITY_BULK)
+                return SENT
+            except Forbidden:
+                return BLOCKED
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+            except TelegramError as e:
+                logger.debug("Broadcast to %s failed: %s", chat_id, e)
+                return FAILED
+        return FAILED
+
+    async def _checkpoint(self, broadcast_id: int, progress: dict) -> dict:
+        # Safe to retry: the API ignores a checkpoint it has already applied
+        progress = dict(progress, owner=self.owner)
+        for attempt in range(5):
+            try:
+                response = await self.backend.post(
+                    f"/api/admin/broadcasts/{broadcast_id}/progress", json=progress, retry=True
+                )
+                if response.ok:
+                    return response.data
+                if response.status == 409:
+                    raise LeaseLost(response.json({}).get("detail"))
+                logger.warning("Broadcast %d checkpoint rejected: %s", broadcast_id, response.status)
+            except BackendError as e:
+                logger.warning("Broadcast %d checkpoint failed: %s", broadcast_id, e)
+            await asyncio.sleep(random.uniform(0, 2 ** attempt))
+        raise BackendError(f"could not checkpoint broadcast {broadcast_id}")
+
+    async def _send_batch(self, broadcast_id: int, batch: List[dict], text: str) -> dict:
+        results = await asyncio.gather(*(self._send(row["telegram_id"], text) for row in batch))
+        return await self._checkpoint(broadcast_id, {
+            "last_user_id": batch[-1]["user_id"],
+            "sent": results.count(SENT),
+            "failed": results.count(FAILED),
+            "blocked": [row["telegram_id"] for row, result in zip(batch, results) if result == BLOCKED]
+        })
+
+    async def _heartbeat(self, broadcast_id: int, sender: asyncio.Task):
+        """Renew the lease until cancelled; stop the sender once it is lost"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                response = await self.backend.post(
+                    f"/api/admin/broadcasts/{broadcast_id}/heartbeat", params={"owner": self.owner}, retry=True
+                )
+            except BackendError as e:
+                # The lease outlives a few missed heartbeats
+                logger.warning("Broadcast %d heartbeat failed: %s", broadcast_id, e)
+                continue
+            if response.status == 409:
+                logger.warning("Broadcast %d lease lost: %s", broadcast_id, response.json({}).get("detail"))
+                sender.cancel()
+                return
+
+    async def run(self, broadcast_id: int):
+        """Send one broadcast from its checkpoint to the end"""
+        try:
+            await self._run(broadcast_id)
+        except LeaseLost as e:
+            logger.warning("Broadcast %d stopped, lease lost: %s", broadcast_id, e)
+        except BackendError as e:
+            # Progress up to the last checkpoint is kept; the poller resumes it
+            logger.error("Broadcast %d interrupted: %s", broadcast_id, e)
+
+    async def _run(self, broadcast_id: int):
+        response = await self.backend.post(
+            f"/api/admin/broadcasts/{broadcast_id}/start", params={"owner": self.owner}, retry=True
+        )
+        if not response.ok:
+            logger.info("Broadcast %d not started: %s", broadcast_id, response.json({}).get("detail"))
+            return
+        heartbeat = asyncio.get_running_loop().create_task(
+            self._heartbeat(broadcast_id, asyncio.current_task())
+        )
+        try:
+            await self._send_all(broadcast_id, response.data)
+        finally:
+            heartbeat.cancel()
+
+    async def _send_all(self, broadcast_id: int, broadcast: dict):
+        after = broadcast["last_user_id"]
+        logger.info("Sending broadcast %d to %d users (from user %d)",
+                    broadcast_id, broadcast["total_users"], after)
+
+        while True:
+            response = await self.backend.get(
+                f"/api/admin/broadcasts/{broadcast_id}/recipients",
+                params={"after": after, "limit": self.chunk_size}
+            )
+            if not response.ok:
+                raise BackendError(f"recipients request returned {response.status}")
+            page = response.data
+            rows = page["recipients"]
+            for start in range(0, len(rows), self.checkpoint_every):
+                state = await self._send_batch(broadcast_id, rows[start:start + self.checkpoint_every],
+                                               broadcast["message"])
+                if state["status"] != "sending":
+                    logger.info("Broadcast %d stopped: %s", broadcast_id, state["status"])
+                    return
+            after = page["next_after"]
+            if not page["has_more"]:
+                break
+
+        state = await self._checkpoint(broadcast_id, {"last_user_id": after, "done": True})
+        logger.info("Broadcast %d %s: %d sent, %d failed, %d blocked", broadcast_id, state["status"],
+                    state["sent_count"], state["failed_count"], state["blocked_count"])
+
+    def stats(self) -> dict:
+        return {"running": sorted(self._tasks)}
@@ -0,0 +1,171 @@
+"""
+Backend API Client
+One pooled HTTP client shared by all handlers, the wallet and admin managers
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying when the request is safe to repeat
+RETRY_STATUSES = {502, 503, 504}
+NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+class BackendError(Exception):
+    """The backend could not be reached (after any retries)"""
+
+class BackendResponse:
+    """Status code plus decoded JSON body (None if the body was not JSON)"""
+
+    def __init__(self, status: int, data: Any):
+        self.status = status
+        self.data = data
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self, default=None):
+        return self.data if self.data is not None else default
+
+class EndpointStats:
+    """Latency samples and counters for one endpoint"""
+
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else None
+        }
+
+class BackendClient:
+    """Keep-alive HTTP client for the Foxcode Shorter API
+
+    Only GET/HEAD requests are retried by default; pass ``retry=True`` for
+    other calls that are safe to repeat. Retries back off exponentially with
+    jitter so many updates failing at once do not retry in lockstep.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 20, timeout: float = 10,
+                 connect_timeout: float = 3, retries: int = 2, backoff: float = 0.2,
+                 keepalive_timeout: float = 30, stats_window: int = 1000):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.keepalive_timeout = keepalive_timeout
+        self.stats_window = stats_window
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats: Dict[str, EndpointStats] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def _endpoint_stats(self, endpoint: str) -> EndpointStats:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = EndpointStats(self.stats_window)
+        return stats
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    async def request(self, method: str, path: str, *, params: dict = None, json: Any = None,
+                      endpoint: str = None, timeout: float = None, retry: bool = None) -> BackendResponse:
+        """Send one request; raises BackendError if the backend is unreachable
+
+        ``endpoint`` names the stats bucket; by default numeric path segments
+        are folded, e.g. "GET /api/users/{id}".
+        """
+        method = method.upper()
+        retry = method in ("GET", "HEAD") if retry is None else retry
+        attempts = self.retries + 1 if retry else 1
+        endpoint = endpoint or f"{method} {NUMERIC_SEGMENT.sub('/{id}', path)}"
+        stats = self._endpoint_stats(endpoint)
+        options = {"params": params, "json": json}
+        if timeout:
+            options["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        for attempt in range(attempts):
+            if attempt:
+                stats.retries += 1
+                await asyncio.sleep(self._delay(attempt - 1))
+
+            started = time.perf_counter()
+            stats.requests += 1
+            try:
+                async with self._get_session().request(method, self.base_url + path, **options) as response:
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = None
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.latencies.append(time.perf_counter() - started)
+                stats.errors += 1
+                if attempt + 1 < attempts:
+                    continue
+                raise BackendError(f"{method} {path} failed: {e!r}") from e
+
+            stats.latencies.append(time.perf_counter() - started)
+            if status >= 500:
+                stats.errors += 1
+            if status in RETRY_STATUSES and attempt + 1 < attempts:
+                continue
+            return BackendResponse(status, data)
+
+    async def get(self, path: str, **kwargs) -> BackendResponse:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> BackendResponse:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs) -> BackendResponse:
+        return await self.request("PUT", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> BackendResponse:
+        return await self.request("DELETE", path, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latency percentiles and counters per endpoint"""
+        return {endpoint: stats.summary() for endpoint, stats in sorted(self._stats.items())}
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
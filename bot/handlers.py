@@ -4,7 +4,6 @@ All command and message handlers for the bot
 """
 
 import asyncio
-import aiohttp
 import json
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -12,25 +11,48 @@ from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 from keyboards import *
 from wallet import WalletManager
+from client import BackendClient
+from state import StateStore
+from pending import PendingUrlStore
+from usercache import UserCache
 import re
 
-# User state storage (in production, use Redis or database)
-user_states = {}
+def get_backend(context) -> BackendClient:
+    """Shared backend client (created by FoxcodeShorterBot, stored in bot_data)"""
+    backend = context.bot_data.get('backend')
+    if backend is None:
+        backend = context.bot_data['backend'] = BackendClient(
+            context.bot_data.get('api_base_url', 'http://localhost:8000')
+        )
+    return backend
+
+def get_pending_urls(context) -> PendingUrlStore:
+    """URLs waiting for an expiry choice, keyed by callback token"""
+    pending = context.bot_data.get('pending_urls')
+    if pending is None:
+        pending = context.bot_data['pending_urls'] = PendingUrlStore()
+    return pending
+
+def get_state_store(context) -> StateStore:
+    """Shared conversation state store (created by FoxcodeShorterBot)"""
+    return context.bot_data['state']
+
+def get_user_cache(context) -> UserCache:
+    """Short-TTL cache of backend user records (created by FoxcodeShorterBot)"""
+    return context.bot_data['user_cache']
 
 async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start command"""
     user = update.effective_user
 
     # Register user in backend
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                f"{context.bot_data.get('api_base_url', 'http://localhost:8000')}/api/users",
-                json={"telegram_id": user.id, "username": user.username or str(user.id)}
-            ) as response:
-                data = await response.json()
-        except Exception as e:
-            print(f"Error registering user: {e}")
+    try:
+        await get_backend(context).post(
+            "/api/users",
+            json={"telegram_id": user.id, "username": user.username or str(user.id)}
+        )
+    except Exception as e:
+        print(f"Error registering user: {e}")
 
     welcome_text = f"""
 ðŸŽ‰ Welcome to **Foxcode Shorter** - AI Link Shortener SaaS!
@@ -115,18 +137,9 @@ async def shorten_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("âŒ Please provide a valid URL starting with http:// or https://")
         return
 
-    # Ask for expiry
-    keyboard = InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton("No Expiry", callback_data=f"shorten_no_expiry_{url}"),
-            InlineKeyboardButton("7 Days", callback_data=f"shorten_7_{url}")
-        ],
-        [
-            InlineKeyboardButton("30 Days", callback_data=f"shorten_30_{url}"),
-            InlineKeyboardButton("90 Days", callback_data=f"shorten_90_{url}")
-        ],
-        [InlineKeyboardButton("âŒ Cancel", callback_data="cancel")]
-    ])
+    # Ask for expiry; the keyboard carries a short token, not the URL
+    token = get_pending_urls(context).put(user_id, url)
+    keyboard = get_expiry_keyboard(token)
 
     await update.message.reply_text(
         f"ðŸ”— **URL to shorten:** `{url}`\n\nâ° Choose expiry period:",
@@ -134,24 +147,50 @@ async def shorten_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode=ParseMode.MARKDOWN
     )
 
+LINKS_PER_PAGE = 5
+LINK_LIST_FIELDS = "short_url,clicks,status,created_at,expiry_date"
+
+async def fetch_links_page(context, user_id: int, cursor: str = None) -> dict:
+    """One page of the user's links; only the fields the list shows are requested"""
+    params = {"limit": LINKS_PER_PAGE, "fields": LINK_LIST_FIELDS}
+    if cursor:
+        params["cursor"] = cursor
+
+    response = await get_backend(context).get(
+        f"/api/shortlinks/{user_id}", params=params, endpoint="GET /api/shortlinks/{telegram_id}"
+    )
+    if response.status == 200:
+        return response.data
+    return {"shortlinks": [], "next_cursor": None}
+
+def format_links_page(shortlinks: list, page: int) -> str:
+    """Message text for one page of links, numbered across pages"""
+    text = "ðŸ“ **Your Shortened Links:**\n\n"
+
+    for i, link in enumerate(shortlinks, (page - 1) * LINKS_PER_PAGE + 1):
+        status_emoji = "âœ…" if link['status'] == 'active' else "âŒ"
+        text += f"{status_emoji} **Link {i}**\n"
+        text += f"ðŸ”— `{link['short_url']}`\n"
+        text += f"ðŸ“Š {link['clicks']} clicks\n"
+        text += f"ðŸ“… Created: {link['created_at'][:10]}\n"
+        if link['expiry_date']:
+            text += f"â° Expires: {link['expiry_date'][:10]}\n"
+        text += "\n"
+
+
+    return text
+
 async def manage_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /manage command"""
     user_id = update.effective_user.id
 
-    # Get user's shortlinks from backend
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                f"{context.bot_data.get('api_base_url', 'http://localhost:8000')}/api/shortlinks/{user_id}"
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    shortlinks = data.get('shortlinks', [])
-                else:
-                    shortlinks = []
-        except Exception as e:
-            await update.message.reply_text("âŒ Error fetching your links. Please try again.")
-            return
+    # Get the first page of the user's shortlinks from backend
+    try:
+        data = await fetch_links_page(context, user_id)
+    except Exception:
+        await update.message.reply_text("âŒ Error fetching your links. Please try again.")
+        return
+    shortlinks = data.get('shortlinks', [])
 
     if not shortlinks:
         keyboard = InlineKeyboardMarkup([
@@ -165,61 +204,59 @@ async def manage_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    # Show links with pagination
-    text = "ðŸ“ **Your Shortened Links:**\n\n"
-
-    for i, link in enumerate(shortlinks[:5], 1):  # Show first 5
-        status_emoji = "âœ…" if link['status'] == 'active' else "âŒ"
-        text += f"{status_emoji} **Link {i}**\n"
-        text += f"ðŸ”— `{link['short_url']}`\n"
-        text += f"ðŸ“Š {link['clicks']} clicks\n"
-        text += f"ðŸ“… Created: {link['created_at'][:10]}\n"
-        if link['expiry_date']:
-            text += f"â° Expires: {link['expiry_date'][:10]}\n"
-        text += "\n"
-
-    if len(shortlinks) > 5:
-        text += f"... and {len(shortlinks) - 5} more links\n"
-
-    keyboard = InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton("ðŸ“Š View All", callback_data="view_all_links"),
-            InlineKeyboardButton("ðŸ”— New Link", callback_data="create_new_link")
-        ],
-        [InlineKeyboardButton("ðŸ  Main Menu", callback_data="main_menu")]
-    ])
+    # Show links with pagination; later pages are fetched on demand
+    context.user_data['link_cursors'] = {1: None}
+    keyboard = get_pagination_keyboard(1, "links", data.get('next_cursor'))
 
     await update.message.reply_text(
-        text,
+        format_links_page(shortlinks, 1),
         reply_markup=keyboard,
         parse_mode=ParseMode.MARKDOWN
     )
 
+async def show_links_page(query, context, page: int, cursor: str = None):
+    """Edit the message to show one page of the user's links"""
+    cursors = context.user_data.setdefault('link_cursors', {1: None})
+    if page > 1 and cursor is None:
+        # Previous button: reuse the cursor this page was first opened with
+        if page not in cursors:
+            page = 1
+        cursor = cursors.get(page)
+    if page == 1:
+        cursor = None
+
+    try:
+        data = await fetch_links_page(context, query.from_user.id, cursor)
+    except Exception:
+        await query.edit_message_text("âŒ Error fetching your links. Please try again.")
+        return
+    cursors[page] = cursor
+
+    await query.edit_message_text(
+        format_links_page(data.get('shortlinks', []), page),
+        reply_markup=get_pagination_keyboard(page, "links", data.get('next_cursor')),
+        parse_mode=ParseMode.MARKDOWN
+    )
+
 async def wallet_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /wallet command"""
     user_id = update.effective_user.id
 
     # Get user info from backend
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                f"{context.bot_data.get('api_base_url', 'http://localhost:8000')}/api/users/{user_id}"
-            ) as response:
-                if response.status == 200:
-                    user_data = await response.json()
-                    balance = user_data.get('balance', 0)
-                else:
-                    balance = 0
-        except Exception as e:
-            await update.message.reply_text("âŒ Error fetching wallet info. Please try again.")
-            return
+    try:
+        user_data = await get_user_cache(context).get(user_id) or {}
+        balance = user_data.get('balance', 0)
+    except Exception:
+        await update.message.reply_text("âŒ Error fetching wallet info. Please try again.")
+        return
 
+    cost = user_data.get('shortlink_cost', 10)
     wallet_text = f"""
 ðŸ’° **Your Wallet**
 
 ðŸ’µ **Current Balance:** â‚¹{balance:.2f}
-ðŸ”— **Links you can create:** {int(balance // 10)} links
-
+ðŸ”— **Links you can create:** {int(balance // cost)} links
+{format_recent_payments(user_data.get('recent_payments', []))}
 ðŸ“Š **Pricing:**
 â€¢ â‚¹10 per shortened link
 â€¢ No hidden charges
@@ -325,34 +362,39 @@ async def terms_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode=ParseMode.MARKDOWN
     )
 
+def format_top_links(links: list) -> str:
+    """Most-clicked links block for /stats (empty when the user has none)"""
+    if not links:
+        return ""
+    lines = [f"â€¢ `{link['short_url']}` - {link['clicks']:,} clicks" for link in links]
+    return "\nðŸ”— **Top Links:**\n" + "\n".join(lines) + "\n"
+
+def format_recent_payments(payments: list) -> str:
+    """Latest payments block for /wallet (empty when there are none)"""
+    if not payments:
+        return ""
+    lines = [
+        f"â€¢ â‚¹{payment['amount']:.2f} - {payment['status'].title()} ({str(payment['created_at'])[:10]})"
+        for payment in payments
+    ]
+    return "\nðŸ’³ **Recent Payments:**\n" + "\n".join(lines) + "\n"
+
 async def stats_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /stats command"""
     user_id = update.effective_user.id
 
-    # Get user stats from backend
-    async with aiohttp.ClientSession() as session:
-        try:
-            # Get user info
-            async with session.get(
-                f"{context.bot_data.get('api_base_url', 'http://localhost:8000')}/api/users/{user_id}"
-            ) as response:
-                user_data = await response.json() if response.status == 200 else {}
-
-            # Get shortlinks
-            async with session.get(
-                f"{context.bot_data.get('api_base_url', 'http://localhost:8000')}/api/shortlinks/{user_id}"
-            ) as response:
-                links_data = await response.json() if response.status == 200 else {"shortlinks": []}
-
-        except Exception as e:
-            await update.message.reply_text("âŒ Error fetching statistics. Please try again.")
-            return
+    # One dashboard request (shared with /wallet through the user cache)
+    try:
+        user_data = await get_user_cache(context).get(user_id) or {}
+    except Exception:
+        await update.message.reply_text("âŒ Error fetching statistics. Please try again.")
+        return
 
-    shortlinks = links_data.get('shortlinks', [])
-    total_links = len(shortlinks)
-    total_clicks = sum(link.get('clicks', 0) for link in shortlinks)
-    active_links = len([link for link in shortlinks if link.get('status') == 'active'])
-    expired_links = len([link for link in shortlinks if link.get('status') == 'expired'])
+    total_links = user_data.get('total_links', 0)
+    total_clicks = user_data.get('total_clicks', 0)
+    active_links = user_data.get('active_links', 0)
+    expired_links = user_data.get('expired_links', 0)
+    cost = user_data.get('shortlink_cost', 10)
 
     stats_text = f"""
 ðŸ“Š **Your Statistics**
@@ -370,10 +412,10 @@ async def stats_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 ðŸ“ˆ **Performance:**
 â€¢ Total clicks: {total_clicks:,}
 â€¢ Average clicks per link: {total_clicks/max(total_links, 1):.1f}
-
+{format_top_links(user_data.get('top_links', []))}
 ðŸ’° **Spending:**
-â€¢ Amount spent: â‚¹{total_links * 10:.2f}
-â€¢ Links available: {int(user_data.get('balance', 0) // 10)}
+â€¢ Amount spent: â‚¹{total_links * cost:.2f}
+â€¢ Links available: {int(user_data.get('balance', 0) // cost)}
     """
 
     keyboard = InlineKeyboardMarkup([
@@ -402,7 +444,8 @@ async def url_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
     # Check if user accepted terms
-    if not user_states.get(user_id, {}).get('terms_accepted'):
+    state = await get_state_store(context).get(user_id)
+    if not state.get('terms_accepted'):
         keyboard = get_terms_keyboard()
         await update.message.reply_text(
             "âš ï¸ Please accept our Terms & Conditions first before using the service.",
@@ -411,18 +454,9 @@ async def url_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    # Ask for expiry period
-    keyboard = InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton("No Expiry", callback_data=f"shorten_no_expiry_{text}"),
-            InlineKeyboardButton("7 Days", callback_data=f"shorten_7_{text}")
-        ],
-        [
-            InlineKeyboardButton("30 Days", callback_data=f"shorten_30_{text}"),
-            InlineKeyboardButton("90 Days", callback_data=f"shorten_90_{text}")
-        ],
-        [InlineKeyboardButton("âŒ Cancel", callback_data="cancel")]
-    ])
+    # Ask for expiry; the keyboard carries a short token, not the URL
+    token = get_pending_urls(context).put(user_id, text)
+    keyboard = get_expiry_keyboard(token)
 
     await update.message.reply_text(
         f"ðŸ”— **URL detected:** `{text}`\n\nâ° Choose expiry period:\nðŸ’° Cost: â‚¹10",
@@ -447,27 +481,32 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     elif data == "accept_terms":
-        user_states[user_id] = user_states.get(user_id, {})
-        user_states[user_id]['terms_accepted'] = True
+        await get_state_store(context).update(user_id, terms_accepted=True)
 
         await query.edit_message_text(
             "âœ… **Terms Accepted!**\n\nYou can now use all features of Foxcode Shorter.\n\nðŸ”— Send any URL to get started!",
             parse_mode=ParseMode.MARKDOWN
         )
 
-    elif data.startswith("shorten_"):
-        # Handle shortening with expiry
-        parts = data.split("_", 2)
-        expiry = parts[1]
-        url = parts[2] if len(parts) > 2 else ""
-
-        if expiry == "no":
-            expiry_days = None
-        else:
-            expiry_days = int(expiry)
+    elif data.startswith("shorten_") and data.count("_") >= 2:
+        # shorten_{days|none}_{token}; the token is single use
+        _, expiry, token = data.split("_", 2)
+        url = get_pending_urls(context).pop(user_id, token)
+        if url is None:
+            await query.edit_message_text("âŒ This link request has expired. Please send the URL again.")
+            return
 
+        expiry_days = None if expiry == "none" else int(expiry)
         await process_url_shortening(query, url, expiry_days, context)
 
+    elif data in ("manage_links", "view_all_links"):
+        await show_links_page(query, context, 1)
+
+    elif data.startswith("links_"):
+        # links_{page} (Previous) or links_{page}_{cursor} (Next)
+        parts = data.split("_", 2)
+        await show_links_page(query, context, int(parts[1]), parts[2] if len(parts) > 2 else None)
+
     elif data == "add_balance":
         keyboard = get_payment_methods_keyboard()
         await query.edit_message_text(
@@ -487,27 +526,27 @@ async def process_url_shortening(query, url: str, expiry_days: int, context):
     # Show processing message
     await query.edit_message_text("ðŸ”„ Processing your request...")
 
-    # Make API request to backend
-    async with aiohttp.ClientSession() as session:
-        try:
-            payload = {
-                "telegram_id": user_id,
-                "original_url": url,
-                "expiry_days": expiry_days
-            }
-
-            async with session.post(
-                f"{context.bot_data.get('api_base_url', 'http://localhost:8000')}/api/shortlinks",
-                json=payload
-            ) as response:
-                result = await response.json()
-
-                if response.status == 200:
-                    short_url = result['short_url']
-                    remaining_balance = result['remaining_balance']
-                    expiry_text = f"â° Expires: {result['expiry_date'][:10]}" if result['expiry_date'] else "â™¾ï¸ No expiry"
-
-                    success_text = f"""
+    # Make API request to backend (not retried: a repeat would charge twice)
+    try:
+        payload = {
+            "telegram_id": user_id,
+            "original_url": url,
+            "expiry_days": expiry_days
+        }
+
+        response = await get_backend(context).post("/api/shortlinks", json=payload)
+        result = response.json({})
+
+        if response.status == 200:
+            short_url = result['short_url']
+            remaining_balance = result['remaining_balance']
+            user_cache = get_user_cache(context)
+            user_cache.update(user_id, balance=remaining_balance)
+            if not result.get('deduplicated'):
+                user_cache.add(user_id, total_links=1, active_links=1)
+            expiry_text = f"â° Expires: {result['expiry_date'][:10]}" if result['expiry_date'] else "â™¾ï¸ No expiry"
+
+            success_text = f"""
 âœ… **Link shortened successfully!**
 
 ðŸ”— **Your short URL:** `{short_url}`
@@ -516,35 +555,35 @@ async def process_url_shortening(query, url: str, expiry_days: int, context):
 ðŸ’° **Remaining balance:** â‚¹{remaining_balance:.2f}
 
 **Share your short link anywhere!**
-                    """
-
-                    keyboard = InlineKeyboardMarkup([
-                        [InlineKeyboardButton("ðŸ“‹ Copy Link", url=short_url)],
-                        [
-                            InlineKeyboardButton("ðŸ“ Manage Links", callback_data="manage_links"),
-                            InlineKeyboardButton("ðŸ”— Shorten Another", callback_data="shorten_another")
-                        ],
-                        [InlineKeyboardButton("ðŸ  Main Menu", callback_data="main_menu")]
-                    ])
-
-                    await query.edit_message_text(
-                        success_text,
-                        reply_markup=keyboard,
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-                else:
-                    error_msg = result.get('detail', 'Unknown error occurred')
-                    await query.edit_message_text(
-                        f"âŒ **Error:** {error_msg}\n\nPlease try again or contact support.",
-                        parse_mode=ParseMode.MARKDOWN
-                    )
-
-        except Exception as e:
+            """
+
+            keyboard = InlineKeyboardMarkup([
+                [InlineKeyboardButton("ðŸ“‹ Copy Link", url=short_url)],
+                [
+                    InlineKeyboardButton("ðŸ“ Manage Links", callback_data="manage_links"),
+                    InlineKeyboardButton("ðŸ”— Shorten Another", callback_data="shorten_another")
+                ],
+                [InlineKeyboardButton("ðŸ  Main Menu", callback_data="main_menu")]
+            ])
+
+            await query.edit_message_text(
+                success_text,
+                reply_markup=keyboard,
+                parse_mode=ParseMode.MARKDOWN
+            )
+        else:
+            error_msg = result.get('detail', 'Unknown error occurred')
             await query.edit_message_text(
-                "âŒ **Network Error**\n\nPlease check your connection and try again.",
+                f"âŒ **Error:** {error_msg}\n\nPlease try again or contact support.",
                 parse_mode=ParseMode.MARKDOWN
             )
 
+    except Exception:
+        await query.edit_message_text(
+            "âŒ **Network Error**\n\nPlease check your connection and try again.",
+            parse_mode=ParseMode.MARKDOWN
+        )
+
 async def handle_payment_method(query, method: str, context):
     """Handle different payment methods"""
     if method == "upi":
@@ -583,14 +622,16 @@ async def handle_payment_method(query, method: str, context):
         parse_mode=ParseMode.MARKDOWN
     )
 
+# Compiled once at import, shared by every handler
+URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+'
+    r'[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
 def is_valid_url(url: str) -> bool:
     """Basic URL validation"""
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+'
-        r'[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    return url_pattern.match(url) is not None
+    return URL_PATTERN.match(url) is not None
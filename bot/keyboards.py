@@ -81,20 +81,20 @@ def get_link_management_keyboard():
     ]
     return InlineKeyboardMarkup(keyboard)
 
-def get_expiry_keyboard(url: str):
-    """Expiry selection keyboard"""
+def get_expiry_keyboard(token: str):
+    """Expiry selection keyboard for a pending URL token (see pending.py)"""
     keyboard = [
         [
-            InlineKeyboardButton("No Expiry", callback_data=f"shorten_no_expiry_{url}"),
-            InlineKeyboardButton("1 Day", callback_data=f"shorten_1_{url}")
+            InlineKeyboardButton("No Expiry", callback_data=f"shorten_none_{token}"),
+            InlineKeyboardButton("1 Day", callback_data=f"shorten_1_{token}")
         ],
         [
-            InlineKeyboardButton("7 Days", callback_data=f"shorten_7_{url}"),
-            InlineKeyboardButton("30 Days", callback_data=f"shorten_30_{url}")
+            InlineKeyboardButton("7 Days", callback_data=f"shorten_7_{token}"),
+            InlineKeyboardButton("30 Days", callback_data=f"shorten_30_{token}")
         ],
         [
-            InlineKeyboardButton("90 Days", callback_data=f"shorten_90_{url}"),
-            InlineKeyboardButton("1 Year", callback_data=f"shorten_365_{url}")
+            InlineKeyboardButton("90 Days", callback_data=f"shorten_90_{token}"),
+            InlineKeyboardButton("1 Year", callback_data=f"shorten_365_{token}")
         ],
         [InlineKeyboardButton("âŒ Cancel", callback_data="cancel")]
     ]
@@ -129,18 +129,22 @@ def get_confirmation_keyboard(action: str, item_id: str):
     ]
     return InlineKeyboardMarkup(keyboard)
 
-def get_pagination_keyboard(current_page: int, total_pages: int, callback_prefix: str):
-    """Pagination keyboard for lists"""
+def get_pagination_keyboard(page: int, callback_prefix: str, next_cursor: str = None):
+    """Cursor pagination keyboard for lists
+
+    Next carries the cursor in its callback data ("{prefix}_{page}_{cursor}");
+    Previous only carries the page number, the handler remembers its cursor.
+    """
     keyboard = []
 
     nav_buttons = []
-    if current_page > 1:
-        nav_buttons.append(InlineKeyboardButton("â¬…ï¸ Previous", callback_data=f"{callback_prefix}_{current_page-1}"))
+    if page > 1:
+        nav_buttons.append(InlineKeyboardButton("â¬…ï¸ Previous", callback_data=f"{callback_prefix}_{page-1}"))
 
-    nav_buttons.append(InlineKeyboardButton(f"ðŸ“„ {current_page}/{total_pages}", callback_data="page_info"))
+    nav_buttons.append(InlineKeyboardButton(f"ðŸ“„ Page {page}", callback_data="page_info"))
 
-    if current_page < total_pages:
-        nav_buttons.append(InlineKeyboardButton("Next âž¡ï¸", callback_data=f"{callback_prefix}_{current_page+1}"))
+    if next_cursor:
+        nav_buttons.append(InlineKeyboardButton("Next âž¡ï¸", callback_data=f"{callback_prefix}_{page+1}_{next_cursor}"))
 
     keyboard.append(nav_buttons)
     keyboard.append([InlineKeyboardButton("ðŸ”™ Back", callback_data="main_menu")])
@@ -0,0 +1,75 @@
+"""
+Pending URL Store
+Keeps URLs that are waiting for an expiry choice under short random tokens,
+so inline keyboards carry a token instead of the URL (Telegram limits
+callback_data to 64 bytes)
+"""
+
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+class PendingUrlStore:
+    """Token -> URL map with TTL eviction and a per-user cap
+
+    Tokens are single use: ``pop`` removes them, so tapping a button twice
+    cannot shorten (and charge for) the same URL twice.
+    """
+
+    def __init__(self, ttl_seconds: float = 900, max_per_user: int = 5, token_bytes: int = 6):
+        self.ttl_seconds = ttl_seconds
+        self.max_per_user = max_per_user
+        self.token_bytes = token_bytes
+        # Insertion order == expiry order because the TTL is fixed
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (user_id, url, expires_at)
+        self._by_user: Dict[int, "OrderedDict[str, None]"] = {}
+
+    def _drop(self, token: str):
+        user_id, _, _ = self._entries.pop(token)
+        tokens = self._by_user.get(user_id)
+        if tokens is not None:
+            tokens.pop(token, None)
+            if not tokens:
+                del self._by_user[user_id]
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        while self._entries:
+            token, (_, _, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._drop(token)
+
+    def put(self, user_id: int, url: str) -> str:
+        """Store url for user_id and return its token (8 URL-safe characters)"""
+        self._evict_expired()
+        tokens = self._by_user.setdefault(user_id, OrderedDict())
+        while len(tokens) >= self.max_per_user:
+            self._drop(next(iter(tokens)))
+
+        token = secrets.token_urlsafe(self.token_bytes)
+        while token in self._entries:
+            token = secrets.token_urlsafe(self.token_bytes)
+        self._entries[token] = (user_id, url, time.monotonic() + self.ttl_seconds)
+        tokens = self._by_user.setdefault(user_id, OrderedDict())
+        tokens[token] = None
+        return token
+
+    def get(self, user_id: int, token: str) -> Optional[str]:
+        """URL for a live token owned by user_id, else None"""
+        entry = self._entries.get(token)
+        if not entry or entry[0] != user_id or entry[2] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def pop(self, user_id: int, token: str) -> Optional[str]:
+        """Like get(), but consumes the token"""
+        url = self.get(user_id, token)
+        if url is not None:
+            self._drop(token)
+        return url
+
+    def stats(self) -> dict:
+        self._evict_expired()
+        return {"pending": len(self._entries), "users": len(self._by_user)}
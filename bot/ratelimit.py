@@ -0,0 +1,225 @@
+"""
+Outbound Rate Limiter
+Every Bot API call the bot makes (reply_text, edit_message_text, ...) passes
+through one scheduler that keeps within Telegram's global and per-chat limits,
+honors retry_after on 429 responses and sends replies ahead of bulk messages
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from client import EndpointStats
+
+logger = logging.getLogger(__name__)
+
+# Lower sends first. Handlers' calls get PRIORITY_REPLY unless they pass
+# rate_limit_args, e.g. bot.send_message(..., rate_limit_args=PRIORITY_BULK)
+PRIORITY_REPLY = 0
+PRIORITY_BULK = 10
+PRIORITY_NAMES = {PRIORITY_REPLY: "reply", PRIORITY_BULK: "bulk"}
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``capacity``"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+class OutboundRateLimiter(BaseRateLimiter[int]):
+    """Priority queue of outgoing requests drained within the token buckets
+
+    One dispatcher task hands out send slots: the highest-priority waiting
+    request whose chat has a token goes next, so a chat that is over its limit
+    does not hold up other chats. A 429 pauses all sending for retry_after
+    (Telegram does not say which limit was hit) and the request is retried.
+    Requests without a chat_id only use the global bucket.
+    """
+
+    def __init__(self, global_per_second: float = 30, chat_per_second: float = 1,
+                 chat_burst: float = 3, group_per_minute: float = 20, max_retries: int = 2,
+                 max_chats: int = 10000, stats_window: int = 1000):
+        self.global_per_second = global_per_second
+        self.chat_per_second = chat_per_second
+        self.chat_burst = chat_burst
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self.stats_window = stats_window
+        self._global = TokenBucket(global_per_second, global_per_second)
+        self._chats: "OrderedDict[Union[int, str], TokenBucket]" = OrderedDict()
+        self._waiting: List[tuple] = []  # sorted (priority, seq, chat_id, future)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._paused_until = 0.0
+        self._stats: Dict[int, EndpointStats] = {}
+        self.retry_after_hits = 0
+
+    async def initialize(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def shutdown(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, _, _, future in self._waiting:
+            future.cancel()
+        self._waiting.clear()
+        logger.info("Outbound rate limiter stats: %s", self.stats())
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is not None:
+            self._chats.move_to_end(chat_id)
+            return bucket
+        if isinstance(chat_id, int) and chat_id > 0:
+            bucket = TokenBucket(self.chat_per_second, self.chat_burst)
+        else:
+            # Groups, supergroups and channels (negative ids or @username)
+            bucket = TokenBucket(self.group_per_minute / 60, 1)
+        self._chats[chat_id] = bucket
+        while len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+        return bucket
+
+    def _release_next(self, now: float) -> Optional[float]:
+        """Release one request if possible; else return how long to wait (None: until woken)"""
+        if self._paused_until > now:
+            return self._paused_until - now
+        delay = self._global.wait_time(now)
+        if delay or not self._waiting:
+            return delay or None
+
+        delay = None
+        for index, (_, _, chat_id, future) in enumerate(self._waiting):
+            if future.done():  # caller gave up
+                del self._waiting[index]
+                return 0.0
+            bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+            wait = bucket.wait_time(now) if bucket else 0.0
+            if not wait:
+                del self._waiting[index]
+                self._global.take()
+                if bucket:
+                    bucket.take()
+                future.set_result(None)
+                return 0.0
+            delay = wait if delay is None else min(delay, wait)
+        return delay
+
+    async def _dispatch(self):
+        while True:
+            delay = self._release_next(time.monotonic())
+            if delay == 0.0:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _acquire(self, priority: int, chat_id: Optional[Union[int, str]]):
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), chat_id, future)
+        bisect.insort(self._waiting, entry)
+        self._wakeup.set()
+        started = time.monotonic()
+        try:
+            await future
+        finally:
+            if not future.done() or future.cancelled():
+                try:
+                    self._waiting.remove(entry)
+                except ValueError:
+                    pass
+        self._priority_stats(priority).latencies.append(time.monotonic() - started)
+
+    def _priority_stats(self, priority: int) -> EndpointStats:
+        stats = self._stats.get(priority)
+        if stats is None:
+            stats = self._stats[priority] = EndpointStats(self.stats_window)
+        return stats
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        priority = PRIORITY_REPLY if rate_limit_args is None else rate_limit_args
+        chat_id = data.get("chat_id")
+        stats = self._priority_stats(priority)
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, chat_id)
+            stats.requests += 1
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.retry_after_hits += 1
+                stats.errors += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + float(e.retry_after))
+                self._wakeup.set()
+                logger.warning("%s to %s hit flood control, pausing sends for %ss", endpoint, chat_id, e.retry_after)
+                if attempt >= self.max_retries:
+                    raise
+                stats.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, 429 count and queue wait percentiles per priority"""
+        depth: Dict[str, int] = {}
+        for priority, _, _, _ in self._waiting:
+            name = PRIORITY_NAMES.get(priority, str(priority))
+            depth[name] = depth.get(name, 0) + 1
+        return {
+            "queue_depth": len(self._waiting),
+            "queue_depth_by_priority": depth,
+            "retry_after_hits": self.retry_after_hits,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "tracked_chats": len(self._chats),
+            "wait": {
+                PRIORITY_NAMES.get(priority, str(priority)): stats.summary()
+                for priority, stats in sorted(self._stats.items())
+            }
+        }
+
+def rate_limiter_from_config(config: dict) -> OutboundRateLimiter:
+    """Build the limiter from the outbound_rate_limit config section"""
+    settings = config.get("outbound_rate_limit", {})
+    return OutboundRateLimiter(
+        global_per_second=settings.get("global_per_second", 30),
+        chat_per_second=settings.get("chat_per_second", 1),
+        chat_burst=settings.get("chat_burst", 3),
+        group_per_minute=settings.get("group_per_minute", 20),
+        max_retries=settings.get("max_retries", 2)
+    )
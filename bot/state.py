@@ -0,0 +1,206 @@
+"""
+Conversation State Store
+Per-user bot state with a bounded in-memory cache (LRU + TTL) in front of a
+persistent backend, so state survives restarts and can be shared between
+bot processes. Writes are collected and flushed in batches.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from client import BackendClient, BackendError
+
+logger = logging.getLogger(__name__)
+
+class SQLiteStateBackend:
+    """Stores each user's state as a JSON row in a local SQLite file"""
+
+    def __init__(self, path: str = "bot_state.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA busy_timeout = 5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_state ("
+            "user_id INTEGER PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _load(self, user_id: int) -> Optional[dict]:
+        row = self._conn.execute("SELECT data FROM user_state WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save_many(self, states: Dict[int, dict]):
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO user_state (user_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                [(user_id, json.dumps(state), now) for user_id, state in states.items()]
+            )
+
+    async def load(self, user_id: int) -> Optional[dict]:
+        return await asyncio.to_thread(self._load, user_id)
+
+    async def save_many(self, states: Dict[int, dict]):
+        await asyncio.to_thread(self._save_many, states)
+
+    async def close(self):
+        self._conn.close()
+
+class ApiStateBackend:
+    """Keeps state on the backend's user record (currently the terms flag)"""
+
+    def __init__(self, client: BackendClient):
+        self.client = client
+
+    async def load(self, user_id: int) -> Optional[dict]:
+        response = await self.client.get(f"/api/users/{user_id}")
+        if response.status == 404:
+            return None
+        if not response.ok:
+            # Raise rather than return nothing, so the store does not cache it
+            raise BackendError(f"GET /api/users/{user_id} returned {response.status}")
+        return {"terms_accepted": bool(response.json({}).get("terms_accepted_at"))}
+
+    async def save_many(self, states: Dict[int, dict]):
+        for user_id, state in states.items():
+            if state.get("terms_accepted"):
+                # Idempotent on the server, so safe to retry
+                response = await self.client.put(f"/api/users/{user_id}/terms", retry=True)
+                if not response.ok:
+                    raise BackendError(f"PUT /api/users/{user_id}/terms returned {response.status}")
+
+    async def close(self):
+        pass
+
+class StateStore:
+    """LRU/TTL cache of user state with batched write-behind to ``backend``
+
+    ``backend`` needs ``async load(user_id)``, ``async save_many(states)``
+    and ``async close()``. Changed entries are kept until they are written,
+    even if the cache evicts them in the meantime.
+    """
+
+    def __init__(self, backend, max_entries: int = 10000, ttl_seconds: float = 3600,
+                 flush_interval: float = 2.0, batch_size: int = 200):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (state, loaded_at)
+        self._dirty: Dict[int, dict] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+    def _remember(self, user_id: int, state: dict):
+        self._cache[user_id] = (state, time.monotonic())
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, user_id: int) -> Dict[str, Any]:
+        """Current state for user_id (a copy; use update() to change it)"""
+        entry = self._cache.get(user_id)
+        if entry and time.monotonic() - entry[1] < self.ttl_seconds:
+            self._cache.move_to_end(user_id)
+            self.hits += 1
+            return dict(entry[0])
+
+        self.misses += 1
+        state = self._dirty.get(user_id)
+        if state is None:
+            try:
+                state = await self.backend.load(user_id) or {}
+            except Exception as e:
+                logger.warning("Could not load state for %s: %s", user_id, e)
+                return dict(entry[0]) if entry else {}
+        self._remember(user_id, state)
+        return dict(state)
+
+    async def update(self, user_id: int, **fields) -> Dict[str, Any]:
+        """Merge fields into the user's state; written on the next flush"""
+        state = dict(await self.get(user_id), **fields)
+        self._remember(user_id, state)
+        self._dirty[user_id] = state
+        if len(self._dirty) >= self.batch_size:
+            await self.flush()
+        return dict(state)
+
+    async def flush(self) -> int:
+        """Write pending changes in batches; returns number of users written"""
+        async with self._flush_lock:
+            written = 0
+            while self._dirty:
+                batch = dict(list(self._dirty.items())[:self.batch_size])
+                for user_id in batch:
+                    del self._dirty[user_id]
+                try:
+                    await self.backend.save_many(batch)
+                except Exception as e:
+                    logger.error("Error writing state for %d users: %s", len(batch), e)
+                    # Keep newer updates made while the write was in flight
+                    for user_id, state in batch.items():
+                        self._dirty.setdefault(user_id, state)
+                    break
+                written += len(batch)
+            self.writes += written
+            return written
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start periodic flushing on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._cache),
+            "max_entries": self.max_entries,
+            "pending_writes": len(self._dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "writes": self.writes
+        }
+
+def state_store_from_config(config: dict, client: BackendClient) -> StateStore:
+    """Build the store from the bot_state config section"""
+    settings = config.get("bot_state", {})
+    if settings.get("backend", "api") == "sqlite":
+        backend = SQLiteStateBackend(settings.get("sqlite_path", "bot_state.db"))
+    else:
+        backend = ApiStateBackend(client)
+    return StateStore(
+        backend,
+        max_entries=settings.get("max_entries", 10000),
+        ttl_seconds=settings.get("ttl_seconds", 3600),
+        flush_interval=settings.get("flush_interval_seconds", 2),
+        batch_size=settings.get("batch_size", 200)
+    )
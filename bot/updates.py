@@ -0,0 +1,63 @@
+"""
+Concurrent Update Processing
+Handles updates from different chats in parallel while keeping each chat's
+updates in the order Telegram sent them
+"""
+
+import asyncio
+from typing import Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """At most ``max_concurrent_updates`` in flight, one at a time per chat
+
+    The chat lock is taken before the in-flight slot, so a burst from one
+    chat queues behind its own lock instead of occupying slots that other
+    chats could use. Locks are dropped once no update for the chat is waiting.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks: Dict[int, list] = {}  # chat_id -> [lock, waiting updates]
+
+    @staticmethod
+    def chat_id(update: object) -> Optional[int]:
+        if isinstance(update, Update) and update.effective_chat:
+            return update.effective_chat.id
+        return None
+
+    async def process_update(self, update: object, coroutine: Awaitable) -> None:
+        chat_id = self.chat_id(update)
+        if chat_id is None:
+            await super().process_update(update, coroutine)
+            return
+
+        entry = self._chat_locks.get(chat_id)
+        if entry is None:
+            entry = self._chat_locks[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await super().process_update(update, coroutine)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chat_locks[chat_id]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent_updates": self.max_concurrent_updates,
+            "active_chats": len(self._chat_locks),
+            "queued_updates": sum(waiting for _, waiting in self._chat_locks.values())
+        }
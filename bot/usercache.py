@@ -0,0 +1,125 @@
+"""
+User Cache
+Short-lived per-user copies of the backend's user dashboard, so menu taps do
+not each cost a request. Concurrent misses for the same user share one
+request, and the bot's own balance changes are written straight in.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from client import BackendClient, BackendError
+
+Loader = Callable[[int], Awaitable[Optional[Dict[str, Any]]]]
+
+class UserCache:
+    """telegram_id -> user dict with TTL, LRU bound and single-flight loading
+
+    ``loader(telegram_id)`` returns the record or None (not cached) and may
+    raise. Every update()/add()/invalidate() bumps the user's version, so a load
+    that started before the change cannot put the old record back.
+    """
+
+    def __init__(self, loader: Loader, ttl_seconds: float = 15, max_entries: int = 10000):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # telegram_id -> (record, expires_at)
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._versions: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _bump(self, telegram_id: int):
+        if telegram_id in self._inflight:
+            self._versions[telegram_id] = self._versions.get(telegram_id, 0) + 1
+
+    def _store(self, telegram_id: int, record: Dict[str, Any]):
+        self._entries[telegram_id] = (record, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(telegram_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, telegram_id: int, version: int) -> Optional[Dict[str, Any]]:
+        try:
+            record = await self.loader(telegram_id)
+            if record is not None and self._versions.get(telegram_id, 0) == version:
+                self._store(telegram_id, record)
+            return record
+        finally:
+            del self._inflight[telegram_id]
+            self._versions.pop(telegram_id, None)
+
+    async def get(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Cached record (a copy), loading it if missing or expired"""
+        entry = self._entries.get(telegram_id)
+        if entry and entry[1] > time.monotonic():
+            self._entries.move_to_end(telegram_id)
+            self.hits += 1
+            return dict(entry[0])
+
+        task = self._inflight.get(telegram_id)
+        if task is None:
+            self.misses += 1
+            # Version taken now: a change made before the task first runs must also win
+            task = self._inflight[telegram_id] = asyncio.get_running_loop().create_task(
+                self._load(telegram_id, self._versions.get(telegram_id, 0))
+            )
+        else:
+            self.coalesced += 1
+        # shield: one caller giving up must not cancel the load for the others
+        record = await asyncio.shield(task)
+        return dict(record) if record is not None else None
+
+    def update(self, telegram_id: int, **fields):
+        """Write fields known from a backend response into the cached record"""
+        self._bump(telegram_id)
+        entry = self._entries.get(telegram_id)
+        if entry:
+            self._entries[telegram_id] = (dict(entry[0], **fields), entry[1])
+
+    def add(self, telegram_id: int, **deltas):
+        """Add deltas to numeric fields of the cached record (e.g. total_links=1)"""
+        self._bump(telegram_id)
+        entry = self._entries.get(telegram_id)
+        if entry:
+            record = dict(entry[0])
+            for field, value in deltas.items():
+                record[field] = record.get(field, 0) + value
+            self._entries[telegram_id] = (record, entry[1])
+
+    def invalidate(self, telegram_id: int):
+        """Drop the record so the next get() reloads it"""
+        self._bump(telegram_id)
+        self._entries.pop(telegram_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "loading": len(self._inflight)
+        }
+
+def user_cache_from_config(config: dict, client: BackendClient) -> UserCache:
+    """Cache of GET /api/users/{telegram_id}/dashboard, configured by the user_cache section"""
+
+    async def load_dashboard(telegram_id: int) -> Optional[Dict[str, Any]]:
+        response = await client.get(f"/api/users/{telegram_id}/dashboard")
+        if response.status == 404:
+            return None
+        if not response.ok:
+            raise BackendError(f"GET /api/users/{telegram_id}/dashboard returned {response.status}")
+        return response.data
+
+    settings = config.get("user_cache", {})
+    return UserCache(
+        load_dashboard,
+        ttl_seconds=settings.get("ttl_seconds", 15),
+        max_entries=settings.get("max_entries", 10000)
+    )
@@ -3,48 +3,49 @@ Wallet Management
 Handle wallet operations, payments, and balance management
 """
 
-import aiohttp
 import json
 import asyncio
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+from client import BackendClient
+from usercache import UserCache
+
 class WalletManager:
-    def __init__(self, api_base_url: str):
-        self.api_base_url = api_base_url
+    def __init__(self, backend: BackendClient, user_cache: Optional[UserCache] = None):
+        self.backend = backend
+        self.api_base_url = backend.base_url
+        self.user_cache = user_cache
 
     async def get_user_balance(self, telegram_id: int) -> float:
         """Get user's current balance"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(f"{self.api_base_url}/api/users/{telegram_id}") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('balance', 0.0)
-                    return 0.0
-            except Exception as e:
-                print(f"Error fetching balance: {e}")
-                return 0.0
+        try:
+            if self.user_cache:
+                user = await self.user_cache.get(telegram_id)
+                return user.get('balance', 0.0) if user else 0.0
+            response = await self.backend.get(f"/api/users/{telegram_id}")
+            if response.status == 200:
+                return response.data.get('balance', 0.0)
+            return 0.0
+        except Exception as e:
+            print(f"Error fetching balance: {e}")
+            return 0.0
 
     async def create_payment_request(self, telegram_id: int, amount: float, 
                                    payment_proof: str) -> Dict[str, Any]:
         """Create a new payment request"""
-        async with aiohttp.ClientSession() as session:
-            try:
-                payload = {
-                    "telegram_id": telegram_id,
-                    "amount": amount,
-                    "payment_proof": payment_proof
-                }
-
-                async with session.post(
-                    f"{self.api_base_url}/api/payments",
-                    json=payload
-                ) as response:
-                    return await response.json()
-
-            except Exception as e:
-                return {"error": f"Failed to create payment request: {e}"}
+        try:
+            payload = {
+                "telegram_id": telegram_id,
+                "amount": amount,
+                "payment_proof": payment_proof
+            }
+
+            response = await self.backend.post("/api/payments", json=payload)
+            return response.json({})
+
+        except Exception as e:
+            return {"error": f"Failed to create payment request: {e}"}
 
     async def get_transaction_history(self, telegram_id: int) -> list:
         """Get user's transaction history"""
@@ -0,0 +1,92 @@
+"""
+Webhook Receiver
+A small aiohttp server that accepts updates from Telegram and hands them to
+the Application's update queue, replacing long polling
+"""
+
+import asyncio
+import logging
+import signal
+from urllib.parse import urlsplit
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+def make_webhook_app(application: Application, path: str, secret_token: str = None) -> web.Application:
+    """aiohttp app with POST {path} for updates and GET /health"""
+
+    async def receive_update(request: web.Request) -> web.Response:
+        if secret_token and request.headers.get(SECRET_HEADER) != secret_token:
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), application.bot)
+        except (ValueError, TypeError, KeyError):
+            return web.Response(status=400)
+        # Answer at once; the update is processed in the background
+        await application.update_queue.put(update)
+        return web.Response()
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "queued_updates": application.update_queue.qsize(),
+            "processor": getattr(application.update_processor, "stats", dict)(),
+            "outbound": getattr(application.bot.rate_limiter, "stats", dict)()
+        })
+
+    app = web.Application()
+    app.router.add_post(path, receive_update)
+    app.router.add_get("/health", health)
+    return app
+
+async def run_webhook(application: Application, webhook_url: str, listen: str = "0.0.0.0",
+                      port: int = 8443, secret_token: str = None, max_connections: int = 40):
+    """Serve the webhook until SIGINT/SIGTERM, with the same lifecycle as run_polling"""
+    path = urlsplit(webhook_url).path or "/"
+    runner = web.AppRunner(make_webhook_app(application, path, secret_token))
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    try:
+        await application.bot.set_webhook(
+            url=webhook_url,
+            allowed_updates=Update.ALL_TYPES,
+            secret_token=secret_token,
+            max_connections=max_connections
+        )
+        await application.start()
+        await runner.setup()
+        await web.TCPSite(runner, listen, port).start()
+        logger.info("Webhook listening on %s:%d%s", listen, port, path)
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+def webhook_settings(config: dict, webhook_url: str = None, secret_token: str = None) -> dict:
+    """Keyword arguments for run_webhook from the bot_runtime config section"""
+    settings = config.get("bot_runtime", {})
+    return {
+        "webhook_url": webhook_url or config.get("webhook_url"),
+        "listen": settings.get("webhook_listen", "0.0.0.0"),
+        "port": settings.get("webhook_port", 8443),
+        "secret_token": secret_token or settings.get("webhook_secret") or None,
+        "max_connections": settings.get("webhook_max_connections", 40)
+    }
@@ -8,6 +8,8 @@ CREATE TABLE IF NOT EXISTS users (
     username VARCHAR(100) NOT NULL,
     balance DECIMAL(10,2) DEFAULT 0.00,
     status VARCHAR(20) DEFAULT 'active',
+    terms_accepted_at TIMESTAMP NULL,
+    bot_blocked_at TIMESTAMP NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -17,6 +19,7 @@ CREATE TABLE IF NOT EXISTS shortlinks (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id INTEGER NOT NULL,
     original_url TEXT NOT NULL,
+    url_fingerprint VARCHAR(32) NULL,
     short_code VARCHAR(20) UNIQUE NOT NULL,
     clicks INTEGER DEFAULT 0,
     status VARCHAR(20) DEFAULT 'active',
@@ -69,21 +72,81 @@ CREATE TABLE IF NOT EXISTS broadcast_messages (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     message TEXT NOT NULL,
     sent_count INTEGER DEFAULT 0,
+    failed_count INTEGER DEFAULT 0,
+    blocked_count INTEGER DEFAULT 0,
     total_users INTEGER DEFAULT 0,
+    last_user_id INTEGER DEFAULT 0,
     status VARCHAR(20) DEFAULT 'pending',
+    owner VARCHAR(100) NULL,
+    lease_expires_at TIMESTAMP NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NULL,
     sent_at TIMESTAMP NULL,
     created_by VARCHAR(100) NOT NULL
 );
 
+-- Raw click events (kept for the configured retention window)
+CREATE TABLE IF NOT EXISTS click_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    short_code VARCHAR(20) NOT NULL,
+    clicked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    referrer TEXT NULL,
+    user_agent_hash VARCHAR(16) NULL
+);
+
+-- Hourly/daily click rollups
+CREATE TABLE IF NOT EXISTS click_rollups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    short_code VARCHAR(20) NOT NULL,
+    period VARCHAR(10) NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    clicks INTEGER DEFAULT 0,
+    UNIQUE (short_code, period, bucket_start)
+);
+
+-- Streaming import jobs (progress checkpoint per chunk)
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    filename VARCHAR(255) NULL,
+    status VARCHAR(20) DEFAULT 'running',
+    rows_processed INTEGER DEFAULT 0,
+    links_created INTEGER DEFAULT 0,
+    rows_failed INTEGER DEFAULT 0,
+    amount_charged DECIMAL(10,2) DEFAULT 0.00,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Running per-user link totals (maintained by the API, rebuilt by userstats.py)
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    total_links INTEGER DEFAULT 0,
+    active_links INTEGER DEFAULT 0,
+    expired_links INTEGER DEFAULT 0,
+    total_clicks INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id);
 CREATE INDEX IF NOT EXISTS idx_users_status ON users(status);
 CREATE INDEX IF NOT EXISTS idx_shortlinks_user_id ON shortlinks(user_id);
 CREATE INDEX IF NOT EXISTS idx_shortlinks_short_code ON shortlinks(short_code);
 CREATE INDEX IF NOT EXISTS idx_shortlinks_status ON shortlinks(status);
+CREATE INDEX IF NOT EXISTS idx_shortlinks_status_expiry ON shortlinks(status, expiry_date);
+CREATE INDEX IF NOT EXISTS idx_shortlinks_user_fingerprint ON shortlinks(user_id, url_fingerprint, status);
+CREATE INDEX IF NOT EXISTS idx_shortlinks_user_status ON shortlinks(user_id, status);
+CREATE INDEX IF NOT EXISTS idx_shortlinks_user_created ON shortlinks(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_shortlinks_user_clicks ON shortlinks(user_id, clicks);
 CREATE INDEX IF NOT EXISTS idx_payments_user_id ON payments(user_id);
 CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status);
+CREATE INDEX IF NOT EXISTS idx_payments_status_created ON payments(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_payments_user_status ON payments(user_id, status);
+CREATE INDEX IF NOT EXISTS idx_payments_user_created ON payments(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_click_events_clicked_at ON click_events(clicked_at);
 
 -- Insert default settings
 INSERT OR IGNORE INTO settings (key, value, description) VALUES
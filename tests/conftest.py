@@ -0,0 +1,68 @@
+"""
+Shared fixtures for the Foxcode Shorter tests
+The backend and bot modules are imported the way they run (flat, from their
+own directories). The API tests use a throwaway SQLite database upgraded
+with the Alembic migrations, not create_all, so they test the real schema.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+BOT_DIR = os.path.join(ROOT, "bot")
+sys.path[:0] = [BACKEND_DIR, BOT_DIR]
+
+# database.py reads these at import time
+TEST_DB_DIR = tempfile.mkdtemp(prefix="foxcode-tests-")
+TEST_DB_PATH = os.path.join(TEST_DB_DIR, "foxcode_shorter.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+os.environ.pop("DB_ASYNC", None)
+os.environ.pop("SHORT_CODE_SECRET", None)
+
+_telegram_ids = itertools.count(1000)
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """Path of the test database after `alembic upgrade head`"""
+    from alembic import command
+    from alembic.config import Config
+
+    # main.py and alembic.ini use paths relative to the backend directory
+    os.chdir(BACKEND_DIR)
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    return TEST_DB_PATH
+
+@pytest.fixture(scope="session")
+def client(migrated_db):
+    """TestClient for the API with its background jobs running"""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def make_user(client):
+    """Create a user with a fresh telegram_id and an optional starting balance"""
+
+    def make(balance: float = 0) -> int:
+        telegram_id = next(_telegram_ids)
+        response = client.post("/api/users", params={"telegram_id": telegram_id, "username": f"user{telegram_id}"})
+        assert response.status_code == 200, response.text
+        if balance:
+            response = client.put(f"/api/users/{telegram_id}/balance", params={"amount": balance, "action": "add"})
+            assert response.status_code == 200, response.text
+        return telegram_id
+
+    return make
+
+@pytest.fixture(scope="session")
+def api(client):
+    """The backend's main module, for its in-process components"""
+    import main
+    return main
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from allocator import ALPHABET, SECRET_KEY, ShortCodeAllocator
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT, description TEXT)"))
+    return engine
+
+def stored_secret(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT value FROM settings WHERE key = :key"), {"key": SECRET_KEY}).scalar()
+
+def test_permutation_is_a_bijection():
+    allocator = ShortCodeAllocator(None, length=2, secret="test")
+    allocator._secret = b"test"
+    values = {allocator.permute(number) for number in range(allocator.domain)}
+    assert values == set(range(len(ALPHABET) ** 2))
+
+def test_codes_are_unique_across_allocators(engine):
+    first = ShortCodeAllocator(engine, length=7, block_size=50)
+    second = ShortCodeAllocator(engine, length=7, block_size=50)
+    codes = first.allocate_many(120) + second.allocate_many(120) + [first.allocate() for _ in range(30)]
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == 7 and set(code) <= set(ALPHABET) for code in codes)
+
+def test_generated_secret_is_persisted_and_reused(engine):
+    first = ShortCodeAllocator(engine)
+    first.load_secret()
+    secret = stored_secret(engine)
+    assert secret
+
+    second = ShortCodeAllocator(engine)
+    second.load_secret()
+    assert second.encode(42) == first.encode(42)
+    assert stored_secret(engine) == secret
+
+def test_configured_secret_is_persisted_on_first_use(engine):
+    seeded = ShortCodeAllocator(engine, secret="from-env")
+    seeded.load_secret()
+    assert stored_secret(engine) == "from-env"
+
+    # Later starts without the variable keep using the stored key
+    allocator = ShortCodeAllocator(engine)
+    allocator.load_secret()
+    assert [allocator.encode(n) for n in range(5)] == [seeded.encode(n) for n in range(5)]
+
+def test_changed_secret_is_refused(engine):
+    ShortCodeAllocator(engine, secret="original").load_secret()
+    allocator = ShortCodeAllocator(engine, secret="rotated")
+    with pytest.raises(RuntimeError, match="SHORT_CODE_SECRET"):
+        allocator.allocate()
+    assert stored_secret(engine) == "original"
+
+def test_exhausted_code_space(engine):
+    allocator = ShortCodeAllocator(engine, length=1, block_size=40)
+    allocator.allocate_many(40)
+    with pytest.raises(RuntimeError, match="exhausted"):
+        allocator.allocate_many(30)
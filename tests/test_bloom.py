@@ -0,0 +1,76 @@
+import random
+import string
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from bloom import CountingBloomFilter, ShortCodeFilter
+
+def random_codes(count: int, seed: int):
+    rng = random.Random(seed)
+    return {"".join(rng.choices(string.ascii_letters + string.digits, k=7)) for _ in range(count)}
+
+def links_engine(*codes, status: str = "active"):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE shortlinks (id INTEGER PRIMARY KEY, short_code TEXT, status TEXT)"))
+        for code in codes:
+            conn.execute(text("INSERT INTO shortlinks (short_code, status) VALUES (:code, :status)"),
+                         {"code": code, "status": status})
+    return engine
+
+def test_no_false_negatives():
+    bloom = CountingBloomFilter(capacity=1000, fp_rate=0.01)
+    codes = random_codes(1000, seed=1)
+    for code in codes:
+        bloom.add(code)
+    assert all(bloom.might_contain(code) for code in codes)
+
+def test_false_positive_rate_near_target():
+    bloom = CountingBloomFilter(capacity=2000, fp_rate=0.01)
+    for code in random_codes(2000, seed=2):
+        bloom.add(code)
+    others = random_codes(20000, seed=3) - random_codes(2000, seed=2)
+    false_positives = sum(bloom.might_contain(code) for code in others)
+    assert false_positives / len(others) < 0.03
+
+def test_remove_and_remove_unknown():
+    bloom = CountingBloomFilter(capacity=100)
+    bloom.add("keep")
+    bloom.add("gone")
+    bloom.remove("gone")
+    bloom.remove("never-added")
+    assert bloom.might_contain("keep")
+    assert not bloom.might_contain("gone")
+    assert bloom.count == 1
+
+def test_filter_loads_active_codes_and_syncs_new_rows():
+    engine = links_engine("abc1234", "def5678")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO shortlinks (short_code, status) VALUES ('old0000', 'expired')"))
+    code_filter = ShortCodeFilter(engine, capacity=100)
+    assert code_filter.might_exist("zzz9999")  # not built yet: everything goes to the DB
+
+    code_filter.build()
+    assert code_filter.might_exist("abc1234")
+    assert not code_filter.might_exist("old0000")
+    assert not code_filter.might_exist("new0000")
+
+    # Written by another worker, picked up by the refresh
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO shortlinks (short_code, status) VALUES ('new0000', 'active')"))
+    code_filter.refresh()
+    assert code_filter.might_exist("new0000")
+    assert code_filter.stats()["rejected_lookups"] == 2
+
+def test_local_add_is_not_counted_twice():
+    engine = links_engine("abc1234")
+    code_filter = ShortCodeFilter(engine, capacity=100)
+    code_filter.build()
+    code_filter.add("new0000")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO shortlinks (short_code, status) VALUES ('new0000', 'active')"))
+    code_filter.refresh()
+    # One remove must be enough once the link is deleted
+    code_filter.remove("new0000")
+    assert not code_filter.might_exist("new0000")
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from telegram.error import Forbidden
+
+import database
+from broadcast import BroadcastEngine
+from client import BackendResponse
+
+class ApiBackend:
+    """BackendClient stand-in that calls the API through the TestClient"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def request(self, method, path, params=None, json=None, retry=False):
+        response = await asyncio.to_thread(self.client.request, method, path, params=params, json=json)
+        return BackendResponse(response.status_code, response.json())
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+class FakeBot:
+    def __init__(self, blocked=(), hang_after=None):
+        self.sent = []
+        self.blocked = set(blocked)
+        self.hang_after = hang_after
+        self.hanging = asyncio.Event()
+
+    async def send_message(self, chat_id, text, rate_limit_args=None):
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if self.hang_after is not None and len(self.sent) >= self.hang_after:
+            self.hanging.set()
+            await asyncio.sleep(60)
+        self.sent.append(chat_id)
+
+def expire_lease(broadcast_id):
+    with database.engine.begin() as conn:
+        conn.execute(text("UPDATE broadcast_messages SET lease_expires_at = :past WHERE id = :id"),
+                     {"past": datetime.utcnow() - timedelta(seconds=1), "id": broadcast_id})
+
+def create_broadcast(client, message="Hello"):
+    response = client.post("/api/admin/broadcast", json={"message": message, "created_by": "tests"})
+    assert response.status_code == 200, response.text
+    return response.json()["broadcast_id"]
+
+def eligible_telegram_ids(client, broadcast_id):
+    rows = client.get(f"/api/admin/broadcasts/{broadcast_id}/recipients", params={"after": 0, "limit": 1000}).json()
+    return [row["telegram_id"] for row in rows["recipients"]]
+
+def test_only_the_lease_holder_can_send(client, make_user):
+    make_user()
+    broadcast_id = create_broadcast(client)
+    start = lambda owner: client.post(f"/api/admin/broadcasts/{broadcast_id}/start", params={"owner": owner})
+    progress = lambda owner, last_user_id: client.post(
+        f"/api/admin/broadcasts/{broadcast_id}/progress",
+        json={"owner": owner, "last_user_id": last_user_id, "sent": 1}
+    )
+
+    first = start("bot-a")
+    assert first.status_code == 200 and first.json()["status"] == "sending"
+    assert start("bot-a").status_code == 200  # idempotent for the holder
+    assert start("bot-b").status_code == 409
+    assert client.post(f"/api/admin/broadcasts/{broadcast_id}/heartbeat", params={"owner": "bot-b"}).status_code == 409
+    assert progress("bot-b", 1).status_code == 409
+    assert progress("bot-a", 1).json()["applied"]
+
+    expire_lease(broadcast_id)
+    assert start("bot-b").json()["owner"] == "bot-b"
+    assert progress("bot-a", 2).status_code == 409
+    assert client.post(f"/api/admin/broadcasts/{broadcast_id}/heartbeat", params={"owner": "bot-a"}).status_code == 409
+    assert progress("bot-b", 2).json()["sent_count"] == 2
+
+    client.post(f"/api/admin/broadcasts/{broadcast_id}/cancel")
+    assert start("bot-b").status_code == 409
+
+async def test_resume_after_crash_sends_each_user_once(client, make_user):
+    for _ in range(6):
+        make_user()
+    backend = ApiBackend(client)
+    broadcast_id = create_broadcast(client, "Resume test")
+    recipients = eligible_telegram_ids(client, broadcast_id)
+    blocked = recipients[-1]
+
+    # First process dies in the middle of its second batch
+    crashed_bot = FakeBot(hang_after=4)
+    crashed = BroadcastEngine(crashed_bot, backend, chunk_size=5, checkpoint_every=3, heartbeat_interval=60)
+    task = asyncio.ensure_future(crashed.run(broadcast_id))
+    await asyncio.wait_for(crashed_bot.hanging.wait(), 10)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    checkpoint = client.get(f"/api/admin/broadcasts/{broadcast_id}").json()
+    assert checkpoint["sent_count"] == 3
+
+    # Its lease is still live, so another process must not take over yet
+    other_bot = FakeBot(blocked=[blocked])
+    other = BroadcastEngine(other_bot, backend, chunk_size=5, checkpoint_every=3, heartbeat_interval=60)
+    await other.run(broadcast_id)
+    assert other_bot.sent == []
+
+    expire_lease(broadcast_id)
+    await other.run(broadcast_id)
+    state = client.get(f"/api/admin/broadcasts/{broadcast_id}").json()
+    assert state["status"] == "completed"
+    assert (state["sent_count"], state["blocked_count"]) == (len(recipients) - 1, 1)
+    # Only the unreported batch (at most checkpoint_every users) is sent twice
+    assert other_bot.sent[0] == recipients[3]
+    assert sorted(crashed_bot.sent[:3] + other_bot.sent) == sorted(recipients[:-1])
+    assert blocked not in eligible_telegram_ids(client, create_broadcast(client, "next"))
+
+async def test_sending_stops_when_the_lease_is_lost(client, make_user):
+    make_user()
+    make_user()
+    backend = ApiBackend(client)
+    broadcast_id = create_broadcast(client, "Lease test")
+    bot = FakeBot(hang_after=1)
+    engine = BroadcastEngine(bot, backend, chunk_size=5, checkpoint_every=5, heartbeat_interval=0.05)
+    task = asyncio.ensure_future(engine.run(broadcast_id))
+    await asyncio.wait_for(bot.hanging.wait(), 10)
+
+    expire_lease(broadcast_id)
+    assert client.post(f"/api/admin/broadcasts/{broadcast_id}/start", params={"owner": "other"}).status_code == 200
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, 5)
+    assert len(bot.sent) == 1
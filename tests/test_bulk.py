@@ -0,0 +1,40 @@
+def balance(client, telegram_id):
+    return client.get(f"/api/users/{telegram_id}").json()["balance"]
+
+def test_bulk_debits_once_for_valid_items(client, make_user):
+    telegram_id = make_user(balance=100)
+    response = client.post("/api/shortlinks/bulk", json={"telegram_id": telegram_id, "items": [
+        {"original_url": "https://example.com/bulk/1"},
+        {"original_url": "https://"},
+        {"original_url": "https://example.com/bulk/2", "expiry_days": 7},
+        {"original_url": "https://example.com/bulk/3", "expiry_days": 0},
+    ]})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["created"], data["failed"], data["total_cost"]) == (2, 2, 20)
+    assert data["remaining_balance"] == 80
+    assert [result["status"] for result in data["results"]] == ["created", "error", "created", "error"]
+    assert data["results"][2]["expiry_date"] is not None
+    assert balance(client, telegram_id) == 80
+
+    codes = [result["short_code"] for result in data["results"] if result["status"] == "created"]
+    assert len(set(codes)) == 2
+    for code in codes:
+        assert client.get(f"/{code}", follow_redirects=False).status_code in (301, 302, 307)
+
+def test_bulk_insufficient_balance_writes_nothing(client, make_user):
+    telegram_id = make_user(balance=15)
+    response = client.post("/api/shortlinks/bulk", json={"telegram_id": telegram_id, "items": [
+        {"original_url": "https://example.com/poor/1"},
+        {"original_url": "https://example.com/poor/2"},
+    ]})
+    assert response.status_code == 400
+    assert balance(client, telegram_id) == 15
+    assert client.get(f"/api/users/{telegram_id}/summary").json()["total_links"] == 0
+
+def test_bulk_request_limits(client, api, make_user):
+    telegram_id = make_user()
+    assert client.post("/api/shortlinks/bulk", json={"telegram_id": telegram_id, "items": []}).status_code == 400
+    too_many = [{"original_url": "https://example.com"}] * (api.config["bulk"]["max_items"] + 1)
+    assert client.post("/api/shortlinks/bulk", json={"telegram_id": telegram_id, "items": too_many}).status_code == 413
+    assert client.post("/api/shortlinks/bulk", json={"telegram_id": 1, "items": too_many[:1]}).status_code == 404
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+import cache
+from cache import LinkCache
+
+def test_hit_after_set():
+    link_cache = LinkCache(max_size=10, ttl_seconds=60)
+    assert link_cache.get("abc") is None
+    link_cache.set("abc", "https://example.com", None)
+    assert link_cache.get("abc") == ("https://example.com", None, "active")
+    stats = link_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+def test_evicts_least_recently_used():
+    link_cache = LinkCache(max_size=2, ttl_seconds=60)
+    link_cache.set("a", "https://a.example", None)
+    link_cache.set("b", "https://b.example", None)
+    link_cache.get("a")  # "b" is now the least recently used
+    link_cache.set("c", "https://c.example", None)
+    assert link_cache.get("b") is None
+    assert link_cache.get("a") is not None
+    assert link_cache.get("c") is not None
+    assert link_cache.stats()["evictions"] == 1
+
+def test_entry_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    link_cache = LinkCache(max_size=10, ttl_seconds=5)
+    link_cache.set("abc", "https://example.com", None)
+    now[0] += 4
+    assert link_cache.get("abc") is not None
+    now[0] += 2
+    assert link_cache.get("abc") is None
+    assert link_cache.stats()["size"] == 0
+
+def test_link_past_expiry_date_is_a_miss():
+    link_cache = LinkCache(max_size=10, ttl_seconds=60)
+    link_cache.set("old", "https://example.com", datetime.utcnow() - timedelta(seconds=1))
+    assert link_cache.get("old") is None
+
+def test_invalidate_and_disabled_cache():
+    link_cache = LinkCache(max_size=10, ttl_seconds=60)
+    link_cache.set("abc", "https://example.com", None)
+    link_cache.invalidate("abc")
+    assert link_cache.get("abc") is None
+
+    disabled = LinkCache(max_size=0)
+    disabled.set("abc", "https://example.com", None)
+    assert disabled.get("abc") is None
@@ -0,0 +1,115 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from clicks import ClickAccumulator, hash_user_agent
+
+class FakeEngine:
+    """Stands in for the SQLAlchemy engine; records executed batches"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+
+    @contextmanager
+    def begin(self):
+        if self.fail:
+            raise OperationalError("UPDATE shortlinks", {}, Exception("database is locked"))
+        yield self
+
+    def execute(self, statement, params=None):
+        self.batches.append(params)
+
+def test_flush_aggregates_clicks_per_code():
+    engine = FakeEngine()
+    accumulator = ClickAccumulator(engine, record_events=True)
+    for code in ("a", "a", "b"):
+        accumulator.record(code, referrer="https://t.me", user_agent="curl/8")
+    assert accumulator.pending_clicks("a") == 2
+
+    assert accumulator.flush() == 3
+    counters = {row["short_code"]: row["clicks"] for row in engine.batches[0]}
+    assert counters == {"a": 2, "b": 1}
+    assert len(engine.batches[-1]) == 3  # one click event each
+    assert engine.batches[-1][0]["user_agent_hash"] == hash_user_agent("curl/8")
+    assert accumulator.pending_clicks("a") == 0
+    assert accumulator.flush() == 0
+
+def test_record_never_flushes_inline():
+    engine = FakeEngine()
+    accumulator = ClickAccumulator(engine, flush_threshold=3, max_unflushed=100)
+    for _ in range(5):
+        accumulator.record("a")
+    # The background thread does the write; record() only wakes it
+    assert engine.batches == []
+    assert accumulator._wakeup.is_set()
+    assert accumulator.stats()["pending_clicks"] == 5
+
+class StalledEngine(FakeEngine):
+    """begin() blocks until released, like a database stuck on a lock"""
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    @contextmanager
+    def begin(self):
+        self.entered.set()
+        self.release.wait(5)
+        yield self
+
+def test_stalled_flush_keeps_at_most_max_unflushed_in_memory():
+    engine = StalledEngine()
+    accumulator = ClickAccumulator(engine, max_unflushed=10, record_events=True)
+    for _ in range(4):
+        accumulator.record("a")
+    flusher = threading.Thread(target=accumulator.flush)
+    flusher.start()
+    assert engine.entered.wait(5)
+
+    for _ in range(25):
+        accumulator.record("b")
+    stats = accumulator.stats()
+    assert (stats["pending_clicks"], stats["dropped_clicks"], stats["dropped_events"]) == (10, 15, 15)
+    assert len(accumulator._events) == 10
+
+    engine.release.set()
+    flusher.join(5)
+    assert accumulator.flushed_clicks == 4
+    assert accumulator.flush() == 10
+    accumulator.record("c")
+    assert accumulator.pending_clicks("c") == 1
+
+def test_failed_flush_is_retried():
+    engine = FakeEngine(fail=True)
+    accumulator = ClickAccumulator(engine, max_unflushed=100)
+    accumulator.record("a", clicked_at=datetime(2026, 1, 1, 12))
+    assert accumulator.flush() == 0
+    assert accumulator.stats()["flush_errors"] == 1
+    assert accumulator.pending_clicks("a") == 1
+
+    engine.fail = False
+    assert accumulator.flush() == 1
+    assert engine.batches[0][0]["last_clicked"] == datetime(2026, 1, 1, 12)
+
+def test_failed_flushes_keep_at_most_max_unflushed():
+    engine = FakeEngine(fail=True)
+    accumulator = ClickAccumulator(engine, max_unflushed=10, record_events=True)
+    for attempt in range(3):
+        for _ in range(8):
+            accumulator.record(f"code{attempt}")
+        accumulator.flush()
+
+    stats = accumulator.stats()
+    assert stats["pending_clicks"] == 10
+    assert stats["dropped_clicks"] == 14
+    assert len(accumulator._events) == 10
+    assert stats["dropped_events"] == 14
+
+@pytest.mark.parametrize("user_agent", [None, ""])
+def test_no_user_agent_hash(user_agent):
+    assert hash_user_agent(user_agent) is None
@@ -0,0 +1,49 @@
+from sqlalchemy import text
+
+import database
+
+def create_link(client, telegram_id, url):
+    response = client.post("/api/shortlinks", params={"telegram_id": telegram_id, "original_url": url})
+    assert response.status_code == 200, response.text
+    return response.json()["short_code"]
+
+def create_payment(client, telegram_id, amount):
+    response = client.post("/api/payments", params={
+        "telegram_id": telegram_id, "amount": amount, "payment_proof": f"proof-{amount}"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["payment_id"]
+
+def test_dashboard_counts_and_top_links(client, api, make_user):
+    telegram_id = make_user(balance=100)
+    codes = [create_link(client, telegram_id, f"https://example.com/dashboard/{n}") for n in range(4)]
+    for code, clicks in zip(codes, (3, 0, 5, 1)):
+        for _ in range(clicks):
+            client.get(f"/{code}", follow_redirects=False)
+    api.click_accumulator.flush()
+
+    payment_ids = [create_payment(client, telegram_id, amount) for amount in (10, 20, 40)]
+    with database.engine.begin() as conn:
+        conn.execute(text("UPDATE payments SET status = 'approved' WHERE id = :id"), {"id": payment_ids[0]})
+
+    response = client.get(f"/api/users/{telegram_id}/dashboard", params={"top": 3, "payments": 2})
+    assert response.status_code == 200, response.text
+    data = response.json()
+
+    assert (data["balance"], data["links_available"]) == (60, 6)
+    assert (data["total_links"], data["active_links"], data["expired_links"], data["total_clicks"]) == (4, 4, 0, 9)
+    assert [(link["short_code"], link["clicks"]) for link in data["top_links"]] == \
+        [(codes[2], 5), (codes[0], 3), (codes[3], 1)]
+    assert [payment["id"] for payment in data["recent_payments"]] == [payment_ids[2], payment_ids[1]]
+    assert data["payments"] == {
+        "approved": {"count": 1, "amount": 10},
+        "pending": {"count": 2, "amount": 60}
+    }
+
+def test_dashboard_limits_and_unknown_user(client, make_user):
+    telegram_id = make_user(balance=100)
+    create_link(client, telegram_id, "https://example.com/dashboard/only")
+    data = client.get(f"/api/users/{telegram_id}/dashboard", params={"top": 0, "payments": 500}).json()
+    assert (data["top_links"], data["recent_payments"], data["payments"]) == ([], [], {})
+
+    assert client.get("/api/users/999999999/dashboard").status_code == 404
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import select, text, update
+
+import database
+from database import ThreadedSession
+from models import Settings
+
+@pytest.fixture
+def threaded(migrated_db):
+    session = ThreadedSession(database.SessionLocal())
+    yield session
+    session.session.close()
+
+async def test_threaded_orm_select(threaded):
+    result = await threaded.execute(select(Settings.key).where(Settings.key == "no-such-setting"))
+    assert result.all() == []
+    assert (await threaded.scalars(select(Settings).limit(1))).all() is not None
+
+async def test_threaded_update_keeps_rowcount(threaded):
+    result = await threaded.execute(update(Settings).where(Settings.key == "no-such-setting").values(value="x"))
+    assert result.rowcount == 0
+    assert await threaded.scalar(text("SELECT 1")) == 1
+
+def test_redirect_and_lookups_through_threaded_session(client, make_user):
+    assert not database.DB_ASYNC
+    telegram_id = make_user(balance=100)
+    response = client.post("/api/shortlinks", params={"telegram_id": telegram_id,
+                                                      "original_url": "https://example.com/threaded"})
+    assert response.status_code == 200, response.text
+    short_code = response.json()["short_code"]
+
+    response = client.get(f"/{short_code}", follow_redirects=False)
+    assert response.status_code in (301, 302, 307), response.text
+    assert response.headers["location"] == "https://example.com/threaded"
+    assert client.get("/zzzzzzz", follow_redirects=False).status_code == 404
+
+    for path in (f"/api/shortlinks/{telegram_id}", f"/api/users/{telegram_id}/summary",
+                 f"/api/users/{telegram_id}/dashboard", f"/api/shortlinks/{short_code}/stats"):
+        assert client.get(path).status_code == 200, path
+
+ASYNC_MODE_SCRIPT = """
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+import database, main
+
+assert database.DB_ASYNC and database.async_read_engine is not database.async_engine
+
+async def read_only_check():
+    session = database.open_async_read_session()
+    try:
+        assert (await session.execute(text("SELECT COUNT(*) FROM users"))).scalar() >= 0
+        try:
+            await session.execute(text("DELETE FROM settings WHERE key = 'no-such-setting'"))
+        except Exception as e:
+            assert "readonly" in str(e), e
+        else:
+            raise AssertionError("read session accepted a write")
+    finally:
+        await session.close()
+        await database.async_engine.dispose()
+        await database.async_read_engine.dispose()
+
+with TestClient(main.app) as client:
+    assert client.post("/api/users", params={"telegram_id": 999001, "username": "async"}).status_code == 200
+    client.put("/api/users/999001/balance", params={"amount": 50, "action": "add"})
+    code = client.post("/api/shortlinks", params={"telegram_id": 999001,
+                                                  "original_url": "https://example.com/async"}).json()["short_code"]
+    assert client.get("/" + code, follow_redirects=False).headers["location"] == "https://example.com/async"
+    for path in ("/api/shortlinks/999001", "/api/users/999001/dashboard", "/api/shortlinks/" + code + "/stats"):
+        assert client.get(path).status_code == 200, path
+asyncio.run(read_only_check())
+print("ok")
+"""
+
+def test_async_mode(migrated_db):
+    # DB_ASYNC is read at import time, so the API runs in its own interpreter
+    env = dict(os.environ, DB_ASYNC="true", PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, "-c", ASYNC_MODE_SCRIPT], cwd=os.path.dirname(database.__file__),
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip().endswith("ok")
@@ -0,0 +1,91 @@
+import io
+import json
+
+import pytest
+
+import database
+import importer
+from models import User
+
+def rows(fmt, content):
+    return list(importer.iter_rows(io.BytesIO(content.encode("utf-8")), fmt))
+
+def test_csv_with_header():
+    assert rows("csv", "﻿name,URL,expiry_days\nA,https://a.example,3\n\nB,https://b.example,\n") == [
+        {"original_url": "https://a.example", "expiry_days": 3},
+        {"original_url": "https://b.example", "expiry_days": None},
+    ]
+
+def test_csv_without_header():
+    assert rows("csv", "https://a.example,5\nhttps://b.example\n") == [
+        {"original_url": "https://a.example", "expiry_days": 5},
+        {"original_url": "https://b.example", "expiry_days": None},
+    ]
+
+def test_ndjson_variants():
+    content = '"https://a.example"\n{"link": "https://b.example", "expiry_days": "2"}\n{oops\n[1]\n'
+    assert rows("ndjson", content) == [
+        {"original_url": "https://a.example", "expiry_days": None},
+        {"original_url": "https://b.example", "expiry_days": 2},
+        {"original_url": None, "error": "Invalid JSON"},
+        {"original_url": None, "error": "Expected an object or string"},
+    ]
+    assert importer.detect_format("urls.JSONL") == "ndjson"
+    assert importer.detect_format("urls.txt", "CSV") == "csv"
+
+@pytest.fixture
+def session(client):
+    db = database.SessionLocal()
+    yield db
+    db.close()
+
+def run(api, db, telegram_id, job, urls, chunk_size=2):
+    user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    items = iter([{"original_url": url, "expiry_days": None} for url in urls])
+    return importer.run_import(db, job, user, items, 10, api.code_allocator, "https://foxcode.tk",
+                               chunk_size=chunk_size)
+
+def test_resumed_import_does_not_charge_twice(api, session, make_user):
+    telegram_id = make_user(balance=100)
+    urls = [f"https://example.com/import/{n}" for n in range(5)] + [""]
+    user = session.query(User).filter(User.telegram_id == telegram_id).first()
+    job = importer.start_job(session, user, "urls.csv")
+
+    # Interrupted after the first chunk
+    records = run(api, session, telegram_id, job, urls)
+    assert [next(records)["type"] for _ in range(2)] == ["result", "result"]
+    records.close()
+    session.refresh(job)
+    assert (job.rows_processed, job.links_created) == (2, 2)
+
+    records = list(run(api, session, telegram_id, job, urls))
+    results = [record for record in records if record["type"] == "result"]
+    assert [record["row"] for record in results] == [2, 3, 4, 5]
+    assert results[-1]["status"] == "error"
+    summary = records[-1]
+    assert summary["type"] == "summary" and summary["status"] == "completed"
+    assert (summary["rows_processed"], summary["links_created"], summary["rows_failed"]) == (6, 5, 1)
+    assert summary["amount_charged"] == 50
+    assert summary["remaining_balance"] == 50
+
+def test_import_stops_when_balance_runs_out(api, session, make_user):
+    telegram_id = make_user(balance=30)
+    user = session.query(User).filter(User.telegram_id == telegram_id).first()
+    job = importer.start_job(session, user, "urls.ndjson")
+    urls = [f"https://example.com/import/poor/{n}" for n in range(6)]
+
+    records = list(run(api, session, telegram_id, job, urls))
+    assert [record["type"] for record in records] == ["result", "result", "error", "summary"]
+    assert records[-1]["status"] == "stopped"
+    assert records[-1]["links_created"] == 2
+
+def test_import_endpoint_streams_ndjson(client, make_user):
+    telegram_id = make_user(balance=100)
+    upload = ("urls.csv", b"url\nhttps://example.com/upload/1\nhttps://example.com/upload/2\n", "text/csv")
+    response = client.post("/api/imports", params={"telegram_id": telegram_id}, files={"file": upload})
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records[0]["type"] == "job"
+    assert records[-1]["links_created"] == 2
+    job = client.get(f"/api/imports/{records[0]['job_id']}").json()
+    assert (job["status"], job["amount_charged"]) == ("completed", 20)
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+
+import utils
+
+def pages(client, telegram_id, **params):
+    cursor = None
+    while True:
+        response = client.get(f"/api/shortlinks/{telegram_id}", params=dict(params, cursor=cursor))
+        assert response.status_code == 200, response.text
+        data = response.json()
+        yield data
+        cursor = data["next_cursor"]
+        if not data["has_more"]:
+            assert cursor is None
+            return
+
+@pytest.fixture
+def user_with_links(client, make_user):
+    telegram_id = make_user(balance=200)
+    client.post("/api/shortlinks", params={"telegram_id": telegram_id, "original_url": "https://example.com/p/first"})
+    # One bulk request: all rows share created_at, so the id breaks the tie
+    response = client.post("/api/shortlinks/bulk", json={"telegram_id": telegram_id, "items": [
+        {"original_url": f"https://example.com/p/{n}"} for n in range(7)
+    ]})
+    assert response.json()["created"] == 7
+    return telegram_id
+
+def test_pages_cover_every_link_once_newest_first(client, user_with_links):
+    links = [link for page in pages(client, user_with_links, limit=3) for link in page["shortlinks"]]
+    urls = [link["original_url"] for link in links]
+    assert urls == [f"https://example.com/p/{n}" for n in reversed(range(7))] + ["https://example.com/p/first"]
+
+def test_delete_between_pages_does_not_shift(client, user_with_links):
+    walk = pages(client, user_with_links, limit=3, fields="short_code")
+    first = next(walk)["shortlinks"]
+    assert client.delete(f"/api/shortlinks/{first[0]['short_code']}").status_code == 200
+    rest = [link for page in walk for link in page["shortlinks"]]
+    assert len(first) + len(rest) == 8
+    assert not {link["short_code"] for link in first} & {link["short_code"] for link in rest}
+
+def test_fields_and_bad_requests(client, user_with_links):
+    data = client.get(f"/api/shortlinks/{user_with_links}", params={"limit": 1, "fields": "short_code,short_url"}).json()
+    link = data["shortlinks"][0]
+    assert set(link) == {"short_code", "short_url"}
+    assert link["short_url"].endswith("/" + link["short_code"])
+
+    assert client.get(f"/api/shortlinks/{user_with_links}", params={"fields": "password"}).status_code == 400
+    assert client.get(f"/api/shortlinks/{user_with_links}", params={"cursor": "zz"}).status_code == 400
+    assert client.get(f"/api/shortlinks/{user_with_links}", params={"limit": -1}).status_code == 400
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 5, 6, 7, 8, 9, 123456)
+    assert utils.decode_cursor(utils.encode_cursor(created_at, 987)) == (created_at, 987)
+    with pytest.raises(ValueError):
+        utils.decode_cursor("not-a-cursor!")
@@ -0,0 +1,41 @@
+import pending
+from pending import PendingUrlStore
+
+def test_token_is_single_use():
+    store = PendingUrlStore()
+    token = store.put(1, "https://example.com/a")
+    assert len(token) == 8
+    assert store.get(1, token) == "https://example.com/a"
+    assert store.pop(1, token) == "https://example.com/a"
+    # A second tap on the same button finds nothing to shorten
+    assert store.pop(1, token) is None
+    assert store.stats() == {"pending": 0, "users": 0}
+
+def test_unknown_or_foreign_token():
+    store = PendingUrlStore()
+    token = store.put(1, "https://example.com/a")
+    assert store.pop(1, "nosuchtk") is None
+    assert store.pop(2, token) is None
+    assert store.pop(1, token) == "https://example.com/a"
+
+def test_tokens_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(pending.time, "monotonic", lambda: now[0])
+    store = PendingUrlStore(ttl_seconds=10)
+    old = store.put(1, "https://example.com/old")
+    now[0] += 6
+    fresh = store.put(1, "https://example.com/fresh")
+    now[0] += 5
+    assert store.pop(1, old) is None
+    assert store.get(1, fresh) == "https://example.com/fresh"
+    assert store.stats() == {"pending": 1, "users": 1}
+
+def test_oldest_token_dropped_at_user_cap():
+    store = PendingUrlStore(max_per_user=2)
+    first = store.put(1, "https://example.com/1")
+    second = store.put(1, "https://example.com/2")
+    third = store.put(1, "https://example.com/3")
+    other = store.put(2, "https://example.com/other")
+    assert store.get(1, first) is None
+    assert [store.get(1, token) for token in (second, third)] == ["https://example.com/2", "https://example.com/3"]
+    assert store.get(2, other) == "https://example.com/other"
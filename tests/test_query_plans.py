@@ -0,0 +1,67 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot queries, on a database built by
+`alembic upgrade head`. Each query must use the index its migration added
+instead of scanning the whole table.
+"""
+
+import sqlite3
+
+import pytest
+
+# (migration, description, query, parameters, expected index)
+QUERIES = [
+    ("0001", "redirect lookup",
+     "SELECT original_url, expiry_date FROM shortlinks WHERE short_code = ? AND status = 'active'",
+     ("abc1234",), "ix_shortlinks_short_code"),
+    ("0002", "expiry sweeper due links",
+     "SELECT id, short_code, user_id FROM shortlinks WHERE status = 'active' "
+     "AND expiry_date <= ? ORDER BY expiry_date LIMIT 500",
+     ("2026-01-01",), "idx_shortlinks_status_expiry"),
+    ("0003", "dedupe lookup by fingerprint",
+     "SELECT * FROM shortlinks WHERE user_id = ? AND url_fingerprint = ? AND status = 'active' "
+     "ORDER BY id DESC LIMIT 1",
+     (1, "0" * 32), "idx_shortlinks_user_fingerprint"),
+    ("0003", "user's active links",
+     "SELECT COUNT(*) FROM shortlinks WHERE user_id = ? AND status = 'active'",
+     (1,), "idx_shortlinks_user_status"),
+    ("0003", "admin pending payments",
+     "SELECT * FROM payments WHERE status = 'pending' ORDER BY created_at DESC LIMIT 5",
+     (), "idx_payments_status_created"),
+    ("0003", "approved payments per user",
+     "SELECT COUNT(*) FROM payments WHERE user_id = ? AND status = 'approved'",
+     (1,), "idx_payments_user_status"),
+    ("0004", "link listing page (keyset)",
+     "SELECT id, created_at, short_code FROM shortlinks WHERE user_id = ? "
+     "AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 6",
+     (1, "2026-01-01", 10), "idx_shortlinks_user_created"),
+    ("0007", "broadcast recipients chunk (keyset)",
+     "SELECT id, telegram_id FROM users WHERE id > ? AND status = 'active' "
+     "AND bot_blocked_at IS NULL ORDER BY id LIMIT 500",
+     (0,), "idx_users_status"),
+    ("0008", "dashboard top links",
+     "SELECT short_code, original_url, clicks, status FROM shortlinks WHERE user_id = ? "
+     "ORDER BY clicks DESC LIMIT 5",
+     (1,), "idx_shortlinks_user_clicks"),
+    ("0008", "dashboard recent payments",
+     "SELECT id, amount, status, payment_method, created_at FROM payments WHERE user_id = ? "
+     "ORDER BY created_at DESC LIMIT 5",
+     (1,), "idx_payments_user_created"),
+    ("0008", "dashboard payment totals",
+     "SELECT status, COUNT(*), SUM(amount) FROM payments WHERE user_id = ? GROUP BY status",
+     (1,), "idx_payments_user_status"),
+]
+
+@pytest.fixture(scope="module")
+def connection(migrated_db):
+    connection = sqlite3.connect(f"file:{migrated_db}?mode=ro", uri=True)
+    yield connection
+    connection.close()
+
+@pytest.mark.parametrize("migration, description, query, parameters, expected", QUERIES,
+                         ids=[f"{query[0]}-{query[1]}" for query in QUERIES])
+def test_query_uses_index(connection, migration, description, query, parameters, expected):
+    plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", parameters)]
+    details = " | ".join(plan)
+    # "SCAN t" without an index is a full table scan; "SCAN t USING INDEX" is fine
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in plan), details
+    assert f"INDEX {expected}" in details, details
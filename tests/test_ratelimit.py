@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+from telegram.error import RetryAfter
+
+from ratelimit import PRIORITY_BULK, OutboundRateLimiter, TokenBucket
+
+@pytest.fixture
+async def limiter():
+    limiter = OutboundRateLimiter(global_per_second=1000, chat_per_second=0.5, chat_burst=1)
+    await limiter.initialize()
+    yield limiter
+    await limiter.shutdown()
+
+def send(limiter, chat_id, log, priority=None, result="ok"):
+    async def callback():
+        log.append(chat_id)
+        return result
+    return limiter.process_request(callback, (), {}, "sendMessage", {"chat_id": chat_id}, priority)
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    assert bucket.wait_time(now) == 0
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 0.5) == 0
+    assert bucket.wait_time(now + 10) == 0 and bucket.tokens == 2  # capped
+
+async def test_busy_chat_does_not_block_other_chats(limiter):
+    log = []
+    assert await send(limiter, 1, log) == "ok"
+    waiting = asyncio.ensure_future(send(limiter, 1, log))  # chat 1 has no token for 2s
+    assert await asyncio.wait_for(send(limiter, 2, log), 0.5) == "ok"
+    assert log == [1, 2]
+    assert limiter.stats()["queue_depth"] == 1
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+
+async def test_replies_go_before_bulk(limiter):
+    log = []
+    limiter._paused_until = time.monotonic() + 0.1
+    bulk = [asyncio.ensure_future(send(limiter, chat_id, log, PRIORITY_BULK)) for chat_id in (10, 11)]
+    await asyncio.sleep(0.01)
+    reply = asyncio.ensure_future(send(limiter, 12, log))
+    await asyncio.wait_for(asyncio.gather(reply, *bulk), 1)
+    assert log == [12, 10, 11]
+    assert set(limiter.stats()["wait"]) == {"reply", "bulk"}
+
+async def test_retry_after_pauses_and_retries(limiter):
+    calls = []
+
+    async def flaky():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RetryAfter(0.2)
+        return True
+
+    assert await limiter.process_request(flaky, (), {}, "sendMessage", {}, None) is True
+    assert calls[1] - calls[0] >= 0.2
+    assert limiter.stats()["retry_after_hits"] == 1
+
+async def test_gives_up_after_max_retries():
+    limiter = OutboundRateLimiter(max_retries=1)
+    await limiter.initialize()
+
+    async def always_limited():
+        raise RetryAfter(0)
+
+    try:
+        with pytest.raises(RetryAfter):
+            await limiter.process_request(always_limited, (), {}, "sendMessage", {"chat_id": 5}, None)
+        assert limiter.retry_after_hits == 2
+    finally:
+        await limiter.shutdown()
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from bloom import CountingBloomFilter, ShortCodeFilter
+from cache import LinkCache
+from database import ThreadedSession
+from models import Base
+from resolver import EXPIRED, FOUND, NOT_FOUND, LinkResolver
+
+LIVE_CODES = [f"live{n:03d}" for n in range(40)]
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    past, future = datetime.utcnow() - timedelta(days=1), datetime.utcnow() + timedelta(days=1)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, telegram_id, username, balance) VALUES (1, 1, 'u', 0)"))
+        rows = [{"code": code, "expiry": future} for code in LIVE_CODES] + [{"code": "gone000", "expiry": past}]
+        conn.execute(text("INSERT INTO shortlinks (user_id, original_url, short_code, clicks, status, expiry_date) "
+                          "VALUES (1, 'https://example.com/' || :code, :code, 0, 'active', :expiry)"), rows)
+    return engine
+
+@pytest.fixture
+def resolver(engine):
+    code_filter = ShortCodeFilter(engine)
+    code_filter.build()
+    # A tiny filter, so the expired code shares counters with the live ones
+    code_filter.filter = CountingBloomFilter(capacity=8, fp_rate=0.2)
+    for code in LIVE_CODES + ["gone000"]:
+        code_filter.filter.add(code)
+    factory = sessionmaker(bind=engine)
+    return LinkResolver(lambda: ThreadedSession(factory()), LinkCache(), code_filter=code_filter)
+
+async def test_found_and_not_found(resolver):
+    assert await resolver.resolve("live000") == (FOUND, "https://example.com/live000")
+    resolver.code_filter.filter = CountingBloomFilter(capacity=8)
+    assert await resolver.resolve("nope000") == (NOT_FOUND, None)
+
+async def test_expiring_a_code_twice_keeps_live_codes(resolver, engine):
+    assert await resolver.resolve("gone000") == (EXPIRED, None)
+    # A second request (or a concurrent one, or one after the sweeper) expires nothing
+    await resolver.expire("gone000")
+    await resolver.expire("gone000")
+
+    assert all(resolver.code_filter.might_exist(code) for code in LIVE_CODES)
+    with engine.connect() as conn:
+        stats = conn.execute(text("SELECT active_links, expired_links FROM user_stats WHERE user_id = 1")).one()
+    assert tuple(stats) == (-1, 1)  # one delta only (create_all seeds no totals)
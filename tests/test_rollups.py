@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+import database
+import rollups
+
+def create_link(client, make_user, url):
+    telegram_id = make_user(balance=100)
+    response = client.post("/api/shortlinks", params={"telegram_id": telegram_id, "original_url": url})
+    assert response.status_code == 200, response.text
+    return response.json()["short_code"]
+
+def add_events(short_code, *moments):
+    with database.engine.begin() as conn:
+        for moment in moments:
+            conn.execute(
+                text("INSERT INTO click_events (short_code, clicked_at) VALUES (:code, :at)"),
+                {"code": short_code, "at": moment.strftime("%Y-%m-%d %H:%M:%S.%f")}
+            )
+
+def test_bucket_start_uses_stored_format():
+    moment = datetime(2026, 3, 4, 15, 42, 7, 123456)
+    assert rollups.bucket_start("hour", moment) == "2026-03-04 15:00:00"
+    assert rollups.bucket_start("day", moment) == "2026-03-04 00:00:00"
+
+def test_compaction_rolls_up_once(client, make_user):
+    short_code = create_link(client, make_user, "https://example.com/rollup")
+    # Inside the retention window, so the events are not pruned
+    hour = (datetime.utcnow() - timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+    add_events(short_code, hour + timedelta(minutes=5), hour + timedelta(minutes=55), hour + timedelta(minutes=61))
+    rollups.compact_clicks(database.engine)
+    rollups.compact_clicks(database.engine)  # nothing new: counts must not double
+
+    with database.engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT period, bucket_start, clicks FROM click_rollups WHERE short_code = :code "
+                 "ORDER BY period, bucket_start"),
+            {"code": short_code}
+        ).all()
+    assert [tuple(row) for row in rows] == [
+        ("day", hour.strftime("%Y-%m-%d 00:00:00"), 3),
+        ("hour", hour.strftime("%Y-%m-%d 10:00:00"), 2),
+        ("hour", hour.strftime("%Y-%m-%d 11:00:00"), 1),
+    ]
+
+def test_stats_include_the_boundary_buckets(client, make_user):
+    short_code = create_link(client, make_user, "https://example.com/rollup/boundary")
+    now = datetime.utcnow()
+    # The first hour and the first day of the window, plus one bucket before each
+    add_events(short_code, now - timedelta(hours=2), now - timedelta(days=3),
+               now - timedelta(hours=3, minutes=1), now - timedelta(days=4, minutes=1))
+    rollups.compact_clicks(database.engine)
+
+    data = client.get(f"/api/shortlinks/{short_code}/stats", params={"hours": 2, "days": 3}).json()
+    hourly = [bucket["bucket"] for bucket in data["hourly"]]
+    daily = [bucket["bucket"] for bucket in data["daily"]]
+    assert hourly[0] == (now - timedelta(hours=2)).strftime("%Y-%m-%dT%H:00:00")
+    assert daily[0] == (now - timedelta(days=3)).strftime("%Y-%m-%dT00:00:00")
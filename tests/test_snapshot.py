@@ -0,0 +1,82 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+import snapshot
+from models import Base
+from snapshot import SnapshotBuilder, SnapshotReader, build_snapshot
+
+EXPIRY = datetime(2030, 1, 2, 3, 4, 5)
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, telegram_id, username, balance) VALUES (1, 1, 'u', 0)"))
+    add_links(engine, [(f"code{n:02d}", None) for n in range(20)] + [("dated", EXPIRY)])
+    add_links(engine, [("deleted", None)], status="deleted")
+    return engine
+
+def add_links(engine, links, status="active"):
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO shortlinks (user_id, original_url, short_code, clicks, status, expiry_date) "
+                 "VALUES (1, 'https://example.com/' || :code, :code, 0, :status, :expiry)"),
+            [{"code": code, "expiry": expiry, "status": status} for code, expiry in links]
+        )
+
+def test_build_and_lookup_round_trip(engine, tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    result = build_snapshot(engine, path)
+    assert result["entries"] == 21
+    assert result["slots"] == 64
+
+    reader = SnapshotReader(path)
+    for n in range(20):
+        assert reader.lookup(f"code{n:02d}") == (f"https://example.com/code{n:02d}", None)
+    assert reader.lookup("dated") == ("https://example.com/dated", EXPIRY)
+    assert reader.stats()["entries"] == 21
+
+def test_missing_code_and_missing_file(engine, tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    assert SnapshotReader(path).lookup("code00") is None
+
+    build_snapshot(engine, path)
+    reader = SnapshotReader(path)
+    assert reader.lookup("nothere") is None
+    assert reader.lookup("deleted") is None
+    assert (reader.hits, reader.misses) == (0, 2)
+
+def test_hash_collisions_are_probed(engine, tmp_path, monkeypatch):
+    # Every code gets the same hash, so each lookup walks the probe chain
+    monkeypatch.setattr(snapshot, "_hash", lambda code: 1)
+    path = str(tmp_path / "snapshot.bin")
+    build_snapshot(engine, path)
+
+    reader = SnapshotReader(path)
+    assert reader.lookup("code00") == ("https://example.com/code00", None)
+    assert reader.lookup("code19") == ("https://example.com/code19", None)
+    assert reader.lookup("dated") == ("https://example.com/dated", EXPIRY)
+    assert reader.lookup("nothere") is None
+
+def test_mark_dirty_triggers_rebuild(engine, tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    builder = SnapshotBuilder(engine, path, interval=60, debounce=0.01)
+    reader = SnapshotReader(path, check_interval=0)
+    builder.start()
+    try:
+        assert reader.lookup("fresh") is None
+        add_links(engine, [("fresh", None)])
+        builder.mark_dirty()
+
+        deadline = time.monotonic() + 5
+        while reader.lookup("fresh") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert reader.lookup("fresh") == ("https://example.com/fresh", None)
+        assert builder.last_result["entries"] == 22
+    finally:
+        builder.stop()
@@ -0,0 +1,132 @@
+from client import BackendResponse
+from state import ApiStateBackend, SQLiteStateBackend, StateStore
+
+class MemoryBackend:
+    def __init__(self):
+        self.rows = {}
+        self.loads = 0
+        self.saves = []
+        self.fail = False
+
+    async def load(self, user_id):
+        self.loads += 1
+        return self.rows.get(user_id)
+
+    async def save_many(self, states):
+        if self.fail:
+            raise ConnectionError("backend down")
+        self.saves.append(dict(states))
+        self.rows.update(states)
+
+    async def close(self):
+        pass
+
+async def test_updates_are_written_in_batches():
+    backend = MemoryBackend()
+    store = StateStore(backend, batch_size=2)
+    await store.update(1, terms_accepted=True)
+    assert backend.saves == []
+    await store.update(2, terms_accepted=True)  # batch is full
+    await store.update(3, step="pay")
+    assert backend.saves == [{1: {"terms_accepted": True}, 2: {"terms_accepted": True}}]
+
+    assert await store.flush() == 1
+    assert backend.rows[3] == {"step": "pay"}
+    assert store.stats()["pending_writes"] == 0
+
+async def test_cache_hits_and_lru_eviction():
+    backend = MemoryBackend()
+    backend.rows = {1: {"a": 1}, 2: {"b": 2}, 3: {"c": 3}}
+    store = StateStore(backend, max_entries=2)
+    assert await store.get(1) == {"a": 1}
+    assert await store.get(1) == {"a": 1}
+    assert backend.loads == 1
+    await store.get(2)
+    await store.get(3)  # evicts 1
+    await store.get(1)
+    assert backend.loads == 4
+    assert store.stats()["evictions"] == 2
+
+async def test_evicted_unwritten_state_is_not_lost():
+    backend = MemoryBackend()
+    store = StateStore(backend, max_entries=1, batch_size=100)
+    await store.update(1, step="pay")
+    await store.get(2)  # evicts user 1 before the flush
+    assert await store.get(1) == {"step": "pay"}
+    await store.flush()
+    assert backend.rows[1] == {"step": "pay"}
+
+async def test_failed_flush_keeps_newer_updates():
+    backend = MemoryBackend()
+    store = StateStore(backend, batch_size=100)
+    await store.update(1, step="one")
+    backend.fail = True
+    assert await store.flush() == 0
+    await store.update(1, step="two")
+    backend.fail = False
+    assert await store.flush() == 1
+    assert backend.rows[1] == {"step": "two"}
+
+async def test_expired_entry_is_reloaded(monkeypatch):
+    import state
+    now = [100.0]
+    monkeypatch.setattr(state.time, "monotonic", lambda: now[0])
+    backend = MemoryBackend()
+    store = StateStore(backend, ttl_seconds=10)
+    await store.get(1)
+    now[0] += 11
+    await store.get(1)
+    assert backend.loads == 2
+
+async def test_sqlite_backend_survives_restart(tmp_path):
+    path = str(tmp_path / "bot_state.db")
+    store = StateStore(SQLiteStateBackend(path))
+    await store.update(7, terms_accepted=True)
+    await store.stop()
+
+    restarted = StateStore(SQLiteStateBackend(path))
+    assert await restarted.get(7) == {"terms_accepted": True}
+    assert await restarted.get(8) == {}
+    await restarted.stop()
+
+class FakeClient:
+    """Answers every request with ``status`` and records the paths"""
+
+    def __init__(self, status=200, data=None):
+        self.status = status
+        self.data = data
+        self.requests = []
+
+    async def get(self, path, **kwargs):
+        self.requests.append(("GET", path))
+        return BackendResponse(self.status, self.data)
+
+    async def put(self, path, **kwargs):
+        self.requests.append(("PUT", path))
+        return BackendResponse(self.status, self.data)
+
+async def test_api_backend_server_error_is_not_cached():
+    client = FakeClient(status=500)
+    store = StateStore(ApiStateBackend(client))
+    assert await store.get(5) == {}
+    client.status, client.data = 200, {"terms_accepted_at": "2024-01-01T00:00:00"}
+    assert await store.get(5) == {"terms_accepted": True}
+    assert len(client.requests) == 2
+
+async def test_api_backend_unknown_user_is_cached():
+    client = FakeClient(status=404, data={"detail": "User not found"})
+    store = StateStore(ApiStateBackend(client))
+    assert await store.get(6) == {}
+    assert await store.get(6) == {}
+    assert len(client.requests) == 1
+
+async def test_api_backend_failed_save_is_retried():
+    client = FakeClient(status=500)
+    store = StateStore(ApiStateBackend(client))
+    await store.update(7, terms_accepted=True)
+    assert await store.flush() == 0
+    assert store.stats()["pending_writes"] == 1
+
+    client.status = 200
+    assert await store.flush() == 1
+    assert client.requests[-2:] == [("PUT", "/api/users/7/terms")] * 2
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+import userstats
+from models import Base
+from sweeper import ExpirySweeper
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, telegram_id, username, balance) VALUES "
+                          "(1, 1, 'one', 0), (2, 2, 'two', 0)"))
+    return engine
+
+def add_links(engine, user_id, prefix, count, expiry, status="active"):
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO shortlinks (user_id, original_url, short_code, clicks, status, expiry_date) "
+                 "VALUES (:user_id, 'https://example.com/' || :code, :code, 0, :status, :expiry)"),
+            [{"user_id": user_id, "code": f"{prefix}{n}", "status": status,
+              "expiry": expiry + timedelta(minutes=n) if expiry else None} for n in range(count)]
+        )
+
+def totals(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT user_id, active_links, expired_links FROM user_stats ORDER BY user_id"))
+        return {row.user_id: (row.active_links, row.expired_links) for row in rows}
+
+def statuses(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT status, COUNT(*) FROM shortlinks GROUP BY status"))
+        return dict(rows.all())
+
+def test_sweep_expires_due_links_in_chunks(engine):
+    now = datetime.utcnow()
+    add_links(engine, 1, "a", 5, now - timedelta(days=2))
+    add_links(engine, 2, "b", 3, now - timedelta(days=1))
+    add_links(engine, 1, "later", 2, now + timedelta(days=1))
+    add_links(engine, 2, "forever", 2, None)
+    add_links(engine, 2, "old", 1, now - timedelta(days=3), status="expired")
+    userstats.rebuild(engine)
+    assert totals(engine) == {1: (7, 0), 2: (5, 1)}
+
+    evicted = []
+    sweeper = ExpirySweeper(engine, chunk_size=3, pause=0, on_expired=evicted.append)
+    result = sweeper.sweep_once()
+
+    assert (result["expired_links"], result["chunks"]) == (8, 3)
+    assert [len(chunk) for chunk in evicted] == [3, 3, 2]
+    # Oldest expiry first: user 1's links, then user 2's
+    assert [row.short_code for chunk in evicted for row in chunk] == \
+        ["a0", "a1", "a2", "a3", "a4", "b0", "b1", "b2"]
+    assert statuses(engine) == {"active": 4, "expired": 9}
+    assert totals(engine) == {1: (2, 5), 2: (2, 4)}
+
+def test_full_last_chunk_ends_on_empty_query(engine):
+    add_links(engine, 1, "a", 6, datetime.utcnow() - timedelta(hours=1))
+    evicted = []
+    sweeper = ExpirySweeper(engine, chunk_size=3, pause=0, on_expired=evicted.append)
+    assert sweeper.sweep_once()["chunks"] == 2
+    assert [len(chunk) for chunk in evicted] == [3, 3]
+    assert totals(engine) == {1: (-6, 6)}  # deltas only; create_all seeds no totals
+
+    # Nothing left: no chunk, no callback, no further deltas
+    assert sweeper.sweep_once()["expired_links"] == 0
+    assert len(evicted) == 2
+    assert totals(engine) == {1: (-6, 6)}
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, Message, Update
+
+from updates import ChatOrderedUpdateProcessor
+
+def make_update(update_id, chat_id):
+    chat = Chat(chat_id, Chat.PRIVATE)
+    return Update(update_id, message=Message(update_id, datetime.now(), chat, text=f"#{update_id}"))
+
+async def test_chat_order_kept_while_chats_run_concurrently():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=4)
+    log = []
+    running = {1: 0, 2: 0}
+    second_chat_started = asyncio.Event()
+
+    async def handle(chat_id, update_id):
+        running[chat_id] += 1
+        assert running[chat_id] == 1, "two updates of one chat ran at once"
+        log.append((chat_id, update_id))
+        if chat_id == 2:
+            second_chat_started.set()
+        else:
+            # Chat 1's first update only finishes once chat 2 is running
+            await asyncio.wait_for(second_chat_started.wait(), timeout=2)
+        await asyncio.sleep(0.01)
+        running[chat_id] -= 1
+
+    sent = [(1, 1), (2, 2), (1, 3), (2, 4), (1, 5), (2, 6)]
+    tasks = [
+        asyncio.create_task(processor.process_update(make_update(update_id, chat_id), handle(chat_id, update_id)))
+        for chat_id, update_id in sent
+    ]
+    await asyncio.sleep(0)
+    assert processor.stats()["active_chats"] == 2
+    await asyncio.gather(*tasks)
+
+    for chat_id in (1, 2):
+        assert [u for c, u in log if c == chat_id] == [u for c, u in sent if c == chat_id]
+    assert log[:2] == [(1, 1), (2, 2)]
+    assert processor.stats() == {"max_concurrent_updates": 4, "active_chats": 0, "queued_updates": 0}
+
+async def test_updates_without_chat_are_not_serialized():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=2)
+    both_running = asyncio.Event()
+    started = []
+
+    async def handle():
+        started.append(1)
+        if len(started) == 2:
+            both_running.set()
+        await asyncio.wait_for(both_running.wait(), timeout=2)
+
+    await asyncio.gather(processor.process_update(object(), handle()), processor.process_update(object(), handle()))
+    assert processor.stats()["active_chats"] == 0
@@ -0,0 +1,76 @@
+import asyncio
+
+from admin import AdminManager
+from client import BackendResponse
+from usercache import UserCache
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+        self.balance = 100
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, telegram_id):
+        self.calls += 1
+        balance = self.balance
+        await self.release.wait()
+        return {"telegram_id": telegram_id, "balance": balance, "total_links": 1}
+
+async def test_concurrent_misses_share_one_load():
+    loader = Loader()
+    loader.release.clear()
+    cache = UserCache(loader)
+    pending = [asyncio.ensure_future(cache.get(1)) for _ in range(5)]
+    await asyncio.sleep(0)
+    loader.release.set()
+    records = await asyncio.gather(*pending)
+    assert loader.calls == 1
+    assert all(record["balance"] == 100 for record in records)
+    assert cache.stats()["coalesced"] == 4
+
+async def test_write_through_updates():
+    cache = UserCache(Loader())
+    await cache.get(1)
+    cache.update(1, balance=90)
+    cache.add(1, total_links=1)
+    record = await cache.get(1)
+    assert (record["balance"], record["total_links"]) == (90, 2)
+    record["balance"] = 0  # callers get copies
+    assert (await cache.get(1))["balance"] == 90
+
+async def test_change_during_load_is_not_overwritten():
+    loader = Loader()
+    loader.release.clear()
+    cache = UserCache(loader)
+    loading = asyncio.ensure_future(cache.get(1))
+    await asyncio.sleep(0)
+    cache.invalidate(1)  # e.g. a payment was approved while the old record was in flight
+    loader.release.set()
+    await loading
+    loader.balance = 200
+    assert (await cache.get(1))["balance"] == 200
+    assert loader.calls == 2
+
+class FakeBackend:
+    base_url = "http://backend"
+
+    def __init__(self, status=200):
+        self.status = status
+
+    async def put(self, path, json=None):
+        return BackendResponse(self.status, {"message": "Payment approved"})
+
+async def test_approved_payment_drops_cached_balance():
+    loader = Loader()
+    cache = UserCache(loader)
+    await cache.get(42)
+    admin = AdminManager(FakeBackend(status=500), user_cache=cache)
+    await admin.approve_payment(7, admin_id=1, telegram_id=42)
+    await cache.get(42)
+    assert loader.calls == 1  # failed approval keeps the cache
+
+    admin = AdminManager(FakeBackend(), user_cache=cache)
+    await admin.approve_payment(7, admin_id=1, telegram_id=42)
+    loader.balance = 600
+    assert (await cache.get(42))["balance"] == 600
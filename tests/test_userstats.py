@@ -0,0 +1,42 @@
+def summary(client, telegram_id):
+    response = client.get(f"/api/users/{telegram_id}/summary")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    return {column: data[column] for column in ("total_links", "active_links", "expired_links", "total_clicks")}
+
+def create_link(client, telegram_id, url):
+    response = client.post("/api/shortlinks", params={"telegram_id": telegram_id, "original_url": url})
+    assert response.status_code == 200, response.text
+    return response.json()["short_code"]
+
+def test_new_user_has_zero_totals(client, make_user):
+    assert summary(client, make_user()) == {
+        "total_links": 0, "active_links": 0, "expired_links": 0, "total_clicks": 0
+    }
+
+def test_totals_follow_create_click_and_delete(client, api, make_user):
+    telegram_id = make_user(balance=100)
+    first = create_link(client, telegram_id, "https://example.com/stats/1")
+    create_link(client, telegram_id, "https://example.com/stats/2")
+
+    for _ in range(3):
+        client.get(f"/{first}", follow_redirects=False)
+    api.click_accumulator.flush()
+    assert summary(client, telegram_id) == {
+        "total_links": 2, "active_links": 2, "expired_links": 0, "total_clicks": 3
+    }
+
+    assert client.delete(f"/api/shortlinks/{first}").status_code == 200
+    assert summary(client, telegram_id) == {
+        "total_links": 1, "active_links": 1, "expired_links": 0, "total_clicks": 0
+    }
+
+def test_rebuild_matches_incremental_totals(client, api, make_user):
+    telegram_id = make_user(balance=100)
+    code = create_link(client, telegram_id, "https://example.com/stats/rebuild")
+    client.get(f"/{code}", follow_redirects=False)
+    api.click_accumulator.flush()
+    before = summary(client, telegram_id)
+
+    assert client.post("/api/admin/rebuild-user-stats").json()["users_rebuilt"] >= 1
+    assert summary(client, telegram_id) == before
@@ -0,0 +1,48 @@
+import pytest
+
+import utils
+
+@pytest.mark.parametrize("first, second", [
+    ("http://Example.com/a/", "https://example.com:443/a"),
+    ("https://example.com:443/a", "example.com/a"),
+    ("https://example.com/?b=2&a=1&utm_source=tg&fbclid=x", "https://example.com?a=1&b=2"),
+    ("https://example.com/page#section", "https://example.com/page"),
+    ("https://example.com/app#/users/1", "https://example.com/app/#/users/1"),
+])
+def test_same_canonical_url(first, second):
+    assert utils.url_fingerprint(first) == utils.url_fingerprint(second)
+
+@pytest.mark.parametrize("first, second", [
+    ("https://example.com/app#/a", "https://example.com/app#/b"),
+    ("https://example.com/app#!/a", "https://example.com/app#!/b"),
+    ("https://example.com:8080/", "https://example.com/"),
+    ("https://example.com/?a=1", "https://example.com/?a=2"),
+])
+def test_different_canonical_url(first, second):
+    assert utils.url_fingerprint(first) != utils.url_fingerprint(second)
+
+def test_unparseable_url_falls_back_to_raw_fingerprint():
+    with pytest.raises(ValueError):
+        utils.canonicalize_url("https://x.com:abc/")
+    fingerprint = utils.url_fingerprint("https://x.com:abc/")
+    assert len(fingerprint) == 32
+    assert fingerprint != utils.url_fingerprint("https://x.com:abd/")
+    assert not utils.is_valid_url("https://x.com:abc/")
+    assert not utils.is_valid_url("https://x.com:99999/")
+
+def test_create_shortlink_with_bad_port(client, make_user):
+    telegram_id = make_user(balance=100)
+    for dedupe in (False, True):
+        response = client.post("/api/shortlinks", params={
+            "telegram_id": telegram_id, "original_url": "https://x.com:abc/", "dedupe": dedupe
+        })
+        assert response.status_code == 200, response.text
+
+def test_bulk_rejects_only_the_bad_port_item(client, make_user):
+    telegram_id = make_user(balance=100)
+    response = client.post("/api/shortlinks/bulk", json={"telegram_id": telegram_id, "items": [
+        {"original_url": "https://x.com:abc/"},
+        {"original_url": "https://example.com/fine"},
+    ]})
+    assert response.status_code == 200, response.text
+    assert [result["status"] for result in response.json()["results"]] == ["error", "created"]